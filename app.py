@@ -1,7 +1,35 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 
+from budget import UNLIMITED, max_coverage
+from comparison import compare_tools
+from cost_curves import break_even_table, cheapest_envelope, cost_curves
+from forecast import forecast, growth_params
+from instrumentation import RerunTimer
+from optimizer import cheapest_coverage
+from portfolio import CONFIG_FIELDS as PORTFOLIO_FIELDS, Portfolio
+from pricing import EXCHANGE_RATES, TIERS, TOOLS_DATA, current_catalog, quote
+from quote_cache import QuoteCache
+from report_export import main_metric, report_record, report_text, write_zip
+from scenario_store import ScenarioStore
+from sensitivity import cost_breaks, cost_grid, grid_axis, tier_thresholds
+from tool_profiles import (
+    NO_PROFILE,
+    PLATFORMS,
+    TOOL_PROFILES,
+    USAGE_LIMIT_LABELS,
+    form_inputs,
+    input_field,
+    input_label,
+    sensitivity_axes,
+)
+from usage import usage_quote
+
 # Configurazione pagina
 st.set_page_config(
     page_title="AI Brand Monitoring Calculator",
@@ -9,213 +37,225 @@ st.set_page_config(
     layout="wide"
 )
 
-# Dati dei tool e relativi piani
-TOOLS_DATA = {
-    "Profound": {
-        "description": "Answer engine tracking specializzato",
-        "currency": "$",
-        "plans": {
-            "Base": {
-                "price_monthly": 499,
-                "answer_engines": 4,
-                "companies": 1,
-                "prompts": 200,
-                "data_history": "1 mese",
-                "features": ["4 answer engines tracked", "1 company tracked", "200 prompts tracked", "1 mese data history"]
-            }
-        }
-    },
-    "Otterly.ai": {
-        "description": "Leader nel monitoraggio AI search",
-        "currency": "$",
-        "plans": {
-            "Lite": {
-                "price_monthly": 29,
-                "prompts": 15,
-                "features": ["Report brand illimitati", "AI prompt research", "Monitoraggio base", "Tutte le piattaforme AI"]
-            },
-            "Standard": {
-                "price_monthly": 189,
-                "prompts": 100,
-                "features": ["Tutto del Lite", "100 prompts/mese", "Analytics avanzati", "Export dati"]
-            },
-            "Premium": {
-                "price_monthly": 489,
-                "prompts": 400,
-                "features": ["Tutto dello Standard", "400 prompts/mese", "Priority support", "API access"]
-            }
-        }
-    },
-    "Ubersuggest": {
-        "description": "SEO + AI monitoring completo",
-        "currency": "€",
-        "plans": {
-            "Individual": {
-                "price_monthly": 29,
-                "users": 1,
-                "domains": 1,
-                "daily_searches": 150,
-                "prompts_analyze": 50,
-                "competitors": 5,
-                "pages_crawled": 1000,
-                "prompts_tracked": 125,
-                "ai_prompts": 10,
-                "features": ["150 ricerche/giorno", "50 prompts analisi", "5 competitor", "1000 pagine scansionate", "10 AI prompts/mese"]
-            },
-            "Business": {
-                "price_monthly": 49,
-                "users": 2,
-                "domains": 7,
-                "daily_searches": 300,
-                "prompts_analyze": 200,
-                "competitors": 10,
-                "pages_crawled": 5000,
-                "prompts_tracked": 150,
-                "ai_prompts": 15,
-                "prompt_frequency": "ogni 2 settimane",
-                "features": ["2 utenti", "7 domini", "300 ricerche/giorno", "200 prompts analisi", "10 competitor", "15 AI prompts/2 settimane"]
-            }
-        }
-    },
-    "Conductor": {
-        "description": "Enterprise SEO & content platform",
-        "currency": "€",
-        "plans": {
-            "Professional": {
-                "price_monthly": 620,
-                "pages": 1000,
-                "prompts": 500,
-                "drafts": 60,
-                "features": ["1000 pagine", "500 prompts", "60 drafts", "Content optimization", "SEO insights"]
-            },
-            "Enterprise": {
-                "price_monthly": 1310,
-                "pages": 5000,
-                "prompts": 1000,
-                "drafts": 120,
-                "features": ["5000 pagine", "1000 prompts", "120 drafts", "Advanced analytics", "Priority support", "Custom integrations"]
-            }
-        }
+def compute_results(selected_tool, requirement, billing_cycle, catalog_version):
+    """Calcola preventivo e tabelle per una configurazione con la versione del catalogo data"""
+    import pandas as pd
+    
+    plan, monthly_cost, yearly_cost = quote(selected_tool, billing_cycle=billing_cycle, **requirement)
+    
+    plan_features = TOOLS_DATA[selected_tool]['plans'][plan]['features']
+    
+    # Tabella comparativa: tutti i tool prezzati sugli stessi input, in $
+    comparison = compare_tools(
+        billing_cycle=billing_cycle,
+        currencies={tool: data['currency'] for tool, data in TOOLS_DATA.items()},
+        cache=get_quote_cache(),
+        version=catalog_version,
+        executor=get_pricing_executor(),
+        **requirement
+    )
+    df = pd.DataFrame({
+        "Tool": [row["tool"] for row in comparison],
+        "Piano consigliato": [row["plan"] for row in comparison],
+        "Prezzo/mese ($)": [round(row["monthly_cost"], 2) for row in comparison],
+        "Costo annuale ($)": [round(row["yearly_cost"], 2) for row in comparison],
+        "Costo per prompt ($)": [round(row["cost_per_prompt"], 2) for row in comparison],
+        "Caratteristica Principale": [TOOL_PROFILES.get(row["tool"], NO_PROFILE).feature for row in comparison],
+        "Ideale per": [TOOL_PROFILES.get(row["tool"], NO_PROFILE).ideal_for for row in comparison]
+    })
+    
+    # Combinazione più economica su tutti i tool, anche dividendo i prompts
+    coverage = cheapest_coverage(
+        currencies={tool: data['currency'] for tool, data in TOOLS_DATA.items()},
+        billing_cycle=billing_cycle,
+        **requirement
+    )
+    coverage_table = pd.DataFrame({
+        "Tool": [s["tool"] for s in coverage["subscriptions"]],
+        "Piano": [s["plan"] for s in coverage["subscriptions"]],
+        "Account": [s["accounts"] for s in coverage["subscriptions"]],
+        "Prompts per account": [s["prompts"] for s in coverage["subscriptions"]],
+        "Prezzo/mese per account": [f"{s['currency']}{s['monthly_cost']}" for s in coverage["subscriptions"]],
+    })
+    
+    return {
+        "plan": plan,
+        "monthly_cost": monthly_cost,
+        "yearly_cost": yearly_cost,
+        "main_metric": main_metric(selected_tool, requirement),
+        "plan_features": plan_features,
+        "comparison": df,
+        "coverage": coverage,
+        "coverage_table": coverage_table,
+        "roi_benefits": TOOL_PROFILES.get(selected_tool, NO_PROFILE).roi_benefits,
+        "catalog_version": catalog_version
     }
-}
 
-PLATFORMS = ["ChatGPT", "Perplexity", "Google AI Overviews", "Gemini", "Copilot"]
+def restored(name, default=None, tool=None):
+    """Valore dello scenario ricaricato dallo storico, o default.
+    
+    Con tool, il valore vale solo se lo scenario è di quel tool (gli input hanno
+    limiti diversi per tool).
+    """
+    scenario = st.session_state.get("restored_scenario")
+    if not scenario or scenario.get(name) is None or (tool and scenario["tool"] != tool):
+        return default
+    return scenario[name]
 
-def calculate_cost_otterly(num_prompts, billing_cycle="monthly"):
-    """Calcola il costo per Otterly.ai"""
-    if num_prompts <= 15:
-        plan = "Lite"
-        monthly_cost = 29
-    elif num_prompts <= 100:
-        plan = "Standard"
-        monthly_cost = 189
-    else:
-        plan = "Premium"
-        monthly_cost = 489
-        if num_prompts > 400:
-            extra_prompts = num_prompts - 400
-            monthly_cost += (extra_prompts // 100) * 150
-    
-    yearly_discount = 0.85 if billing_cycle == "yearly" else 1
-    yearly_cost = monthly_cost * 12 * yearly_discount
-    
-    return plan, monthly_cost, yearly_cost
+@st.cache_resource
+def get_scenario_store():
+    """Archivio SQLite degli scenari, condiviso da tutte le sessioni del processo"""
+    return ScenarioStore()
 
-def calculate_cost_profound(num_prompts, num_companies=1, billing_cycle="monthly"):
-    """Calcola il costo per Profound"""
-    base_cost = 499
+@st.cache_resource
+def get_quote_cache():
+    """Cache dei preventivi condivisa da tutte le sessioni del processo"""
+    ttl = os.environ.get("QUOTE_CACHE_TTL", "3600")
+    return QuoteCache(
+        maxsize=int(os.environ.get("QUOTE_CACHE_SIZE", "1024")),
+        ttl=float(ttl) if ttl else None
+    )
+
+@st.cache_resource
+def get_pricing_executor():
+    """Pool di thread condiviso per prezzare i tool in parallelo, se PRICING_WORKERS > 1.
+    
+    Il pricing a tabelle costa microsecondi e tiene il GIL: conviene solo con modelli
+    di pricing che fanno I/O o calcoli NumPy pesanti.
+    """
+    workers = int(os.environ.get("PRICING_WORKERS", "1"))
+    return ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+@st.cache_data(max_entries=64)
+def compute_cost_curves(lo, hi, companies, domains, pages, catalog_version):
+    """Curve di costo in $ di tutti i tool, break-even e tool più economico per tratto"""
+    import pandas as pd
     
-    extra_cost = 0
-    if num_prompts > 200:
-        extra_prompts = num_prompts - 200
-        extra_cost += (extra_prompts // 100) * 200
+    curves = cost_curves(lo, hi, companies, domains, pages)
     
-    if num_companies > 1:
-        extra_cost += (num_companies - 1) * 300
+    # Per il grafico bastano ~2000 gradini per tool: oltre, sono più fitti dei pixel
+    frames = []
+    for tool, (starts, costs, _) in curves.items():
+        idx = np.unique(np.linspace(0, len(starts) - 1, min(len(starts), 2000)).astype(int))
+        frames.append(pd.DataFrame({
+            "Tool": tool,
+            "Prompts": np.append(starts[idx], hi),
+            "Costo mensile": np.append(costs[idx], costs[-1])
+        }))
+    chart_data = pd.concat(frames, ignore_index=True)
     
-    monthly_cost = base_cost + extra_cost
-    yearly_discount = 0.85 if billing_cycle == "yearly" else 1
-    yearly_cost = monthly_cost * 12 * yearly_discount
+    break_evens = pd.DataFrame(
+        break_even_table(curves),
+        columns=["Da prompts", "Più economico", "Rispetto a"]
+    )
     
-    return "Base", monthly_cost, yearly_cost
+    tools = list(curves)
+    starts, winners, costs = cheapest_envelope(curves)
+    envelope = pd.DataFrame({
+        "Da prompts": starts,
+        "Tool più economico": [tools[i] for i in winners],
+        "Costo mensile ($)": costs.round(2)
+    })
+    return chart_data, break_evens, envelope
 
-def calculate_cost_ubersuggest(ai_prompts, domains=1, billing_cycle="monthly"):
-    """Calcola il costo per Ubersuggest"""
-    if ai_prompts <= 10 and domains <= 1:
-        plan = "Individual"
-        monthly_cost = 29
-    else:
-        plan = "Business"
-        monthly_cost = 49
-        if domains > 7:
-            monthly_cost += (domains - 7) * 10
-    
-    yearly_discount = 0.85 if billing_cycle == "yearly" else 1
-    yearly_cost = monthly_cost * 12 * yearly_discount
-    
-    return plan, monthly_cost, yearly_cost
+@st.cache_data(max_entries=64)
+def compute_sensitivity(tool, x_axis, y_axis, fixed, catalog_version):
+    """Heatmap del costo mensile su una griglia x × y e soglie dei piani sui due assi"""
+    import pandas as pd
+    
+    (x_input, x_lo, x_hi), (y_input, y_lo, y_hi) = x_axis, y_axis
+    xs = grid_axis(x_lo, x_hi, breaks=cost_breaks(tool, x_input, x_lo, x_hi))
+    ys = grid_axis(y_lo, y_hi, breaks=cost_breaks(tool, y_input, y_lo, y_hi))
+    plan_id, costs = cost_grid(tool, x_input, xs, y_input, ys, dict(fixed))
+    
+    # Ogni cella copre i valori fino alla successiva, così i bordi cadono sulle soglie
+    x_end = np.append(xs[1:], x_hi + 1)
+    y_end = np.append(ys[1:], y_hi + 1)
+    grid = pd.DataFrame({
+        "x": np.tile(xs, len(ys)),
+        "x2": np.tile(x_end, len(ys)),
+        "y": np.repeat(ys, len(xs)),
+        "y2": np.repeat(y_end, len(xs)),
+        "Costo mensile": costs.ravel(),
+        "Piano": np.asarray(TIERS[tool].plans)[plan_id.ravel()]
+    })
+    thresholds = (
+        pd.DataFrame(tier_thresholds(tool, x_input, x_lo, x_hi), columns=["Valore", "Soglia"]),
+        pd.DataFrame(tier_thresholds(tool, y_input, y_lo, y_hi), columns=["Valore", "Soglia"])
+    )
+    return grid, thresholds
 
-def calculate_cost_conductor(prompts, pages=1000, billing_cycle="monthly"):
-    """Calcola il costo per Conductor"""
-    if prompts <= 500 and pages <= 1000:
-        plan = "Professional"
-        monthly_cost = 620
-    else:
-        plan = "Enterprise"
-        monthly_cost = 1310
-        if prompts > 1000:
-            monthly_cost += ((prompts - 1000) // 500) * 400
-        if pages > 5000:
-            monthly_cost += ((pages - 5000) // 1000) * 100
-    
-    yearly_discount = 0.85 if billing_cycle == "yearly" else 1
-    yearly_cost = monthly_cost * 12 * yearly_discount
-    
-    return plan, monthly_cost, yearly_cost
+@st.cache_data(max_entries=16)
+def compute_forecast(initial, growth, months, paths, pages, seed, catalog_version):
+    """Simulazione Monte Carlo della spesa, condivisa tra sessioni con gli stessi parametri"""
+    return forecast(
+        dict(initial),
+        {name: growth_params(*rates) for name, rates in growth},
+        months=months,
+        paths=paths,
+        pages=pages,
+        seed=seed
+    )
 
-def main():
-    # Header
-    st.title("🔍 AI Brand Monitoring Cost Calculator")
-    st.markdown("**Confronta i costi tra i principali tool di monitoraggio brand su AI**")
+# Le sezioni della pagina sono fragment: un widget dentro una sezione riesegue solo
+# quella sezione, non tutto lo script.
+
+@st.fragment
+def tool_info():
+    """Informazioni sui tool, nella sidebar"""
+    st.header("ℹ️ Informazioni Tool")
+    
+    selected_tool_info = st.selectbox(
+        "Seleziona tool per info",
+        list(TOOLS_DATA.keys())
+    )
+    
+    st.markdown(f"### {selected_tool_info}")
+    st.markdown(f"*{TOOLS_DATA[selected_tool_info]['description']}*")
+    
+    st.markdown("**Piani disponibili:**")
+    for plan_name in TOOLS_DATA[selected_tool_info]['plans'].keys():
+        plan = TOOLS_DATA[selected_tool_info]['plans'][plan_name]
+        currency = TOOLS_DATA[selected_tool_info]['currency']
+        st.markdown(f"- **{plan_name}**: {currency}{plan['price_monthly']}/mese")
+    
     st.markdown("---")
+    st.markdown("### Piattaforme AI monitorate")
+    st.markdown("\n".join(f"- {platform}" for platform in PLATFORMS))
     
-    # Sidebar per informazioni
-    with st.sidebar:
-        st.header("ℹ️ Informazioni Tool")
-        
-        selected_tool_info = st.selectbox(
-            "Seleziona tool per info",
-            list(TOOLS_DATA.keys())
-        )
-        
-        st.markdown(f"### {selected_tool_info}")
-        st.markdown(f"*{TOOLS_DATA[selected_tool_info]['description']}*")
-        
-        st.markdown("**Piani disponibili:**")
-        for plan_name in TOOLS_DATA[selected_tool_info]['plans'].keys():
-            plan = TOOLS_DATA[selected_tool_info]['plans'][plan_name]
-            currency = TOOLS_DATA[selected_tool_info]['currency']
-            st.markdown(f"- **{plan_name}**: {currency}{plan['price_monthly']}/mese")
-        
-        st.markdown("---")
-        st.markdown("### Piattaforme AI monitorate")
-        st.markdown("- ChatGPT\n- Perplexity\n- Google AI Overviews\n- Gemini\n- Copilot")
-        
-        st.markdown("---")
-        st.markdown("### 💡 Cosa sono i Prompts?")
-        st.markdown("""
-        I **prompts** (o query) sono le domande che vuoi monitorare sulle AI:
-        - "Miglior software CRM"
-        - "Come scegliere un consulente"
-        - "Alternative a [competitor]"
-        - "[Brand] vs [competitor]"
-        """)
+    st.markdown("---")
+    st.markdown("### 💡 Cosa sono i Prompts?")
+    st.markdown("""
+    I **prompts** (o query) sono le domande che vuoi monitorare sulle AI:
+    - "Miglior software CRM"
+    - "Come scegliere un consulente"
+    - "Alternative a [competitor]"
+    - "[Brand] vs [competitor]"
+    """)
+
+@st.fragment
+def configurator(timer, profile_mode=None):
+    """Selezione del tool, input e risultati, aggiornati a ogni modifica degli input.
+    
+    Competitor, piattaforme e frequenza cambiano solo volumi di query, testi e report:
+    rieseguono questa sezione e il preventivo arriva dalla cache. Tool, input prezzati e ciclo di
+    fatturazione servono anche alle sezioni sotto, quindi cambiandoli si riesegue tutta
+    la pagina. Nei rerun completi restituisce (tool, input, ciclo).
+    """
+    # main() imposta full_run prima di chiamare la sezione; nei rerun della sola sezione
+    # manca, e i tempi vanno in un cronometro proprio
+    full_run = st.session_state.pop("full_run", False)
+    if not full_run:
+        timer = RerunTimer(profile_mode)
+    # Catalogo prezzi ricaricato a caldo se il file è cambiato
+    catalog_version = current_catalog().version
     
     # Selezione tool principale
     st.subheader("🛠️ Seleziona il Tool")
     selected_tool = st.selectbox(
         "Quale tool vuoi usare?",
         list(TOOLS_DATA.keys()),
+        index=list(TOOLS_DATA.keys()).index(restored("tool")) if restored("tool") else 0,
         help="Ogni tool ha caratteristiche e prezzi diversi"
     )
     
@@ -226,87 +266,39 @@ def main():
     # Input form - tutto in verticale
     st.subheader("🎯 Configurazione Monitoraggio")
     
-    # Input specifici per tool
-    if selected_tool == "Otterly.ai":
-        num_prompts = st.number_input(
-            "Numero di prompts da monitorare",
-            min_value=1,
-            max_value=1000,
-            value=15,
-            step=5,
-            help="Quante query vuoi tracciare (es: 'miglior software per...', 'come scegliere...')"
-        )
-    
-    elif selected_tool == "Profound":
-        num_prompts = st.number_input(
-            "Numero di prompts da monitorare",
-            min_value=1,
-            max_value=1000,
-            value=200,
-            step=10,
-            help="Piano base include 200 prompts"
-        )
-        num_companies = st.number_input(
-            "Numero di company da tracciare",
-            min_value=1,
-            max_value=10,
-            value=1,
-            help="Piano base include 1 company"
-        )
-    
-    elif selected_tool == "Ubersuggest":
-        ai_prompts = st.number_input(
-            "AI Prompts al mese",
-            min_value=1,
-            max_value=100,
-            value=10,
-            step=5,
-            help="Numero di AI prompts/query al mese da monitorare"
-        )
-        domains = st.number_input(
-            "Numero di domini (progetti)",
-            min_value=1,
-            max_value=20,
-            value=1,
-            help="Quanti domini/progetti vuoi monitorare"
-        )
-    
-    elif selected_tool == "Conductor":
-        prompts = st.number_input(
-            "Numero di prompts",
-            min_value=1,
-            max_value=5000,
-            value=500,
-            step=50,
-            help="Quanti prompts vuoi tracciare"
-        )
-        pages = st.number_input(
-            "Numero di pagine",
-            min_value=100,
-            max_value=10000,
-            value=1000,
-            step=100,
-            help="Quante pagine del sito monitorare"
+    # Input prezzati dal catalogo: i prompts, più gli input che determinano il piano
+    profile = TOOL_PROFILES.get(selected_tool, NO_PROFILE)
+    requirement = {}
+    for name in form_inputs(selected_tool):
+        field = input_field(selected_tool, name)
+        requirement[name] = st.number_input(
+            field.label,
+            min_value=field.min_value,
+            max_value=field.max_value,
+            value=restored(name, field.value, selected_tool),
+            step=field.step,
+            help=field.help
         )
     
     competitors = st.number_input(
         "Numero di competitor da tracciare",
         min_value=0,
         max_value=20,
-        value=3,
+        value=restored("competitors", 3),
         help="Quanti competitor vuoi monitorare"
     )
     
     selected_platforms = st.multiselect(
         "🤖 Piattaforme da monitorare",
         PLATFORMS,
-        default=["ChatGPT", "Perplexity", "Google AI Overviews"],
+        default=restored("platforms", ["ChatGPT", "Perplexity", "Google AI Overviews"]),
         help="Seleziona le piattaforme AI da monitorare"
     )
     
     billing_cycle = st.radio(
         "💳 Ciclo di fatturazione",
         ["monthly", "yearly"],
+        index=["monthly", "yearly"].index(restored("billing_cycle", "monthly")),
         format_func=lambda x: "Mensile" if x == "monthly" else "Annuale (sconto ~15%)",
         horizontal=True
     )
@@ -314,260 +306,731 @@ def main():
     frequency = st.select_slider(
         "⏱️ Frequenza monitoraggio",
         options=["Settimanale", "Giornaliero", "Real-time"],
-        value="Settimanale"
+        value=restored("frequency", "Settimanale")
     )
     
     st.markdown("---")
     
-    # Calcolo e risultati
-    if st.button("🧮 Calcola Costi", type="primary", use_container_width=True):
-        
-        # Calcolo in base al tool selezionato
-        if selected_tool == "Otterly.ai":
-            plan, monthly_cost, yearly_cost = calculate_cost_otterly(num_prompts, billing_cycle)
-            main_metric = f"{num_prompts} prompts"
-        elif selected_tool == "Profound":
-            plan, monthly_cost, yearly_cost = calculate_cost_profound(num_prompts, num_companies, billing_cycle)
-            main_metric = f"{num_prompts} prompts, {num_companies} company"
-        elif selected_tool == "Ubersuggest":
-            plan, monthly_cost, yearly_cost = calculate_cost_ubersuggest(ai_prompts, domains, billing_cycle)
-            main_metric = f"{ai_prompts} AI prompts, {domains} domini"
-        elif selected_tool == "Conductor":
-            plan, monthly_cost, yearly_cost = calculate_cost_conductor(prompts, pages, billing_cycle)
-            main_metric = f"{prompts} prompts, {pages} pagine"
-        
-        st.success(f"✅ Calcolo completato per {selected_tool}!")
-        
-        # Risultati principali
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
+    # Le sezioni sotto dipendono da tool, input prezzati e ciclo: se cambiano, rerun completo
+    page_config = (selected_tool, requirement, billing_cycle)
+    if not full_run and page_config != st.session_state.get("page_config"):
+        st.rerun()
+    st.session_state["page_config"] = page_config
+    
+    timer.lap("form")
+    
+    # Preventivo e tabelle: condivisi tra sessioni con gli stessi input prezzati
+    results = get_quote_cache().get_or_compute(
+        (selected_tool, tuple(requirement.items()), billing_cycle),
+        lambda: compute_results(selected_tool, requirement, billing_cycle, catalog_version),
+        version=catalog_version
+    )
+    plan = results["plan"]
+    monthly_cost = results["monthly_cost"]
+    yearly_cost = results["yearly_cost"]
+    main_metric = results["main_metric"]
+    
+    # I risultati si aggiornano da soli: il pulsante salva lo scenario nello storico
+    if st.button("💾 Salva scenario", type="primary", use_container_width=True):
+        get_scenario_store().add({
+            "tool": selected_tool,
+            "plan": plan,
+            "billing_cycle": billing_cycle,
+            "competitors": competitors,
+            "platforms": selected_platforms,
+            "frequency": frequency,
+            "monthly_cost": monthly_cost,
+            "yearly_cost": float(yearly_cost),
+            "currency": currency,
+            "catalog_version": results["catalog_version"],
+            **requirement
+        })
+        st.success(f"✅ Scenario {selected_tool} {plan} salvato nello storico")
+    timer.lap("preventivo")
+    
+    # Risultati principali
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric(
+            "Piano Consigliato",
+            f"{selected_tool} - {plan}",
+            delta=main_metric
+        )
+    
+    with col2:
+        if billing_cycle == "monthly":
             st.metric(
-                "Piano Consigliato",
-                f"{selected_tool} - {plan}",
-                delta=main_metric
+                "Costo Mensile",
+                f"{currency}{monthly_cost}",
+                delta=f"{currency}{yearly_cost:.0f}/anno"
             )
-        
+        else:
+            savings = (monthly_cost * 12 - yearly_cost)
+            st.metric(
+                "Costo Annuale",
+                f"{currency}{yearly_cost:.0f}",
+                delta=f"Risparmi {currency}{savings:.0f}",
+                delta_color="inverse"
+            )
+    
+    with col3:
+        cost_per_prompt = monthly_cost / requirement["prompts"] if requirement["prompts"] > 0 else 0
+        st.metric(
+            "Costo per AI Prompt" if selected_tool == "Ubersuggest" else "Costo per Prompt",
+            f"{currency}{cost_per_prompt:.2f}",
+            delta="al mese"
+        )
+    
+    # Volumi reali: piattaforme, frequenza e competitor moltiplicano le query eseguite
+    usage = usage_quote(selected_tool, requirement, len(selected_platforms), frequency, competitors, billing_cycle)
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric(
+            "Query Eseguite",
+            f"{usage['executions']:,.0f}",
+            delta=f"al mese, {len(selected_platforms)} piattaforme",
+            delta_color="off"
+        )
+    
+    with col2:
+        if usage["plan"] is not None and usage["executions"] > 0:
+            st.metric(
+                "Costo per Query",
+                f"{currency}{usage['cost_per_query']:.4f}",
+                delta=f"piano {usage['plan']}",
+                delta_color="off"
+            )
+    
+    if usage["plan"] is None:
+        # Stima del modello dei volumi, non un vincolo del preventivo: avviso, non errore
+        exceeded = ", ".join(USAGE_LIMIT_LABELS[field] for field in usage["exceeded"])
+        st.warning(
+            f"⚠️ Secondo la stima dei volumi nessun piano {selected_tool} regge questo carico "
+            f"(superati i limiti di {exceeded}): il preventivo resta quello del piano {plan}."
+        )
+    elif usage["upgraded"]:
+        st.warning(
+            f"⚠️ Il piano {plan} non regge {usage['executions']:,.0f} query/mese con frequenza "
+            f"{frequency.lower()}: serve {selected_tool} {usage['plan']} ({currency}{usage['monthly_cost']}/mese)."
+        )
+    
+    # Dettagli del piano
+    st.markdown("---")
+    st.subheader(f"📊 Dettagli Piano {plan} - {selected_tool}")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("**Caratteristiche incluse:**")
+        for feature in results["plan_features"]:
+            st.markdown(f"✓ {feature}")
+        st.markdown(f"✓ Monitoraggio su {len(selected_platforms)} piattaforme")
+        st.markdown(f"✓ Tracking di {competitors} competitor")
+        st.markdown(f"✓ Aggiornamenti {frequency.lower()}")
+    
+    with col2:
+        st.markdown("**Piattaforme monitorate:**")
+        for platform in selected_platforms:
+            st.markdown(f"🤖 {platform}")
+    
+    timer.lap("metriche e piano")
+    
+    # Tabella comparativa tra tutti i tool
+    st.markdown("---")
+    st.subheader("📈 Confronto tra Tool")
+    
+    # Evidenzia il tool selezionato. Lo Styler si crea a ogni render: in cache c'è solo
+    # il DataFrame, condiviso tra sessioni, e st.dataframe ricalcola comunque lo stile
+    def highlight_selected(row):
+        if row['Tool'] == selected_tool:
+            return ['background-color: #28a745; color: white'] * len(row)
+        return [''] * len(row)
+    
+    st.dataframe(
+        results["comparison"].style.apply(highlight_selected, axis=1),
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    timer.lap("confronto")
+    
+    # Combinazione più economica su tutti i tool, anche dividendo i prompts
+    st.markdown("---")
+    st.subheader("🧩 Combinazione più Economica")
+    
+    coverage = results["coverage"]
+    st.markdown(
+        f"Per lo stesso fabbisogno ({main_metric}) la spesa minima è "
+        f"**{coverage['currency']}{coverage['monthly_cost']:.0f}/mese** "
+        f"({coverage['currency']}{coverage['yearly_cost']:.0f}/anno, valute convertite in {coverage['currency']})"
+    )
+    st.dataframe(
+        results["coverage_table"],
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    timer.lap("combinazione")
+    
+    # Raccomandazioni personalizzate
+    st.markdown("---")
+    st.subheader("💡 Raccomandazioni")
+    
+    if selected_tool == "Otterly.ai":
+        if requirement["prompts"] <= 15:
+            st.info("💰 **Ottimo inizio!** Il piano Lite è perfetto per testare il monitoraggio AI con pochi prompts.")
+        elif requirement["prompts"] <= 100:
+            st.info("⚙️ **Scelta equilibrata!** Lo Standard offre un ottimo rapporto qualità-prezzo.")
+        else:
+            st.warning("🚀 **Uso intensivo!** Considera il Premium o contatta Otterly per piani custom.")
+    
+    elif selected_tool == "Profound":
+        st.info("🎯 **Tool specializzato!** Profound è ideale per focus su answer engines e tracking profondo.")
+        if requirement["prompts"] > 200:
+            st.warning(f"⚠️ Stai superando i 200 prompts inclusi. Costo stimato per {requirement['prompts'] - 200} prompts extra.")
+    
+    elif selected_tool == "Ubersuggest":
+        st.info("📊 **All-in-one!** Ubersuggest combina SEO tradizionale con AI prompt monitoring.")
+        if requirement["domains"] > 1:
+            st.success("✅ Ottimo per gestire più progetti/clienti con prompts diversificati.")
+    
+    elif selected_tool == "Conductor":
+        st.info("🏢 **Enterprise solution!** Conductor è la scelta per grandi organizzazioni.")
+        if requirement["prompts"] > 500:
+            st.success("✅ Il piano Enterprise ti darà più flessibilità per prompt tracking massivo.")
+    
+    timer.lap("raccomandazioni")
+    
+    # ROI Estimation
+    st.markdown("---")
+    st.subheader("📊 Stima ROI")
+    
+    st.markdown(f"**Benefici con {selected_tool}:**")
+    for benefit in results["roi_benefits"]:
+        st.markdown(f"- {benefit}")
+    
+    timer.lap("roi")
+    
+    # Export
+    st.markdown("---")
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        # Il report viene generato solo al click, e il download non riesegue la pagina
+        st.download_button(
+            label="📥 Scarica Report (TXT)",
+            data=lambda: report_text(selected_tool, results, billing_cycle, competitors, selected_platforms, frequency),
+            file_name=f"{selected_tool.lower().replace('.', '_')}_report_{datetime.now().strftime('%Y%m%d')}.txt",
+            mime="text/plain",
+            on_click="ignore"
+        )
+    
+    with col2:
+        # Link al tool selezionato, se il profilo ne ha uno
+        if profile.url:
+            st.link_button(
+                f"🔗 Vai a {selected_tool}",
+                profile.url
+            )
+    
+    with col3:
+        st.link_button(
+            "🔄 Confronta Altri Tool",
+            "#",
+            help="Torna su e cambia tool per confrontare"
+        )
+    timer.lap("export")
+    
+    if not full_run:
+        timer.finish(fragment="configuratore", tool=selected_tool)
+    return page_config
+
+@st.fragment
+def cost_curves_section(requirement):
+    """Curve di costo e break-even per tutti i tool"""
+    import altair as alt
+    
+    with st.expander("📉 Curve di costo e break-even"):
+        st.markdown(
+            "Costo mensile di ogni tool al variare dei prompts (in $), con le altre "
+            "impostazioni della configurazione corrente."
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            curve_lo = st.number_input("Da prompts", min_value=1, max_value=10_000_000, value=1, step=100)
         with col2:
-            if billing_cycle == "monthly":
-                st.metric(
-                    "Costo Mensile",
-                    f"{currency}{monthly_cost}",
-                    delta=f"{currency}{yearly_cost:.0f}/anno"
-                )
-            else:
-                savings = (monthly_cost * 12 - yearly_cost)
-                st.metric(
-                    "Costo Annuale",
-                    f"{currency}{yearly_cost:.0f}",
-                    delta=f"Risparmi {currency}{savings:.0f}",
-                    delta_color="inverse"
-                )
+            curve_hi = st.number_input(
+                "A prompts",
+                min_value=1,
+                max_value=10_000_000,
+                value=max(2000, 2 * requirement["prompts"]),
+                step=1000
+            )
+        if curve_hi <= curve_lo:
+            st.warning("L'intervallo deve avere 'A prompts' maggiore di 'Da prompts'.")
+        else:
+            chart_data, break_evens, envelope = compute_cost_curves(
+                curve_lo,
+                curve_hi,
+                requirement.get("companies", 1),
+                requirement.get("domains", 1),
+                requirement.get("pages", 1000),
+                current_catalog().version
+            )
+            chart = alt.Chart(chart_data).mark_line(interpolate="step-after").encode(
+                x=alt.X("Prompts:Q"),
+                y=alt.Y("Costo mensile:Q", title="Costo mensile ($)"),
+                color="Tool:N",
+                tooltip=["Tool", "Prompts", "Costo mensile"]
+            )
+            st.altair_chart(chart, use_container_width=True)
+            
+            st.markdown("**Tool più economico per intervallo di prompts**")
+            st.dataframe(envelope, use_container_width=True, hide_index=True)
+            st.markdown("**Punti di break-even**")
+            st.dataframe(break_evens, use_container_width=True, hide_index=True)
+
+@st.fragment
+def budget_section(requirement, billing_cycle):
+    """Problema inverso: copertura massima per un budget"""
+    import pandas as pd
+    
+    with st.expander("💰 Copertura massima per budget"):
+        budget_label = "annuale" if billing_cycle == "yearly" else "mensile"
+        budget = st.number_input(
+            f"Budget {budget_label} ($)",
+            min_value=0,
+            max_value=10_000_000,
+            value=12_000 if billing_cycle == "yearly" else 1_000,
+            step=100
+        )
+        st.markdown(
+            "Per ogni tool, il valore massimo di ogni input acquistabile con il budget, "
+            "tenendo gli altri input alla configurazione corrente."
+        )
+        coverage = max_coverage(
+            budget,
+            billing_cycle,
+            currencies={tool: data['currency'] for tool, data in TOOLS_DATA.items()},
+            **requirement
+        )
+        rows = []
+        for tool, inputs in coverage.items():
+            for name, (units, plan_id) in inputs.items():
+                rows.append({
+                    "Tool": tool,
+                    "Input": input_label(tool, name),
+                    "Massimo": "illimitato" if units == UNLIMITED else f"{int(units):,}" if plan_id >= 0 else "—",
+                    "Piano": TIERS[tool].plans[plan_id] if plan_id >= 0 else "Budget insufficiente"
+                })
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+@st.fragment
+def sensitivity_section(selected_tool, requirement):
+    """Sensibilità del costo su due input alla volta"""
+    import altair as alt
+    
+    currency = TOOLS_DATA[selected_tool]['currency']
+    with st.expander("🗺️ Sensibilità del costo"):
+        axes = sensitivity_axes(selected_tool)
+        if axes is None:
+            st.info(
+                f"Il costo di {selected_tool} dipende solo dai prompts: "
+                "vedi le curve di costo qui sopra."
+            )
+            return
+        x_axis, y_axis = axes
+        st.markdown(
+            f"Costo mensile di {selected_tool} al variare di {x_axis[1].lower()} e "
+            f"{y_axis[1].lower()}; le linee tratteggiate indicano le soglie dei piani "
+            "e dei sovrapprezzi."
+        )
+        ranges = []
+        for name, label, low, high in (x_axis, y_axis):
+            col1, col2 = st.columns(2)
+            with col1:
+                start = st.number_input(f"{label} da", min_value=low, max_value=high, value=low)
+            with col2:
+                end = st.number_input(f"{label} a", min_value=low, max_value=high, value=high)
+            ranges.append((name, start, end))
         
-        with col3:
-            if selected_tool in ["Otterly.ai", "Profound"]:
-                metric_value = num_prompts if selected_tool == "Otterly.ai" else num_prompts
-                cost_per_unit = monthly_cost / metric_value if metric_value > 0 else 0
-                st.metric(
-                    "Costo per Prompt",
-                    f"{currency}{cost_per_unit:.2f}",
-                    delta="al mese"
+        if any(end <= start for _, start, end in ranges):
+            st.warning("Ogni intervallo deve avere il valore finale maggiore di quello iniziale.")
+            return
+        fixed = tuple(
+            (name, value) for name, value in requirement.items()
+            if name not in (x_axis[0], y_axis[0])
+        )
+        grid, (x_thresholds, y_thresholds) = compute_sensitivity(
+            selected_tool, ranges[0], ranges[1], fixed, current_catalog().version
+        )
+        heatmap = alt.Chart(grid).mark_rect().encode(
+            x=alt.X("x:Q", title=x_axis[1], scale=alt.Scale(domain=[ranges[0][1], ranges[0][2] + 1], nice=False)),
+            x2="x2:Q",
+            y=alt.Y("y:Q", title=y_axis[1], scale=alt.Scale(domain=[ranges[1][1], ranges[1][2] + 1], nice=False)),
+            y2="y2:Q",
+            color=alt.Color("Costo mensile:Q", title=f"Costo ({currency})", scale=alt.Scale(scheme="viridis")),
+            tooltip=[
+                alt.Tooltip("x:Q", title=x_axis[1]),
+                alt.Tooltip("y:Q", title=y_axis[1]),
+                "Piano:N",
+                "Costo mensile:Q"
+            ]
+        )
+        layers = [heatmap]
+        for thresholds, channel in ((x_thresholds, "x"), (y_thresholds, "y")):
+            if not thresholds.empty:
+                layers.append(
+                    alt.Chart(thresholds).mark_rule(color="white", strokeDash=[6, 4], strokeWidth=2)
+                    .encode(**{channel: "Valore:Q"}, tooltip=["Soglia:N", "Valore:Q"])
                 )
-            elif selected_tool == "Ubersuggest":
-                cost_per_prompt = monthly_cost / ai_prompts if ai_prompts > 0 else 0
-                st.metric(
-                    "Costo per AI Prompt",
-                    f"{currency}{cost_per_prompt:.2f}",
-                    delta="al mese"
+        st.altair_chart(alt.layer(*layers), use_container_width=True)
+
+@st.fragment
+def forecast_section(selected_tool, requirement):
+    """Previsione di budget con crescita incerta"""
+    import altair as alt
+    import pandas as pd
+    
+    currency = TOOLS_DATA[selected_tool]['currency']
+    with st.expander("🔮 Previsione Budget (Monte Carlo)"):
+        st.markdown(
+            "Simula la crescita di prompts, company e domini mese per mese e stima la spesa "
+            "totale di ogni tool, con fatturazione mensile o annuale (piano bloccato a inizio "
+            "anno, eventuali upgrade a prezzo mensile)."
+        )
+        with st.form("forecast_form"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                forecast_months = st.slider("Orizzonte (mesi)", min_value=12, max_value=36, value=24, step=6)
+                forecast_paths = st.select_slider(
+                    "Percorsi simulati",
+                    options=[10_000, 100_000, 1_000_000],
+                    value=100_000
                 )
-            elif selected_tool == "Conductor":
-                cost_per_prompt = monthly_cost / prompts if prompts > 0 else 0
-                st.metric(
-                    "Costo per Prompt",
-                    f"{currency}{cost_per_prompt:.2f}",
-                    delta="al mese"
+                forecast_seed = st.number_input("Seed", min_value=0, max_value=2**31 - 1, value=42)
+            with col2:
+                prompt_growth = st.number_input("Crescita mensile prompts (%)", -50.0, 100.0, 5.0, step=0.5)
+                company_growth = st.number_input("Crescita mensile company (%)", -50.0, 100.0, 0.0, step=0.5)
+                domain_growth = st.number_input("Crescita mensile domini (%)", -50.0, 100.0, 0.0, step=0.5)
+            with col3:
+                prompt_volatility = st.number_input("Volatilità prompts (%)", 0.0, 100.0, 10.0, step=0.5)
+                company_volatility = st.number_input("Volatilità company (%)", 0.0, 100.0, 0.0, step=0.5)
+                domain_volatility = st.number_input("Volatilità domini (%)", 0.0, 100.0, 0.0, step=0.5)
+            if st.form_submit_button("🎲 Simula"):
+                st.session_state["forecast_params"] = (
+                    (
+                        ("prompts", requirement["prompts"]),
+                        ("companies", requirement.get("companies", 1)),
+                        ("domains", requirement.get("domains", 1))
+                    ),
+                    tuple(
+                        (name, (growth / 100, volatility / 100))
+                        for name, growth, volatility in (
+                            ("prompts", prompt_growth, prompt_volatility),
+                            ("companies", company_growth, company_volatility),
+                            ("domains", domain_growth, domain_volatility)
+                        )
+                        if growth or volatility
+                    ),
+                    forecast_months,
+                    forecast_paths,
+                    requirement.get("pages", 1000),
+                    forecast_seed
                 )
         
-        # Dettagli del piano
-        st.markdown("---")
-        st.subheader(f"📊 Dettagli Piano {plan} - {selected_tool}")
+        if "forecast_params" in st.session_state:
+            simulation = compute_forecast(*st.session_state["forecast_params"], current_catalog().version)
+            low, mid, high = (simulation["percentiles"].index(p) for p in (5, 50, 95))
+            rows = []
+            for tool, totals in simulation["totals"].items():
+                tool_currency = TOOLS_DATA[tool]['currency']
+                monthly, yearly = totals["monthly"], totals["yearly"]
+                rows.append({
+                    "Tool": tool,
+                    "Mensile P5": f"{tool_currency}{monthly[low]:,.0f}",
+                    "Mensile P50": f"{tool_currency}{monthly[mid]:,.0f}",
+                    "Mensile P95": f"{tool_currency}{monthly[high]:,.0f}",
+                    "Annuale P5": f"{tool_currency}{yearly[low]:,.0f}",
+                    "Annuale P50": f"{tool_currency}{yearly[mid]:,.0f}",
+                    "Annuale P95": f"{tool_currency}{yearly[high]:,.0f}",
+                    "Conviene": "Annuale" if yearly[mid] < monthly[mid] else "Mensile"
+                })
+            st.markdown(
+                f"**Spesa totale su {simulation['months']} mesi** "
+                f"({simulation['paths']:,} percorsi, percentili 5/50/95)"
+            )
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+            
+            # Bande della spesa cumulata per il tool selezionato
+            bands = simulation["bands"][selected_tool]
+            band_data = pd.concat([
+                pd.DataFrame({
+                    "Mese": np.arange(1, simulation["months"] + 1),
+                    "Fatturazione": "Annuale" if strategy == "yearly" else "Mensile",
+                    "P5": values[low],
+                    "P50": values[mid],
+                    "P95": values[high]
+                })
+                for strategy, values in bands.items()
+            ], ignore_index=True)
+            base = alt.Chart(band_data).encode(x=alt.X("Mese:Q"), color="Fatturazione:N")
+            st.markdown(f"**Spesa cumulata {selected_tool}** ({currency}, mediana e banda 5–95%)")
+            st.altair_chart(
+                base.mark_area(opacity=0.2).encode(y=alt.Y("P5:Q", title=f"Spesa cumulata ({currency})"), y2="P95:Q")
+                + base.mark_line().encode(y="P50:Q"),
+                use_container_width=True
+            )
+
+@st.fragment
+def portfolio_section():
+    """Portafoglio di un'agenzia: molti clienti, totali aggiornati a delta"""
+    import pandas as pd
+    
+    with st.expander("🏢 Portafoglio Agenzia"):
+        st.markdown(
+            "Carica le configurazioni dei clienti (CSV o JSONL con colonne `client`, `tool`, "
+            "`prompts`, `companies`, `domains`, `pages`, `competitors`, `platforms` (numero), "
+            "`frequency`, `billing_cycle`) e "
+            "aggiorna i singoli clienti: i totali si aggiornano solo per la differenza."
+        )
+        portfolio = st.session_state.get("portfolio")
+        if portfolio is None:
+            portfolio = st.session_state["portfolio"] = Portfolio()
+        uploaded = st.file_uploader("File clienti", type=["csv", "jsonl"])
+        if uploaded is not None and st.session_state.get("portfolio_file") != uploaded.file_id:
+            if uploaded.name.endswith(".jsonl"):
+                clients_df = pd.read_json(uploaded, lines=True)
+            else:
+                clients_df = pd.read_csv(uploaded)
+            fields = [field for field in PORTFOLIO_FIELDS if field in clients_df]
+            try:
+                # Celle vuote: valgono i default, come in calculate_cost_*
+                portfolio.load(
+                    (str(record.pop("client")), {k: v for k, v in record.items() if pd.notna(v)})
+                    for record in clients_df[["client", *fields]].to_dict("records")
+                )
+                st.session_state["portfolio_file"] = uploaded.file_id
+            except (KeyError, ValueError) as exc:
+                st.error(f"File non valido: {exc}")
         
-        col1, col2 = st.columns(2)
+        with st.form("portfolio_form"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                client_id = st.text_input("Cliente")
+                client_tool = st.selectbox("Tool del cliente", list(TOOLS_DATA.keys()))
+            with col2:
+                client_prompts = st.number_input("Prompts del cliente", min_value=1, max_value=100_000, value=100)
+                client_cycle = st.radio("Ciclo del cliente", ["monthly", "yearly"], horizontal=True)
+                client_platforms = st.number_input("Piattaforme del cliente", min_value=1, max_value=len(PLATFORMS), value=3)
+                client_frequency = st.selectbox("Frequenza del cliente", ["Settimanale", "Giornaliero", "Real-time"])
+            with col3:
+                client_companies = st.number_input("Company del cliente", min_value=1, max_value=100, value=1)
+                client_domains = st.number_input("Domini del cliente", min_value=1, max_value=100, value=1)
+                client_pages = st.number_input("Pagine del cliente", min_value=100, max_value=100_000, value=1000, step=100)
+            col1, col2 = st.columns(2)
+            with col1:
+                save_client = st.form_submit_button("💾 Salva cliente")
+            with col2:
+                remove_client = st.form_submit_button("🗑️ Rimuovi cliente")
+        if save_client and client_id:
+            plan, monthly_cost = portfolio.upsert(
+                client_id,
+                client_tool,
+                prompts=client_prompts,
+                companies=client_companies,
+                domains=client_domains,
+                pages=client_pages,
+                platforms=client_platforms,
+                frequency=client_frequency,
+                billing_cycle=client_cycle
+            )
+            st.success(f"{client_id}: {client_tool} {plan}, {TOOLS_DATA[client_tool]['currency']}{monthly_cost}/mese")
+        if remove_client and client_id in portfolio:
+            portfolio.remove(client_id)
         
+        orphans = portfolio.orphans()
+        if orphans:
+            st.warning(
+                f"{len(orphans):,} clienti usano tool non più presenti nel catalogo e sono esclusi dai totali "
+                f"(es. {', '.join(map(str, orphans[:5]))}): rimuovili o salvali con un altro tool."
+            )
+        if len(portfolio) > len(orphans):
+            total = portfolio.totals(by=(), currency="$")[0]
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Clienti", f"{total['clients']:,}")
+            col2.metric("Spesa mensile", f"${total['monthly_cost']:,.0f}")
+            col3.metric("Spesa annuale", f"${total['yearly_cost']:,.0f}")
+            totals = pd.DataFrame(portfolio.totals())
+            totals.columns = ["Tool", "Piano", "Valuta", "Ciclo", "Clienti", "Prompts", "Costo mensile", "Costo annuale"]
+            st.dataframe(totals.round(2), use_container_width=True, hide_index=True)
+            
+            # Volumi di query: la spesa reale dipende dalle esecuzioni, non dai prompts
+            st.markdown("**Volumi di query**")
+            usage = pd.DataFrame(portfolio.usage())
+            rates = usage["currency"].map(lambda currency: EXCHANGE_RATES[currency] / EXCHANGE_RATES["$"])
+            usage["monthly_usd"] = usage["monthly_cost"] * rates
+            unsustained = usage["plan"].isna()
+            upgraded = ~unsustained & (usage["plan"] != usage["quoted_plan"])
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Query eseguite al mese", f"{usage['executions'].sum():,.0f}")
+            col2.metric("Spesa per sostenere il carico", f"${usage.loc[~unsustained, 'monthly_usd'].sum():,.0f}/mese")
+            col3.metric("Clienti senza piano adeguato", f"{int(unsustained.sum()):,}", delta=f"{int(upgraded.sum()):,} da aggiornare",
+                        delta_color="off")
+            by_tool = usage[~unsustained].groupby("tool").agg(
+                clients=("client", "size"), executions=("executions", "sum"), monthly_usd=("monthly_usd", "sum")
+            ).reset_index()
+            by_tool["cost_per_query"] = by_tool["monthly_usd"] / by_tool["executions"]
+            by_tool.columns = ["Tool", "Clienti", "Query/mese", "Spesa mensile ($)", "Costo per query ($)"]
+            st.dataframe(by_tool.round(4), use_container_width=True, hide_index=True)
+            critical = usage[unsustained | upgraded].head(1000)
+            if len(critical):
+                critical = critical[["client", "tool", "quoted_plan", "plan", "executions", "monthly_cost", "currency"]]
+                critical = critical.fillna({"plan": "nessuno"})
+                critical.columns = ["Cliente", "Tool", "Piano prezzato", "Piano necessario", "Query/mese", "Costo mensile",
+                                    "Valuta"]
+                st.dataframe(critical.round(0), use_container_width=True, hide_index=True)
+
+def history_reports(store, filters):
+    """ZIP dei report TXT degli scenari filtrati, letti dallo storico a pagine"""
+    records = (
+        report_record(scenario, date=datetime.fromisoformat(scenario["created_at"]).strftime('%d/%m/%Y %H:%M'))
+        for scenario in store.scan(**filters)
+        if scenario["tool"] in TOOLS_DATA
+    )
+    buffer = io.BytesIO()
+    write_zip(records, buffer)
+    return buffer.getvalue()
+
+@st.fragment
+def history_section():
+    """Storico degli scenari salvati"""
+    import pandas as pd
+    
+    with st.expander("🗂️ Storico Scenari"):
+        store = get_scenario_store()
+        col1, col2, col3 = st.columns(3)
         with col1:
-            st.markdown("**Caratteristiche incluse:**")
-            plan_features = TOOLS_DATA[selected_tool]['plans'][plan]['features']
-            for feature in plan_features:
-                st.markdown(f"✓ {feature}")
-            st.markdown(f"✓ Monitoraggio su {len(selected_platforms)} piattaforme")
-            st.markdown(f"✓ Tracking di {competitors} competitor")
-            st.markdown(f"✓ Aggiornamenti {frequency.lower()}")
-        
+            history_tool = st.selectbox("Filtra per tool", ["Tutti"] + list(TOOLS_DATA.keys()))
         with col2:
-            st.markdown("**Piattaforme monitorate:**")
-            for platform in selected_platforms:
-                st.markdown(f"🤖 {platform}")
-        
-        # Tabella comparativa tra tutti i tool
-        st.markdown("---")
-        st.subheader("📈 Confronto tra Tool")
-        
-        comparison_data = {
-            "Tool": [],
-            "Piano Base": [],
-            "Prezzo/mese": [],
-            "Caratteristica Principale": [],
-            "Ideale per": []
-        }
-        
-        tool_recommendations = {
-            "Profound": ("Base", "$499", "Answer engine tracking", "Enterprise con focus AI-first"),
-            "Otterly.ai": ("Lite", "$29", "AI search monitoring", "Startup e PMI"),
-            "Ubersuggest": ("Individual", "€29", "SEO + AI completo", "Freelancer e piccoli team"),
-            "Conductor": ("Professional", "€620", "Enterprise SEO platform", "Grandi aziende")
-        }
-        
-        for tool, (plan_name, price, feature, ideal) in tool_recommendations.items():
-            comparison_data["Tool"].append(tool)
-            comparison_data["Piano Base"].append(plan_name)
-            comparison_data["Prezzo/mese"].append(price)
-            comparison_data["Caratteristica Principale"].append(feature)
-            comparison_data["Ideale per"].append(ideal)
-        
-        df = pd.DataFrame(comparison_data)
-        
-        # Evidenzia il tool selezionato
-        def highlight_selected(row):
-            if row['Tool'] == selected_tool:
-                return ['background-color: #28a745; color: white'] * len(row)
-            return [''] * len(row)
-        
-        styled_df = df.style.apply(highlight_selected, axis=1)
-        st.dataframe(styled_df, use_container_width=True, hide_index=True)
-        
-        # Raccomandazioni personalizzate
-        st.markdown("---")
-        st.subheader("💡 Raccomandazioni")
-        
-        if selected_tool == "Otterly.ai":
-            if num_prompts <= 15:
-                st.info("💰 **Ottimo inizio!** Il piano Lite è perfetto per testare il monitoraggio AI con pochi prompts.")
-            elif num_prompts <= 100:
-                st.info("⚙️ **Scelta equilibrata!** Lo Standard offre un ottimo rapporto qualità-prezzo.")
-            else:
-                st.warning("🚀 **Uso intensivo!** Considera il Premium o contatta Otterly per piani custom.")
-        
-        elif selected_tool == "Profound":
-            st.info("🎯 **Tool specializzato!** Profound è ideale per focus su answer engines e tracking profondo.")
-            if num_prompts > 200:
-                st.warning(f"⚠️ Stai superando i 200 prompts inclusi. Costo stimato per {num_prompts - 200} prompts extra.")
-        
-        elif selected_tool == "Ubersuggest":
-            st.info("📊 **All-in-one!** Ubersuggest combina SEO tradizionale con AI prompt monitoring.")
-            if domains > 1:
-                st.success("✅ Ottimo per gestire più progetti/clienti con prompts diversificati.")
-        
-        elif selected_tool == "Conductor":
-            st.info("🏢 **Enterprise solution!** Conductor è la scelta per grandi organizzazioni.")
-            if prompts > 500:
-                st.success("✅ Il piano Enterprise ti darà più flessibilità per prompt tracking massivo.")
-        
-        # ROI Estimation
-        st.markdown("---")
-        st.subheader("📊 Stima ROI")
-        
-        roi_benefits = {
-            "Otterly.ai": [
-                "Visibilità brand su AI: +50% in 3-6 mesi",
-                "Ottimizzazione contenuti per risposte AI",
-                "Tracking competitor su prompts rilevanti",
-                "Identificazione gap di mercato"
-            ],
-            "Profound": [
-                "Deep insights su answer engines",
-                "Tracking accurato su 4+ piattaforme AI",
-                "Data history per analisi trend prompts",
-                "Focus su conversazioni AI"
-            ],
-            "Ubersuggest": [
-                "SEO + AI prompt monitoring combinato",
-                "Prompt research tradizionale + AI",
-                "Analisi competitor su query comuni",
-                "Content ideas per ottimizzazione AI"
-            ],
-            "Conductor": [
-                "Platform enterprise completa",
-                "Content workflow automation",
-                "Advanced analytics su prompts",
-                "Integrations con marketing stack"
-            ]
+            history_plans = TIERS[history_tool].plans if history_tool != "Tutti" else ()
+            history_plan = st.selectbox("Filtra per piano", ["Tutti", *history_plans])
+        with col3:
+            history_since = st.date_input("Dal", value=None)
+        filters = {
+            "tool": None if history_tool == "Tutti" else history_tool,
+            "plan": None if history_plan == "Tutti" else history_plan,
+            "since": history_since
         }
-        
-        st.markdown(f"**Benefici con {selected_tool}:**")
-        for benefit in roi_benefits[selected_tool]:
-            st.markdown(f"- {benefit}")
-        
-        # Export
-        st.markdown("---")
-        col1, col2, col3 = st.columns(3)
-        
+        scenarios = store.query(limit=100, **filters)
+        if not scenarios:
+            st.info("Nessuno scenario salvato con questi filtri.")
+            return
+        total = store.count(**filters)
+        st.caption(f"Ultimi {len(scenarios)} di {total:,} scenari")
+        history = pd.DataFrame(scenarios)[[
+            "id", "created_at", "tool", "plan", "billing_cycle", "prompts", "companies", "domains",
+            "pages", "monthly_cost", "yearly_cost", "currency", "catalog_version"
+        ]]
+        history.columns = [
+            "ID", "Data", "Tool", "Piano", "Ciclo", "Prompts", "Company", "Domini",
+            "Pagine", "Costo mensile", "Costo annuale", "Valuta", "Catalogo"
+        ]
+        st.dataframe(history, use_container_width=True, hide_index=True)
+        st.download_button(
+            f"📦 Report TXT dei {total:,} scenari (ZIP)",
+            data=lambda: history_reports(store, filters),
+            file_name=f"report_scenari_{datetime.now().strftime('%Y%m%d')}.zip",
+            mime="application/zip",
+            on_click="ignore"
+        )
+        col1, col2 = st.columns([3, 1])
         with col1:
-            # Crea summary per export
-            summary = f"""
-REPORT CALCOLO COSTI - AI BRAND MONITORING
-==========================================
-Tool selezionato: {selected_tool}
-Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}
-
-CONFIGURAZIONE
---------------
-{main_metric}
-Competitor tracciati: {competitors}
-Piattaforme: {', '.join(selected_platforms)}
-Frequenza: {frequency}
-
-COSTI
------
-Piano consigliato: {plan}
-Costo mensile: {currency}{monthly_cost}
-Costo annuale: {currency}{yearly_cost:.0f}
-Ciclo: {billing_cycle}
-
-CARATTERISTICHE PIANO
----------------------
-"""
-            for feature in plan_features:
-                summary += f"- {feature}\n"
-            
-            summary += f"\n---\nCalcolatore by AI Brand Monitoring Calculator"
-            
-            st.download_button(
-                label="📥 Scarica Report (TXT)",
-                data=summary,
-                file_name=f"{selected_tool.lower().replace('.', '_')}_report_{datetime.now().strftime('%Y%m%d')}.txt",
-                mime="text/plain"
+            scenario_id = st.selectbox(
+                "Scenario da ricaricare",
+                [scenario["id"] for scenario in scenarios],
+                format_func=lambda i: next(
+                    f"#{s['id']} · {s['created_at']} · {s['tool']} {s['plan']}" for s in scenarios if s["id"] == i
+                )
             )
-        
         with col2:
-            # Link al tool selezionato
-            tool_urls = {
-                "Profound": "https://www.tryprofound.com/ ",
-                "Otterly.ai": "https://otterly.ai/pricing",
-                "Ubersuggest": "https://app.neilpatel.com/en/pricingg",
-                "Conductor": "https://support.conductor.com/en_US/platform-faqs-and-more/pricing-for-conductor-s-products"
-            }
-            
-            st.link_button(
-                f"🔗 Vai a {selected_tool}",
-                tool_urls[selected_tool]
+            if st.button("↩️ Ricarica"):
+                # Rerun completo: i widget del configuratore ripartono dallo scenario
+                st.session_state["restored_scenario"] = store.get(scenario_id)
+                st.rerun()
+
+def main():
+    # Strumentazione opzionale: PROFILE_RERUN=1|cprofile o ?profile=1|cprofile
+    profile_mode = os.environ.get("PROFILE_RERUN") or st.query_params.get("profile")
+    timer = RerunTimer(profile_mode)
+    
+    # Header
+    st.title("🔍 AI Brand Monitoring Cost Calculator")
+    st.markdown("**Confronta i costi tra i principali tool di monitoraggio brand su AI**")
+    st.markdown("---")
+    
+    # Sidebar per informazioni
+    with st.sidebar:
+        tool_info()
+    
+    timer.lap("sidebar")
+    
+    # Configurazione e risultati
+    st.session_state["full_run"] = True
+    selected_tool, requirement, billing_cycle = configurator(timer, profile_mode)
+    
+    st.markdown("---")
+    cost_curves_section(requirement)
+    timer.lap("curve di costo")
+    
+    budget_section(requirement, billing_cycle)
+    timer.lap("budget")
+    
+    sensitivity_section(selected_tool, requirement)
+    timer.lap("sensibilità")
+    
+    forecast_section(selected_tool, requirement)
+    timer.lap("previsione")
+    
+    portfolio_section()
+    timer.lap("portafoglio")
+    
+    history_section()
+    timer.lap("storico")
+    
+    # Statistiche della cache condivisa (dopo il calcolo, così includono questo rerun)
+    with st.sidebar:
+        st.markdown("---")
+        with st.expander("⚡ Cache preventivi"):
+            stats = get_quote_cache().stats()
+            st.markdown(
+                f"**Hit rate:** {stats['hit_rate']:.0%}  \n"
+                f"Hit: {stats['hits']} · Miss: {stats['misses']}  \n"
+                f"Eviction: {stats['evictions']} · Scaduti: {stats['expirations']} · "
+                f"Invalidazioni: {stats['invalidations']}  \n"
+                f"Voci: {stats['size']}/{stats['maxsize']} · Catalogo {current_catalog().version}"
             )
+    timer.lap("cache")
+    
+    # Pannello di debug con i tempi del rerun (solo con la strumentazione attiva)
+    record = timer.finish(tool=selected_tool)
+    if record:
+        import pandas as pd
         
-        with col3:
-            st.link_button(
-                "🔄 Confronta Altri Tool",
-                "#",
-                help="Torna su e cambia tool per confrontare"
+        with st.sidebar.expander("🐞 Tempi del rerun", expanded=True):
+            st.markdown(f"**Totale:** {record['total_ms']:.1f} ms")
+            st.dataframe(
+                pd.DataFrame(
+                    {"Sezione": list(record["sections"]), "ms": list(record["sections"].values())}
+                ).sort_values("ms", ascending=False),
+                use_container_width=True,
+                hide_index=True
             )
+            if timer.profile_summary:
+                st.caption(f"Profilo salvato in {timer.profile_path}")
+                st.code(timer.profile_summary, language=None)
 
 if __name__ == "__main__":
     main()
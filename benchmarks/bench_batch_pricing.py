@@ -0,0 +1,121 @@
+"""Benchmark: calculate_cost_* scalari contro il motore vettoriale di pricing_batch.
+
+Uso:
+    python benchmarks/bench_batch_pricing.py [--sizes 1000 100000 10000000]
+
+Il ciclo scalare viene misurato al massimo su SCALAR_LIMIT righe ed estrapolato
+linearmente oltre; i risultati vettoriali vengono confrontati con quelli scalari
+su tutte le righe misurate. Il confronto si ripete su una copia del catalogo con
+prezzi e sovrapprezzi decimali.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pricing import (  # noqa: E402
+    TIERS,
+    TOOLS_DATA,
+    calculate_cost_conductor,
+    calculate_cost_otterly,
+    calculate_cost_profound,
+    calculate_cost_ubersuggest,
+    compile_catalog,
+)
+from pricing_batch import price_all, plan_labels  # noqa: E402
+
+SCALAR_LIMIT = 100_000
+
+SCALAR_FUNCTIONS = {
+    "Profound": lambda p, c, d, pg, b: calculate_cost_profound(p, c, b),
+    "Otterly.ai": lambda p, c, d, pg, b: calculate_cost_otterly(p, b),
+    "Ubersuggest": lambda p, c, d, pg, b: calculate_cost_ubersuggest(p, d, b),
+    "Conductor": lambda p, c, d, pg, b: calculate_cost_conductor(p, pg, b),
+}
+
+
+def make_scenarios(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "prompts": rng.integers(1, 5001, n),
+        "companies": rng.integers(1, 11, n),
+        "domains": rng.integers(1, 21, n),
+        "pages": rng.integers(100, 10001, n),
+        "billing_cycle": np.where(rng.random(n) < 0.5, "monthly", "yearly"),
+    }
+
+
+def run_scalar(scenarios, n):
+    rows = zip(*(scenarios[k][:n].tolist() for k in ("prompts", "companies", "domains", "pages", "billing_cycle")))
+    rows = list(rows)
+    results = {}
+    start = time.perf_counter()
+    for tool, func in SCALAR_FUNCTIONS.items():
+        results[tool] = [func(*row) for row in rows]
+    return time.perf_counter() - start, results
+
+
+def check(vector, scalar, n):
+    for tool, quotes in scalar.items():
+        plan_id, monthly_cost, yearly_cost = vector[tool]
+        plans, monthly, yearly = zip(*quotes)
+        assert list(plan_labels(tool, plan_id[:n])) == list(plans), tool
+        assert np.array_equal(monthly_cost[:n], np.asarray(monthly)), tool
+        assert np.array_equal(yearly_cost[:n], np.asarray(yearly, dtype=float)), tool
+
+
+def fractional_catalog():
+    """Copia del catalogo con prezzi dei piani in .99 e sovrapprezzi in .5"""
+    tools = json.loads(json.dumps(TOOLS_DATA, default=dict))
+    for data in tools.values():
+        for plan in data["plans"].values():
+            plan["price_monthly"] += 0.99
+        for rule in data["pricing"].get("overage", {}).values():
+            rule["price"] += 0.5
+    return compile_catalog(tools)
+
+
+def check_fractional(n=SCALAR_LIMIT):
+    """Motore vettoriale e scalare devono coincidere anche con prezzi decimali"""
+    scenarios = make_scenarios(n, seed=1)
+    original = dict(TIERS)
+    TIERS.update(fractional_catalog())
+    try:
+        _, scalar = run_scalar(scenarios, n)
+        check(price_all(**scenarios), scalar, n)
+    finally:
+        TIERS.update(original)
+    print(f"prezzi decimali: vettoriale = scalare su {n} righe")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 10_000_000])
+    args = parser.parse_args()
+
+    print(f"{'righe':>12} {'scalare (s)':>12} {'vettoriale (s)':>15} {'speedup':>9}")
+    for n in args.sizes:
+        scenarios = make_scenarios(n)
+
+        start = time.perf_counter()
+        vector = price_all(**scenarios)
+        vector_time = time.perf_counter() - start
+
+        measured = min(n, SCALAR_LIMIT)
+        scalar_time, scalar = run_scalar(scenarios, measured)
+        check(vector, scalar, measured)
+        scalar_time *= n / measured
+
+        mark = "*" if measured < n else " "
+        print(f"{n:>12} {scalar_time:>11.3f}{mark} {vector_time:>15.4f} {scalar_time / vector_time:>8.0f}x")
+    print("* tempo scalare estrapolato da", SCALAR_LIMIT, "righe")
+    check_fractional()
+
+
+if __name__ == "__main__":
+    main()
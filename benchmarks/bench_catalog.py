@@ -0,0 +1,53 @@
+"""Benchmark: caricamento del catalogo prezzi da file sorgente e da snapshot binario.
+
+Uso:
+    python benchmarks/bench_catalog.py [--catalog catalog.json] [--repeat 200]
+
+Misura parsing + validazione + compilazione del file, lettura dello snapshot e il costo
+di CatalogWatcher.current() (il controllo fatto a ogni preventivo).
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import DEFAULT_PATH, CatalogWatcher, _source, build, read, read_snapshot, write_snapshot  # noqa: E402
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--catalog", default=DEFAULT_PATH)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    snapshot_dir = tempfile.mkdtemp()
+    source = _source(args.catalog)
+    write_snapshot(build(read(args.catalog), source), snapshot_dir)
+    watcher = CatalogWatcher(args.catalog, snapshot_dir=snapshot_dir)
+    calls = 100_000
+
+    rows = [
+        ("file sorgente", timed(lambda: build(read(args.catalog), _source(args.catalog)), args.repeat)),
+        ("snapshot", timed(lambda: read_snapshot(_source(args.catalog), snapshot_dir), args.repeat)),
+        (f"current() x{calls}", timed(lambda: [watcher.current() for _ in range(calls)], 5)),
+    ]
+    print(f"{'caricamento':>20} {'min ms':>10} {'mediana ms':>12}")
+    for name, (best, median) in rows:
+        print(f"{name:>20} {best * 1000:>10.3f} {median * 1000:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Benchmark: tempo della simulazione Monte Carlo di forecast.forecast.
+
+Uso:
+    python benchmarks/bench_forecast.py [--paths 1000000] [--months 36]
+
+Misura due scenari: crescita dei soli prompts (costi letti da tabella precalcolata) e
+crescita di prompts e domini (riprezzamento vettoriale di ogni cella).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecast import forecast, growth_params  # noqa: E402
+
+INITIAL = {"prompts": 300, "companies": 2, "domains": 3}
+SCENARIOS = {
+    "solo prompts": {"prompts": growth_params(0.05, 0.10)},
+    "prompts + domini": {"prompts": growth_params(0.05, 0.10), "domains": growth_params(0.02, 0.05)},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", type=int, default=1_000_000)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(f"{args.paths:,} percorsi × {args.months} mesi, 4 tool")
+    print(f"{'scenario':>18} {'s':>8} {'Otterly P50 mensile':>20} {'P50 annuale':>12}")
+    for label, growth in SCENARIOS.items():
+        start = time.perf_counter()
+        result = forecast(INITIAL, growth, months=args.months, paths=args.paths,
+                          chunk_size=args.chunk_size, seed=0)
+        elapsed = time.perf_counter() - start
+        median = result["percentiles"].index(50)
+        totals = result["totals"]["Otterly.ai"]
+        print(f"{label:>18} {elapsed:>8.2f} {totals['monthly'][median]:>20,.0f} {totals['yearly'][median]:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark: tempo di risposta di optimizer.cheapest_coverage.
+
+Uso:
+    python benchmarks/bench_optimizer.py [--tools 40] [--prompts 1000 10000 50000]
+
+Oltre ai tool reali, registra un catalogo sintetico di --tools tool casuali (piani a
+soglie e sovrapprezzi a blocchi) per misurare la crescita del catalogo.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from optimizer import cheapest_coverage  # noqa: E402
+from pricing import TIERS, compile_tool  # noqa: E402
+
+CURRENCIES = {"Profound": "$", "Otterly.ai": "$", "Ubersuggest": "€", "Conductor": "€"}
+
+
+def add_synthetic_tools(count, seed=0):
+    rng = random.Random(seed)
+    currencies = dict(CURRENCIES)
+    for t in range(count):
+        caps = sorted(rng.sample(range(10, 2000), rng.randint(1, 4)))
+        price, plans = 0, {}
+        for j, cap in enumerate(caps):
+            price += rng.randint(20, 900)
+            plans[f"Tier {j + 1}"] = {"price_monthly": price, "prompts": cap}
+        pricing = {"limits": {"prompts": "prompts"}, "overage": {}, "yearly_discount": 0.85}
+        if rng.random() < 0.7:
+            pricing["overage"]["prompts"] = {"block": rng.choice([50, 100, 250, 500]), "price": rng.randint(40, 600)}
+        name = f"Synthetic {t + 1}"
+        TIERS[name] = compile_tool(name, {"plans": plans, "pricing": pricing})
+        currencies[name] = rng.choice(["$", "€"])
+    return currencies
+
+
+def timed(currencies, prompts, repeat=5, **kwargs):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = cheapest_coverage(prompts, currencies=currencies, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tools", type=int, default=40, help="tool sintetici da aggiungere")
+    parser.add_argument("--prompts", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    args = parser.parse_args()
+
+    print(f"{'catalogo':>10} {'prompts':>8} {'ms':>8} {'$/mese':>10} {'abbonamenti':>12}")
+    for label, currencies in (("reale", CURRENCIES), (f"+{args.tools}", None)):
+        if currencies is None:
+            currencies = add_synthetic_tools(args.tools)
+        for prompts in args.prompts:
+            elapsed, result = timed(currencies, prompts, companies=2, domains=3, pages=2000,
+                                    tools=list(currencies))
+            print(f"{label:>10} {prompts:>8} {elapsed * 1000:>8.2f} {result['monthly_cost']:>10.0f} "
+                  f"{len(result['subscriptions']):>12}")
+
+
+if __name__ == "__main__":
+    main()
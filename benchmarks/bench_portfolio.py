@@ -0,0 +1,69 @@
+"""Benchmark: aggiornamenti a delta del portafoglio clienti.
+
+Uso:
+    python benchmarks/bench_portfolio.py [--clients 100000] [--updates 100000]
+
+Carica un portafoglio casuale, applica aggiornamenti singoli misurandone la latenza e
+verifica che i totali coincidano con quelli di un portafoglio ricaricato da zero.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from portfolio import Portfolio  # noqa: E402
+from pricing import TIERS  # noqa: E402
+
+
+def random_config(rng):
+    return {
+        "tool": rng.choice(list(TIERS)),
+        "prompts": rng.randint(1, 5000),
+        "companies": rng.randint(1, 10),
+        "domains": rng.randint(1, 20),
+        "pages": rng.randrange(100, 10001, 100),
+        "competitors": rng.randint(0, 20),
+        "billing_cycle": rng.choice(["monthly", "yearly"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--updates", type=int, default=100_000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    clients = [(f"client-{i}", random_config(rng)) for i in range(args.clients)]
+    portfolio = Portfolio()
+    start = time.perf_counter()
+    portfolio.load(clients)
+    print(f"caricamento di {args.clients:,} clienti: {time.perf_counter() - start:.2f}s")
+
+    updates = [(f"client-{rng.randrange(args.clients)}", random_config(rng)) for _ in range(args.updates)]
+    latencies = []
+    for client_id, config in updates:
+        config = dict(config)
+        start = time.perf_counter()
+        portfolio.upsert(client_id, config.pop("tool"), **config)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1e6
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    print(f"{args.updates:,} aggiornamenti: p50 {p50:.1f} µs, p99 {p99:.1f} µs, max {latencies[-1] * 1e6:.0f} µs")
+
+    start = time.perf_counter()
+    totals = portfolio.totals(currency="$")
+    print(f"totali: {(time.perf_counter() - start) * 1e6:.0f} µs, {len(totals)} gruppi")
+
+    fresh = Portfolio()
+    fresh.load(portfolio.clients())
+    assert fresh.totals() == portfolio.totals(), "totali a delta diversi dal ricalcolo completo"
+    print("totali verificati contro il ricalcolo completo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark: tabella precalcolata (quote_table) contro il pricing dal vivo.
+
+Uso:
+    python benchmarks/bench_quote_table.py [--quotes 200000] [--rows 1000000]
+
+Costruisce la tabella in un file temporaneo, poi misura preventivi singoli (QPS) e
+pricing vettoriale su input casuali nel dominio del form, verificando che i risultati
+coincidano.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pricing_batch  # noqa: E402
+from pricing import quote  # noqa: E402
+from quote_table import QuoteTable, build, grid_domains  # noqa: E402
+
+
+def random_inputs(domain, n, rng):
+    """Input casuali nel dominio della tabella, come colonne"""
+    columns = {}
+    for name, (lo, hi, step) in domain.items():
+        columns[name] = lo + rng.integers(0, (hi - lo) // step + 1, n) * step
+    columns["billing_cycle"] = rng.choice(["monthly", "yearly"], n)
+    return columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quotes", type=int, default=200_000, help="preventivi singoli per tool")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="righe per il pricing vettoriale")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "quote_table.bin")
+        start = time.perf_counter()
+        size = build(path)
+        print(f"build: {time.perf_counter() - start:.2f}s, {size / 1e6:.1f} MB")
+        start = time.perf_counter()
+        table = QuoteTable(path)
+        print(f"load: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        print(f"{'tool':>12} {'QPS tabella':>12} {'QPS live':>12} {'righe/s tabella':>16} {'righe/s live':>14}")
+        domains = grid_domains()
+        for tool in domains:
+            columns = random_inputs(domains[tool], args.quotes, rng)
+            calls = [
+                {name: values[i].item() for name, values in columns.items()}
+                for i in range(args.quotes)
+            ]
+            qps, results = [], []
+            for fn in (table.quote, quote):
+                start = time.perf_counter()
+                results.append([fn(tool, **kwargs) for kwargs in calls])
+                qps.append(args.quotes / (time.perf_counter() - start))
+            assert results[0] == results[1], tool
+
+            columns = random_inputs(domains[tool], args.rows, rng)
+            rates, priced = [], []
+            for fn in (table.price_tool, pricing_batch.price_tool):
+                start = time.perf_counter()
+                priced.append(fn(tool, **columns))
+                rates.append(args.rows / (time.perf_counter() - start))
+            assert all(np.array_equal(a, b) for a, b in zip(*priced)), tool
+            print(f"{tool:>12} {qps[0]:>12,.0f} {qps[1]:>12,.0f} {rates[0]:>16,.0f} {rates[1]:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
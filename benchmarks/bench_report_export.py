@@ -0,0 +1,83 @@
+"""Benchmark: export in blocco dei report (report_export.py) in CSV, JSONL e ZIP.
+
+Uso:
+    python benchmarks/bench_report_export.py [--scenarios 50000] [--chunk-size 1000] [--no-memory]
+
+Genera --scenarios scenari casuali in un CSV temporaneo e li esporta in ogni formato su
+file, riportando report al secondo e dimensione dell'output; salvo --no-memory ripete
+l'export sotto tracemalloc per misurare il picco di memoria allocata.
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pricing import TOOLS_DATA  # noqa: E402
+from quote_cli import FIELDS  # noqa: E402
+from report_export import OUTPUT_FORMATS, WRITERS, reports  # noqa: E402
+
+PLATFORMS = ["ChatGPT", "Perplexity", "Google AI Overviews", "Gemini", "Copilot"]
+FREQUENCIES = ["Settimanale", "Giornaliero", "Real-time"]
+
+
+def write_scenarios(path, n, seed=0):
+    rng = random.Random(seed)
+    tools = list(TOOLS_DATA)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(FIELDS)
+        for _ in range(n):
+            writer.writerow([
+                rng.choice(tools), rng.randint(1, 5000), rng.randint(1, 10), rng.randint(1, 20),
+                rng.randrange(100, 10001, 100), rng.randint(0, 20),
+                ";".join(rng.sample(PLATFORMS, rng.randint(1, 5))),
+                rng.choice(["monthly", "yearly"]), rng.choice(FREQUENCIES),
+            ])
+
+
+def export(source_path, output_path, output_format, chunk_size):
+    binary = output_format == "zip"
+    with open(source_path, newline="", encoding="utf-8") as source, \
+            open(output_path, "wb" if binary else "w", **({} if binary else {"newline": "", "encoding": "utf-8"})) \
+            as sink:
+        return WRITERS[output_format](reports(source, "csv", chunk_size), sink)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", type=int, default=50_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--no-memory", action="store_true", help="salta la misura del picco di memoria")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    source_path = os.path.join(directory, "scenari.csv")
+    write_scenarios(source_path, args.scenarios)
+
+    print(f"{args.scenarios:,} scenari, blocchi da {args.chunk_size}")
+    print(f"{'formato':>8} {'s':>8} {'report/s':>10} {'output MB':>10} {'picco MB':>9}")
+    for output_format in OUTPUT_FORMATS:
+        output_path = os.path.join(directory, f"report.{output_format}")
+        start = time.perf_counter()
+        written = export(source_path, output_path, output_format, args.chunk_size)
+        elapsed = time.perf_counter() - start
+        assert written == args.scenarios, written
+
+        peak = ""
+        if not args.no_memory:
+            tracemalloc.start()
+            export(source_path, output_path, output_format, args.chunk_size)
+            peak = f"{tracemalloc.get_traced_memory()[1] / 2**20:.1f}"
+            tracemalloc.stop()
+        size = os.path.getsize(output_path) / 2**20
+        print(f"{output_format:>8} {elapsed:>8.2f} {written / elapsed:>10,.0f} {size:>10.1f} {peak:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark: scritture a blocchi e query dello storico scenari su SQLite.
+
+Uso:
+    python benchmarks/bench_scenario_store.py [--scenarios 1000000] [--db /tmp/scenarios.db]
+
+Riempie un database temporaneo con scenari casuali distribuiti su un anno, poi misura
+le query tipiche dell'app: ultimi scenari, filtri per tool, piano e intervallo di date,
+conteggi e ricarica per id.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pricing import CATALOG_VERSION, TIERS, TOOLS_DATA, quote  # noqa: E402
+from scenario_store import ScenarioStore  # noqa: E402
+
+
+def random_scenarios(count, rng):
+    """Scenari casuali in ordine di data, come li scrive l'app"""
+    start = datetime(2025, 1, 1)
+    step = 365 * 86400 / count
+    for i in range(count):
+        tool = rng.choice(list(TIERS))
+        prompts, pages = rng.randint(1, 5000), rng.randrange(100, 10001, 100)
+        billing_cycle = rng.choice(["monthly", "yearly"])
+        plan, monthly_cost, yearly_cost = quote(tool, prompts, 1, 1, pages, billing_cycle)
+        created_at = start + timedelta(seconds=int(i * step))
+        yield {
+            "created_at": created_at.isoformat(sep=" "),
+            "tool": tool, "plan": plan, "billing_cycle": billing_cycle,
+            "prompts": prompts, "companies": 1, "domains": 1, "pages": pages,
+            "competitors": 3, "platforms": ["ChatGPT"], "frequency": "Settimanale",
+            "monthly_cost": monthly_cost, "yearly_cost": yearly_cost,
+            "currency": TOOLS_DATA[tool]["currency"], "catalog_version": CATALOG_VERSION,
+        }
+
+
+def timed(label, fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    size = len(result) if isinstance(result, list) else result
+    print(f"{label:>40} {best * 1000:>9.2f} ms  ({size})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", type=int, default=1_000_000)
+    parser.add_argument("--db", help="database da usare (default: file temporaneo)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScenarioStore(args.db or os.path.join(tmp, "scenarios.db"), batch_size=10_000)
+        start = time.perf_counter()
+        store.add_many(random_scenarios(args.scenarios, random.Random(0)))
+        elapsed = time.perf_counter() - start
+        print(f"scrittura di {args.scenarios:,} scenari: {elapsed:.1f}s ({args.scenarios / elapsed:,.0f}/s)")
+
+        plan = store.query(tool="Conductor", limit=1)[0]["plan"]
+        timed("ultimi 50", lambda: store.query())
+        timed("ultimi 50 Conductor", lambda: store.query(tool="Conductor"))
+        timed(f"ultimi 50 piano {plan}", lambda: store.query(plan=plan))
+        timed("Conductor a marzo", lambda: store.query(tool="Conductor", since="2025-03-01", until="2025-04-01"))
+        timed("pagina 100 Conductor", lambda: store.query(tool="Conductor", offset=5000))
+        timed("conteggio Conductor a marzo",
+              lambda: store.count(tool="Conductor", since="2025-03-01", until="2025-04-01"))
+        timed("ricarica per id", lambda: store.get(args.scenarios // 2)["id"])
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark: tempo di import a freddo dei moduli, ognuno in un processo nuovo.
+
+Uso:
+    python benchmarks/bench_startup.py [--repeat 5] [--modules pricing app] [--top 10]
+
+Per ogni modulo lancia `python -c "import <modulo>"` --repeat volte e riporta minimo e
+mediana; con --top elenca anche i moduli importati più lenti (da -X importtime).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["pricing", "pricing_batch", "quote_table", "app"]
+
+
+def import_time(module):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def slowest_imports(module, top):
+    """Import diretti di `module` con il tempo cumulativo più alto secondo -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                            check=True, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Solo gli import diretti, per non contare due volte i sottomoduli
+        if name.startswith("   ") and not name.startswith("    "):
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--top", type=int, default=0, help="moduli più lenti da elencare per ogni import")
+    args = parser.parse_args()
+
+    print(f"{'modulo':>16} {'min ms':>10} {'mediana ms':>12}")
+    for module in args.modules:
+        times = [import_time(module) for _ in range(args.repeat)]
+        print(f"{module:>16} {min(times) * 1000:>10.1f} {statistics.median(times) * 1000:>12.1f}")
+        for cumulative, name in slowest_imports(module, args.top):
+            print(f"{'':>16}   {name:<28} {cumulative / 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
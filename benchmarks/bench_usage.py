@@ -0,0 +1,63 @@
+"""Benchmark: modello dei volumi di query (usage.py) su array di scenari e su un portafoglio.
+
+Uso:
+    python benchmarks/bench_usage.py [--sizes 10000 1000000] [--clients 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from portfolio import Portfolio  # noqa: E402
+from pricing import TIERS  # noqa: E402
+from usage import RUNS_PER_MONTH, usage_tool  # noqa: E402
+
+
+def make_scenarios(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "prompts": rng.integers(1, 2000, n),
+        "companies": rng.integers(1, 5, n),
+        "domains": rng.integers(1, 10, n),
+        "pages": rng.integers(1, 50, n) * 100,
+        "platforms": rng.integers(1, 6, n),
+        "competitors": rng.integers(0, 15, n),
+        "frequency": rng.choice(list(RUNS_PER_MONTH), n),
+        "billing_cycle": rng.choice(["monthly", "yearly"], n),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--clients", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'scenari':>10} {'tool':>12} {'ms':>9} {'scenari/s':>12} {'senza piano':>12}")
+    for n in args.sizes:
+        scenarios = make_scenarios(n)
+        for tool in TIERS:
+            start = time.perf_counter()
+            usage = usage_tool(tool, **scenarios)
+            elapsed = time.perf_counter() - start
+            print(f"{n:>10,} {tool:>12} {elapsed * 1000:>9.1f} {n / elapsed:>12,.0f} {(usage.plan_id < 0).mean():>12.1%}")
+
+    rng = random.Random(0)
+    portfolio = Portfolio()
+    portfolio.load(
+        (i, {"tool": rng.choice(list(TIERS)), "prompts": rng.randint(1, 500), "platforms": rng.randint(1, 5),
+             "competitors": rng.randint(0, 12), "frequency": rng.choice(list(RUNS_PER_MONTH))})
+        for i in range(args.clients)
+    )
+    start = time.perf_counter()
+    rows = portfolio.usage()
+    print(f"Portfolio.usage() su {len(rows):,} clienti: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
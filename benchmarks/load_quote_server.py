@@ -0,0 +1,153 @@
+"""Test di carico del servizio HTTP dei preventivi (quote_server.py) su localhost.
+
+Uso:
+    python benchmarks/load_quote_server.py                       # avvia un server su una porta libera
+    python benchmarks/load_quote_server.py --url 127.0.0.1:8600  # server già in esecuzione
+    python benchmarks/load_quote_server.py --batch 100 --distinct 0
+
+Apre --connections connessioni keep-alive e invia in tutto --requests richieste,
+ognuna con uno scenario (POST /quote) o con --batch scenari (POST /quotes), scelte da
+un insieme di --distinct richieste diverse (0 = tutte diverse, nessun hit in cache).
+Riporta throughput, percentili di latenza e i contatori della cache del server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pricing import TOOLS_DATA  # noqa: E402
+
+
+def random_scenario(rng):
+    return {
+        "tool": rng.choice(list(TOOLS_DATA)),
+        "prompts": rng.randint(1, 5000),
+        "companies": rng.randint(1, 10),
+        "domains": rng.randint(1, 20),
+        "pages": rng.randrange(100, 10001, 100),
+        "billing_cycle": rng.choice(["monthly", "yearly"]),
+    }
+
+
+def make_requests(count, batch, distinct, host, seed=0):
+    """Richieste HTTP già serializzate, pronte da scrivere sul socket"""
+    rng = random.Random(seed)
+    path = "/quotes" if batch else "/quote"
+
+    def build():
+        payload = [random_scenario(rng) for _ in range(batch)] if batch else random_scenario(rng)
+        body = json.dumps(payload).encode("utf-8")
+        head = f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n" \
+               f"Content-Length: {len(body)}\r\n\r\n"
+        return head.encode("latin-1") + body
+
+    if distinct:
+        pool = [build() for _ in range(distinct)]
+        return [rng.choice(pool) for _ in range(count)]
+    return [build() for _ in range(count)]
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    return status, await reader.readexactly(length)
+
+
+async def worker(host, port, requests, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while requests:
+            request = requests.pop()
+            start = time.perf_counter()
+            writer.write(request)
+            status, _ = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def get_json(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode("latin-1"))
+    _, body = await read_response(reader)
+    writer.close()
+    return json.loads(body)
+
+
+async def run(host, port, requests, connections):
+    latencies, errors = [], []
+    pending = list(reversed(requests))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(host, port, pending, latencies, errors) for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed, await get_json(host, port, "/stats")
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def start_server():
+    """Avvia quote_server.py su una porta libera; restituisce processo e porta"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "quote_server.py"), "--port", str(port)],
+                               stderr=subprocess.PIPE, text=True)
+    process.stderr.readline()  # "preventivi su http://...": il server è in ascolto
+    return process, port
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="host:porta di un server già avviato (default: ne avvia uno)")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=0, help="scenari per richiesta su /quotes (0 = /quote)")
+    parser.add_argument("--distinct", type=int, default=1000, help="richieste diverse (0 = tutte diverse)")
+    args = parser.parse_args()
+
+    process = None
+    if args.url:
+        host, port = args.url.rsplit(":", 1)
+        port = int(port)
+    else:
+        process, port = start_server()
+        host = "127.0.0.1"
+    try:
+        requests = make_requests(args.requests, args.batch, args.distinct, host)
+        latencies, errors, elapsed, stats = asyncio.run(run(host, port, requests, args.connections))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    latencies.sort()
+    scenarios = len(latencies) * (args.batch or 1)
+    print(f"richieste:    {len(latencies)} ({len(errors)} errori) su {args.connections} connessioni")
+    print(f"throughput:   {len(latencies) / elapsed:,.0f} richieste/s, {scenarios / elapsed:,.0f} scenari/s")
+    print(f"latenza ms:   p50 {percentile(latencies, 0.50) * 1000:.2f}  p90 {percentile(latencies, 0.90) * 1000:.2f}"
+          f"  p99 {percentile(latencies, 0.99) * 1000:.2f}  max {latencies[-1] * 1000:.2f}"
+          f"  media {statistics.mean(latencies) * 1000:.2f}")
+    print(f"cache server: hit rate {stats['hit_rate']:.1%}, {stats['size']}/{stats['maxsize']} voci")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
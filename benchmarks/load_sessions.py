@@ -0,0 +1,202 @@
+"""Test di carico multi-sessione dell'app: N sessioni simulate, tutte vive insieme.
+
+Uso:
+    python benchmarks/load_sessions.py --sessions 500 --reruns 4
+    python benchmarks/load_sessions.py --sessions 50 -o sessions.json
+
+Ogni sessione è un AppTest nello stesso processo, quindi cache, catalogo e moduli sono
+condivisi come in un server Streamlit. Ogni sessione fa il primo render e poi --reruns
+interazioni casuali (tool, prompts, frequenza, piattaforme). Le sessioni restano tutte
+aperte fino alla fine e i loro rerun si alternano in ordine casuale. AppTest non regge
+rerun in parallelo (ogni run installa un Runtime globale), quindi vengono eseguiti uno
+alla volta: la latenza è il tempo di servizio del rerun, senza attesa in coda. Lo script riporta:
+- RSS del processo per sessione: la crescita dopo aver aperto le sessioni, divisa per N;
+- latenza dei rerun: p50, p90, p99 e massimo;
+- memoria allocata per rerun, misurata con tracemalloc su altre --traced sessioni.
+  Per ogni rerun dà il picco transitorio e la memoria trattenuta a fine rerun, più la
+  memoria Python trattenuta da ogni sessione.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Gli scenari delle sessioni non finiscono nel database del progetto
+os.environ.setdefault("SCENARIO_DB", os.path.join(tempfile.mkdtemp(), "scenarios.db"))
+
+from pricing import TOOLS_DATA  # noqa: E402
+
+APP = os.path.join(ROOT, "app.py")
+FREQUENCIES = ["Settimanale", "Giornaliero", "Real-time"]
+PLATFORMS = ["ChatGPT", "Perplexity", "Google AI Overviews", "Gemini", "Copilot"]
+
+
+def rss():
+    """RSS corrente del processo in byte (picco, se /proc non è disponibile)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _check(at):
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+
+def share_script_cache():
+    """Come in un server Streamlit, app.py viene compilato una sola volta per processo.
+
+    AppTest crea una ScriptCache nuova a ogni run e ricompilerebbe lo script ogni volta,
+    gonfiando latenza e allocazioni per rerun.
+    """
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import local_script_runner
+
+    shared = ScriptCache()
+    local_script_runner.ScriptCache = lambda: shared
+
+
+def open_session():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    _check(at)
+    return at
+
+
+def interact(at, rng):
+    """Un'interazione casuale dell'utente, seguita dal rerun"""
+    action = rng.choice(("tool", "prompts", "frequency", "platforms"))
+    if action == "tool":
+        next(s for s in at.selectbox if s.label == "Quale tool vuoi usare?").select(rng.choice(list(TOOLS_DATA)))
+    elif action == "prompts":
+        widget = next(n for n in at.number_input if "prompts" in n.label.lower())
+        widget.set_value(rng.randint(int(widget.min or 1), int(min(widget.max or 1000, 1000))))
+    elif action == "frequency":
+        next(s for s in at.select_slider if s.label.endswith("Frequenza monitoraggio")).set_value(
+            rng.choice(FREQUENCIES))
+    else:
+        next(m for m in at.multiselect if m.label.endswith("Piattaforme da monitorare")).set_value(
+            rng.sample(PLATFORMS, rng.randint(1, len(PLATFORMS))))
+    at.run()
+    _check(at)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_sessions(count, reruns, seed):
+    """Apre count sessioni e fa reruns interazioni per ognuna; restituisce sessioni e latenze"""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    sessions = [open_session() for _ in range(count)]
+    first = time.perf_counter() - start
+    latencies = []
+    for _ in range(reruns):
+        for at in rng.sample(sessions, count):
+            latencies.append(timed(interact, at, rng))
+    return sessions, first, latencies
+
+
+def traced_sessions(count, reruns, seed):
+    """Memoria Python (tracemalloc) per sessione aperta e per rerun, in sequenza"""
+    rng = random.Random(seed)
+    sessions, retained, peaks = [], [], []
+    tracemalloc.start()
+    try:
+        gc.collect()
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(count):
+            sessions.append(open_session())
+        gc.collect()
+        per_session = (tracemalloc.get_traced_memory()[0] - before) / count
+        for _ in range(reruns):
+            for at in sessions:
+                gc.collect()
+                current = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                interact(at, rng)
+                after, peak = tracemalloc.get_traced_memory()
+                peaks.append(peak - current)
+                retained.append(after - current)
+    finally:
+        tracemalloc.stop()
+    return per_session, peaks, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--reruns", type=int, default=4, help="interazioni per sessione dopo il primo render")
+    parser.add_argument("--traced", type=int, default=10, help="sessioni misurate con tracemalloc (0 = nessuna)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="salva i risultati in JSON")
+    args = parser.parse_args()
+
+    share_script_cache()
+    # Una sessione di riscaldamento: import, cache e catalogo non contano come memoria per sessione
+    warmup = open_session()
+    interact(warmup, random.Random(args.seed))
+    gc.collect()
+    rss_before = rss()
+
+    sessions, first, latencies = run_sessions(args.sessions, args.reruns, args.seed)
+    gc.collect()
+    rss_per_session = (rss() - rss_before) / args.sessions
+    latencies.sort()
+    results = {
+        "sessions": args.sessions,
+        "reruns": len(latencies),
+        "first_render_s": first,
+        "rss_per_session_kb": rss_per_session / 1024,
+        "rss_total_mb": rss() / 2**20,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p90": percentile(latencies, 0.90) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+            "max": latencies[-1] * 1000,
+            "mean": statistics.mean(latencies) * 1000,
+        },
+    }
+    print(f"sessioni:          {args.sessions}, primo render di tutte in {first:.1f} s")
+    print(f"RSS:               {results['rss_per_session_kb']:,.0f} KB per sessione, {results['rss_total_mb']:,.0f} MB totali")
+    print(f"rerun ({len(latencies)}):      p50 {results['latency_ms']['p50']:.0f} ms  p90 {results['latency_ms']['p90']:.0f}"
+          f" ms  p99 {results['latency_ms']['p99']:.0f} ms  max {results['latency_ms']['max']:.0f} ms")
+
+    if args.traced:
+        per_session, peaks, retained = traced_sessions(args.traced, args.reruns, args.seed + args.sessions)
+        results["traced"] = {
+            "sessions": args.traced,
+            "retained_per_session_kb": per_session / 1024,
+            "alloc_peak_per_rerun_kb": statistics.median(peaks) / 1024,
+            "retained_per_rerun_kb": statistics.median(retained) / 1024,
+        }
+        print(f"tracemalloc:       {per_session / 1024:,.0f} KB trattenuti per sessione; per rerun (mediana) "
+              f"picco {statistics.median(peaks) / 1024:,.0f} KB, trattenuti {statistics.median(retained) / 1024:,.1f} KB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
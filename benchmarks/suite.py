@@ -0,0 +1,221 @@
+"""Suite di benchmark: funzioni di pricing, percorsi batch e render completo dell'app.
+
+Uso:
+    python benchmarks/suite.py -o results.json
+    python benchmarks/suite.py -o results.json --baseline baseline.json --threshold 0.2
+    python benchmarks/suite.py --only render    # solo i casi il cui nome contiene "render"
+
+Per ogni caso registra la mediana e il minimo di più ripetizioni; per il render
+dell'app (main() eseguito da streamlit.testing.v1.AppTest, per ogni tool, con e senza
+click su "Salva scenario") registra anche il picco di memoria (tracemalloc), misurato
+in un'esecuzione separata per non falsare i tempi. Con --baseline confronta le mediane
+con quelle salvate ed esce con codice 1 se un caso peggiora oltre la soglia.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Gli scenari calcolati durante il render non finiscono nel database del progetto
+os.environ.setdefault("SCENARIO_DB", os.path.join(tempfile.mkdtemp(), "scenarios.db"))
+
+from cost_curves import cost_curves  # noqa: E402
+from optimizer import cheapest_coverage  # noqa: E402
+from pricing import (  # noqa: E402
+    CATALOG_VERSION,
+    TOOLS_DATA,
+    calculate_cost_conductor,
+    calculate_cost_otterly,
+    calculate_cost_profound,
+    calculate_cost_ubersuggest,
+)
+from pricing_batch import price_all  # noqa: E402
+import quote_cli  # noqa: E402
+
+SCALAR_CALLS = 20_000
+BATCH_ROWS = 100_000
+
+
+def scalar_cases(rng):
+    """calculate_cost_* su input casuali negli intervalli del form, entrambi i cicli"""
+    cycles = ["monthly", "yearly"]
+    inputs = {
+        "calculate_cost_otterly": (
+            calculate_cost_otterly, [(rng.randint(1, 1000), rng.choice(cycles)) for _ in range(SCALAR_CALLS)]),
+        "calculate_cost_profound": (
+            calculate_cost_profound,
+            [(rng.randint(1, 1000), rng.randint(1, 10), rng.choice(cycles)) for _ in range(SCALAR_CALLS)]),
+        "calculate_cost_ubersuggest": (
+            calculate_cost_ubersuggest,
+            [(rng.randint(1, 100), rng.randint(1, 20), rng.choice(cycles)) for _ in range(SCALAR_CALLS)]),
+        "calculate_cost_conductor": (
+            calculate_cost_conductor,
+            [(rng.randint(1, 5000), rng.randrange(100, 10001, 100), rng.choice(cycles)) for _ in range(SCALAR_CALLS)]),
+    }
+    for name, (fn, calls) in inputs.items():
+        def run(fn=fn, calls=calls):
+            for args in calls:
+                fn(*args)
+        yield name, run, SCALAR_CALLS
+
+
+def batch_cases(rng):
+    rows = BATCH_ROWS
+    nprng = np.random.default_rng(0)
+    columns = {
+        "prompts": nprng.integers(1, 5001, rows),
+        "companies": nprng.integers(1, 11, rows),
+        "domains": nprng.integers(1, 21, rows),
+        "pages": nprng.integers(1, 101, rows) * 100,
+        "billing_cycle": nprng.choice(["monthly", "yearly"], rows),
+    }
+    yield "price_all", lambda: price_all(**columns), rows
+
+    records = "".join(
+        json.dumps({
+            "tool": rng.choice(list(TOOLS_DATA)),
+            "prompts": rng.randint(1, 5000),
+            "pages": rng.randrange(100, 10001, 100),
+            "billing_cycle": rng.choice(["monthly", "yearly"]),
+        }) + "\n"
+        for _ in range(rows // 10)
+    )
+    yield "quote_cli_jsonl", lambda: quote_cli.run(io.StringIO(records), io.StringIO(), "jsonl"), rows // 10
+
+    yield "cost_curves", lambda: cost_curves(1, 1_000_000, 2, 3, 3000), 1
+    yield "cheapest_coverage", lambda: cheapest_coverage(
+        5000, 2, 3, 3000, currencies={tool: data["currency"] for tool, data in TOOLS_DATA.items()}), 1
+
+
+def render_cases():
+    """Rerun completo di main() per ogni tool: selezione del tool, poi click su Salva scenario"""
+    from streamlit.testing.v1 import AppTest
+
+    app_path = os.path.join(ROOT, "app.py")
+    for tool in TOOLS_DATA:
+        def select(tool=tool):
+            at = AppTest.from_file(app_path, default_timeout=120)
+            at.run()
+            next(s for s in at.selectbox if s.label == "Quale tool vuoi usare?").select(tool).run()
+            return at
+
+        def rerun(at):
+            at.run()
+            _check(at)
+
+        def calculate(at):
+            at.button[0].click().run()
+            _check(at)
+
+        yield f"render_{tool}", select, rerun
+        yield f"render_{tool}_calcolo", select, calculate
+
+
+def _check(at):
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def measure_render(setup, action, repeat):
+    """Tempi di action su un'app già pronta (setup escluso) e picco di memoria di action"""
+    times = []
+    for _ in range(repeat):
+        at = setup()
+        start = time.perf_counter()
+        action(at)
+        times.append(time.perf_counter() - start)
+    at = setup()
+    tracemalloc.start()
+    action(at)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return times, peak
+
+
+def compare(results, baseline, threshold):
+    """Casi la cui mediana supera quella del baseline di oltre threshold (es. 0.2 = +20%)"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous and result["median_s"] > previous["median_s"] * (1 + threshold):
+            regressions.append((name, previous["median_s"], result["median_s"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", default="-", help="file JSON dei risultati (default: stdout)")
+    parser.add_argument("--baseline", help="risultati salvati con cui confrontare le mediane")
+    parser.add_argument("--threshold", type=float, default=0.2, help="peggioramento tollerato (default: 0.2)")
+    parser.add_argument("--repeat", type=int, default=5, help="ripetizioni per caso (default: 5)")
+    parser.add_argument("--only", help="esegue solo i casi il cui nome contiene questa stringa")
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    results = {}
+    for name, fn, items in [*scalar_cases(rng), *batch_cases(rng)]:
+        if args.only and args.only not in name:
+            continue
+        fn()  # riscaldamento
+        times = measure(fn, args.repeat)
+        results[name] = {"median_s": statistics.median(times), "min_s": min(times), "items": items}
+        print(f"{name:>36} {results[name]['median_s'] * 1000:>10.2f} ms", file=sys.stderr)
+
+    for name, setup, action in render_cases():
+        if args.only and args.only not in name:
+            continue
+        times, peak = measure_render(setup, action, args.repeat)
+        results[name] = {"median_s": statistics.median(times), "min_s": min(times), "peak_bytes": peak}
+        print(f"{name:>36} {results[name]['median_s'] * 1000:>10.2f} ms  picco {peak / 1e6:.1f} MB", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "catalog_version": CATALOG_VERSION,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for name, before, after in regressions:
+            print(f"REGRESSIONE {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms "
+                  f"(+{(after / before - 1):.0%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"nessuna regressione oltre il {args.threshold:.0%}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
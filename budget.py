@@ -0,0 +1,109 @@
+"""Problema inverso del pricing: dato un budget, la copertura massima acquistabile.
+
+Il costo di un tool è non decrescente in ogni input, a gradini: un gradino per piano
+e poi un gradino ogni blocco di sovrapprezzo sull'ultimo piano. Per ogni budget basta
+quindi scegliere il piano più alto che rientra nel budget (capienza = suo limite) e,
+se è l'ultimo, invertire analiticamente il costo dei blocchi extra: nessuna scansione
+dei valori, e migliaia di budget si risolvono insieme come array NumPy. Come in
+pricing.quote, un input senza sovrapprezzo non costa di più oltre il limite
+dell'ultimo piano: con l'ultimo piano nel budget è illimitato (UNLIMITED).
+"""
+import numpy as np
+
+from pricing import EXCHANGE_RATES, INPUTS, TIERS, select_plan
+from pricing_batch import cost_dtype, monthly_cost
+
+DEFAULTS = {"prompts": 1, "companies": 1, "domains": 1, "pages": 1000}
+# Unità acquistabili quando l'ultimo piano copre l'input a prezzo fisso
+UNLIMITED = np.iinfo(np.int64).max
+
+
+def priced_inputs(tool):
+    """Input da cui dipende il costo di un tool, nell'ordine di pricing.INPUTS"""
+    return [name for index, name in enumerate(INPUTS) if index in dict(TIERS[tool].limits)]
+
+
+def max_units(tool, name, budgets, billing_cycle="monthly", **fixed):
+    """Valore massimo di `name` acquistabile con ogni budget, a parità degli altri input.
+
+    budgets è uno scalare o un array, nella valuta del tool; con billing_cycle
+    "yearly" è un budget annuale (già scontato). Gli altri input valgono fixed o i
+    default di calculate_cost_*. Restituisce (units, plan_id) come array: units è 0
+    e plan_id -1 dove il budget non basta nemmeno per il piano minimo, UNLIMITED dove
+    basta per l'ultimo piano e l'input non ha sovrapprezzo.
+    """
+    table = TIERS[tool]
+    index = INPUTS.index(name)
+    limits = dict(table.limits).get(index)
+    if limits is None:
+        raise ValueError(f"{tool}: il costo non dipende da {name!r}")
+    last = len(table.plans) - 1
+    budgets = np.asarray(budgets, dtype=np.float64)
+    yearly = billing_cycle == "yearly"
+
+    def cycle_cost(monthly):
+        # Stesso ordine delle operazioni di pricing.quote, per confronti esatti col budget
+        return monthly * 12 * table.yearly_discount if yearly else monthly
+
+    values = [fixed.get(input_name, DEFAULTS[input_name]) for input_name in INPUTS]
+    values[index] = 1
+    min_plan = select_plan(table, values)
+
+    # Sovrapprezzi dovuti agli altri input, fissi sull'ultimo piano
+    fixed_overage = 0
+    rule = None
+    for overage_index, included, block, price in table.overage:
+        if overage_index == index:
+            rule = (included, block, price)
+        elif values[overage_index] > included:
+            fixed_overage += ((values[overage_index] - included) // block) * price
+
+    # Piano più alto che rientra nel budget: più capienza a ogni piano superiore
+    costs = np.array(
+        [table.prices[p] + (fixed_overage if p == last else 0) for p in range(min_plan, last + 1)],
+        dtype=cost_dtype(table),
+    )
+    affordable = cycle_cost(costs) <= budgets[..., np.newaxis]
+    plan_id = np.where(
+        affordable.any(axis=-1), min_plan + len(costs) - 1 - affordable[..., ::-1].argmax(axis=-1), -1
+    )
+    units = np.where(plan_id >= 0, np.asarray(limits, dtype=np.int64)[plan_id], 0)
+
+    if rule:
+        # Ultimo piano: k blocchi extra costano k * price, e coprono fino a included + (k + 1) * block - 1
+        included, block, price = rule
+        base = costs[-1].item()
+        monthly_budget = budgets / (12 * table.yearly_discount) if yearly else budgets
+        blocks = np.floor((monthly_budget - base) / price)
+        # Correzione dell'arrotondamento in virgola mobile
+        blocks -= cycle_cost(base + blocks * price) > budgets
+        blocks += cycle_cost(base + (blocks + 1) * price) <= budgets
+        top = plan_id == last
+        units = np.where(top, included + (np.maximum(blocks, 0).astype(np.int64) + 1) * block - 1, units)
+    else:
+        units = np.where(plan_id == last, UNLIMITED, units)
+
+    # Il piano effettivo è quello che il pricing sceglie per units (limiti uguali tra piani)
+    values[index] = np.maximum(units, 1)
+    actual_plan, _ = monthly_cost(tool, *values)
+    return units, np.where(plan_id >= 0, actual_plan, -1).astype(np.int8)
+
+
+def max_coverage(budget, billing_cycle="monthly", currencies=None, rates=EXCHANGE_RATES, currency="$",
+                 tools=None, **fixed):
+    """Copertura massima per ogni tool e per ogni input da cui dipende il suo costo.
+
+    budget (scalare o array) è in `currency` e viene convertito nella valuta di ogni
+    tool con `rates`; currencies è {tool: valuta} come in optimizer.cheapest_coverage.
+    Restituisce {tool: {input: (units, plan_id)}}, ogni input massimizzato tenendo gli
+    altri a fixed.
+    """
+    currencies = currencies or {}
+    coverage = {}
+    for tool in TIERS if tools is None else tools:
+        rate = rates[currencies.get(tool, currency)] / rates[currency]
+        coverage[tool] = {
+            name: max_units(tool, name, np.asarray(budget, dtype=np.float64) / rate, billing_cycle, **fixed)
+            for name in priced_inputs(tool)
+        }
+    return coverage
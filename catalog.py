@@ -0,0 +1,342 @@
+"""Catalogo prezzi esterno: validazione, compilazione, snapshot binari e ricarica a caldo.
+
+Il catalogo è un file JSON (o YAML, se PyYAML è installato) con la stessa struttura di
+TOOLS_DATA: per ogni tool description, currency, il blocco "pricing" e i piani. Viene
+validato, compilato in TierTable e congelato in un Catalog immutabile, identificato da
+una versione (impronta del contenuto).
+
+Ogni versione compilata è salvata anche come snapshot binario (marshal) in
+CATALOG_SNAPSHOT_DIR: un worker che trova lo snapshot del file corrente lo carica senza
+rifare parsing, validazione e compilazione. CatalogWatcher ricontrolla l'mtime del file
+al massimo una volta per intervallo e ricarica il catalogo quando cambia; un file non
+valido viene ignorato e resta in uso la versione precedente.
+
+    python catalog.py catalog.json       # valida, stampa la versione e scrive lo snapshot
+"""
+import argparse
+import hashlib
+import json
+import marshal
+import os
+import struct
+import sys
+import threading
+import time
+import warnings
+from types import MappingProxyType
+from typing import NamedTuple
+
+INPUTS = ("prompts", "companies", "domains", "pages")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.environ.get("PRICING_CATALOG", os.path.join(HERE, "catalog.json"))
+SNAPSHOT_DIR = os.environ.get("CATALOG_SNAPSHOT_DIR", os.path.join(HERE, "catalog_snapshots"))
+
+SNAPSHOT_MAGIC = b"GEOCAT1\n"
+# Versione di marshal, mtime (ns) e dimensione del file sorgente
+_SNAPSHOT_HEADER = struct.Struct("<iqq")
+
+
+class CatalogError(ValueError):
+    """Catalogo non valido o illeggibile"""
+
+
+class TierTable(NamedTuple):
+    """Regole di pricing compilate di un tool"""
+    plans: tuple        # nomi dei piani, in ordine crescente
+    prices: tuple       # prezzo mensile di ogni piano
+    limits: tuple       # (indice input, limiti per piano), limiti non decrescenti
+    overage: tuple      # (indice input, inclusi, blocco, prezzo per blocco) sull'ultimo piano
+    yearly_discount: float
+
+
+class Catalog(NamedTuple):
+    """Catalogo compilato e congelato, condivisibile tra sessioni e thread"""
+    version: str
+    tools: MappingProxyType     # dati dei tool in sola lettura (dict -> mappingproxy, liste -> tuple)
+    tiers: MappingProxyType     # tool -> TierTable
+    source: tuple = None        # (percorso, mtime_ns, dimensione) del file da cui è stato letto
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate(data):
+    """Controlla la struttura del catalogo; solleva CatalogError con il percorso del campo"""
+    def fail(path, message):
+        raise CatalogError(f"{path}: {message}")
+
+    if not isinstance(data, dict) or not data:
+        fail("catalogo", "atteso un oggetto non vuoto tool -> dati")
+    for tool, tool_data in data.items():
+        if not isinstance(tool_data, dict):
+            fail(tool, "atteso un oggetto")
+        for key in ("description", "currency"):
+            if not isinstance(tool_data.get(key), str):
+                fail(f"{tool}.{key}", "attesa una stringa")
+
+        pricing = tool_data.get("pricing")
+        if not isinstance(pricing, dict):
+            fail(f"{tool}.pricing", "atteso un oggetto")
+        limits = pricing.get("limits")
+        if not isinstance(limits, dict):
+            fail(f"{tool}.pricing.limits", "atteso un oggetto input -> chiave del piano")
+        for name, key in limits.items():
+            if name not in INPUTS:
+                fail(f"{tool}.pricing.limits.{name}", f"input sconosciuto, attesi {', '.join(INPUTS)}")
+            if not isinstance(key, str):
+                fail(f"{tool}.pricing.limits.{name}", "attesa una stringa")
+        overage = pricing.get("overage", {})
+        if not isinstance(overage, dict):
+            fail(f"{tool}.pricing.overage", "atteso un oggetto")
+        for name, rule in overage.items():
+            path = f"{tool}.pricing.overage.{name}"
+            if not isinstance(rule, dict):
+                fail(path, "atteso un oggetto con block e price")
+            if not isinstance(rule.get("block"), int) or isinstance(rule.get("block"), bool) or rule["block"] <= 0:
+                fail(f"{path}.block", "atteso un intero positivo")
+            if not _is_number(rule.get("price")) or rule["price"] < 0:
+                fail(f"{path}.price", "atteso un numero non negativo")
+        discount = pricing.get("yearly_discount")
+        if not _is_number(discount) or not 0 < discount <= 1:
+            fail(f"{tool}.pricing.yearly_discount", "atteso un numero in (0, 1]")
+
+        plans = tool_data.get("plans")
+        if not isinstance(plans, dict) or not plans:
+            fail(f"{tool}.plans", "atteso un oggetto non vuoto")
+        for plan, plan_data in plans.items():
+            path = f"{tool}.plans.{plan}"
+            if not isinstance(plan_data, dict):
+                fail(path, "atteso un oggetto")
+            if not _is_number(plan_data.get("price_monthly")) or plan_data["price_monthly"] < 0:
+                fail(f"{path}.price_monthly", "atteso un numero non negativo")
+            features = plan_data.get("features")
+            if not isinstance(features, list) or not all(isinstance(f, str) for f in features):
+                fail(f"{path}.features", "attesa una lista di stringhe")
+            for key in limits.values():
+                if not _is_number(plan_data.get(key)):
+                    fail(f"{path}.{key}", "limite del piano mancante o non numerico")
+
+
+def compile_tool(tool, data):
+    """Compila il blocco "pricing" di un tool in una TierTable"""
+    pricing = data["pricing"]
+    plans = list(data["plans"].items())
+
+    limits = []
+    for name, key in pricing["limits"].items():
+        if name not in INPUTS:
+            raise ValueError(f"{tool}: input sconosciuto {name!r}")
+        try:
+            values = tuple(plan[key] for _, plan in plans)
+        except KeyError:
+            raise ValueError(f"{tool}: ogni piano deve dichiarare {key!r}") from None
+        if any(a > b for a, b in zip(values, values[1:])):
+            raise ValueError(f"{tool}: i limiti {key!r} devono essere crescenti tra i piani")
+        limits.append((INPUTS.index(name), values))
+
+    last_limits = dict(limits)
+    overage = []
+    for name, rule in pricing.get("overage", {}).items():
+        index = INPUTS.index(name) if name in INPUTS else None
+        if index not in last_limits:
+            raise ValueError(f"{tool}: sovrapprezzo su {name!r} senza limite nei piani")
+        overage.append((index, last_limits[index][-1], rule["block"], rule["price"]))
+
+    return TierTable(
+        plans=tuple(name for name, _ in plans),
+        prices=tuple(plan["price_monthly"] for _, plan in plans),
+        limits=tuple(limits),
+        overage=tuple(overage),
+        yearly_discount=pricing["yearly_discount"],
+    )
+
+
+def compile_catalog(tools_data):
+    """Compila tutti i tool del catalogo"""
+    return {tool: compile_tool(tool, data) for tool, data in tools_data.items()}
+
+
+def catalog_version(tools_data):
+    """Impronta breve del catalogo: cambia a ogni modifica di piani, prezzi o regole"""
+    payload = json.dumps(tools_data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def freeze(value):
+    """Copia in sola lettura: dict -> mappingproxy, liste -> tuple, stringhe internate"""
+    if isinstance(value, dict):
+        return MappingProxyType({sys.intern(key): freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+def build(tools_data, source=None):
+    """Valida e compila i dati di un catalogo in un Catalog"""
+    validate(tools_data)
+    try:
+        tiers = compile_catalog(tools_data)
+    except ValueError as exc:
+        raise CatalogError(str(exc)) from None
+    return Catalog(catalog_version(tools_data), freeze(tools_data), MappingProxyType(tiers), source)
+
+
+def read(path):
+    """Dati del catalogo da un file JSON o YAML"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise CatalogError(f"{path}: per i cataloghi YAML serve PyYAML (pip install pyyaml)") from None
+            try:
+                return yaml.safe_load(f)
+            except yaml.YAMLError as exc:
+                raise CatalogError(f"{path}: YAML non valido: {exc}") from None
+        try:
+            return json.load(f)
+        except json.JSONDecodeError as exc:
+            raise CatalogError(f"{path}: JSON non valido: {exc}") from None
+
+
+def _source(path):
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _snapshot_paths(source, directory):
+    """Snapshot del file sorgente corrente e archivio per versione"""
+    name = os.path.splitext(os.path.basename(source[0]))[0]
+    return os.path.join(directory, f"{name}.snap"), os.path.join(directory, f"{name}-{{version}}.snap")
+
+
+def write_snapshot(catalog, directory=SNAPSHOT_DIR):
+    """Scrive lo snapshot binario del catalogo (corrente e per versione); restituisce il percorso"""
+    current, versioned = _snapshot_paths(catalog.source, directory)
+    payload = marshal.dumps((
+        catalog.version,
+        _thaw(catalog.tools),
+        {tool: tuple(table) for tool, table in catalog.tiers.items()},
+    ))
+    data = SNAPSHOT_MAGIC + _SNAPSHOT_HEADER.pack(marshal.version, *catalog.source[1:]) + payload
+    os.makedirs(directory, exist_ok=True)
+    for path in (versioned.format(version=catalog.version), current):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return current
+
+
+def read_snapshot(source, directory=SNAPSHOT_DIR):
+    """Catalogo dallo snapshot del file sorgente, o None se manca o non corrisponde"""
+    current, _ = _snapshot_paths(source, directory)
+    try:
+        with open(current, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    start = len(SNAPSHOT_MAGIC) + _SNAPSHOT_HEADER.size
+    if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        return None
+    marshal_version, mtime_ns, size = _SNAPSHOT_HEADER.unpack_from(data, len(SNAPSHOT_MAGIC))
+    if marshal_version != marshal.version or (mtime_ns, size) != source[1:]:
+        return None
+    try:
+        version, tools_data, tiers = marshal.loads(data[start:])
+    except (EOFError, ValueError, TypeError):
+        return None
+    return Catalog(
+        version,
+        freeze(tools_data),
+        MappingProxyType({tool: TierTable(*table) for tool, table in tiers.items()}),
+        source,
+    )
+
+
+def _thaw(value):
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def load(path=DEFAULT_PATH, snapshot_dir=SNAPSHOT_DIR):
+    """Carica il catalogo dallo snapshot, se aggiornato, altrimenti dal file (e scrive lo snapshot)"""
+    try:
+        source = _source(path)
+    except OSError as exc:
+        raise CatalogError(f"{path}: {exc.strerror}") from None
+    if snapshot_dir:
+        catalog = read_snapshot(source, snapshot_dir)
+        if catalog is not None:
+            return catalog
+    catalog = build(read(path), source)
+    if snapshot_dir:
+        try:
+            write_snapshot(catalog, snapshot_dir)
+        except OSError as exc:
+            warnings.warn(f"snapshot del catalogo non scritto: {exc}")
+    return catalog
+
+
+class CatalogWatcher:
+    """Catalogo corrente di un file, ricaricato quando il file cambia"""
+
+    def __init__(self, path=DEFAULT_PATH, check_interval=1.0, snapshot_dir=SNAPSHOT_DIR, clock=time.monotonic):
+        self.path = path
+        self.check_interval = check_interval
+        self.snapshot_dir = snapshot_dir
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._catalog = load(path, snapshot_dir)
+        self._next_check = clock() + check_interval
+
+    def current(self):
+        """Catalogo corrente; controlla l'mtime del file al massimo una volta per intervallo"""
+        if self._clock() < self._next_check:
+            return self._catalog
+        with self._lock:
+            if self._clock() >= self._next_check:
+                self._next_check = self._clock() + self.check_interval
+                self._reload_if_changed()
+        return self._catalog
+
+    def _reload_if_changed(self):
+        try:
+            source = _source(self.path)
+        except OSError as exc:
+            warnings.warn(f"catalogo {self.path} non leggibile, resta la versione {self._catalog.version}: {exc}")
+            return
+        if source == self._catalog.source:
+            return
+        try:
+            catalog = load(self.path, self.snapshot_dir)
+        except CatalogError as exc:
+            warnings.warn(f"catalogo non valido, resta la versione {self._catalog.version}: {exc}")
+            return
+        self._catalog = catalog
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Valida il catalogo prezzi e ne scrive lo snapshot")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH, help=f"file JSON/YAML (default: {DEFAULT_PATH})")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, help=f"cartella degli snapshot (default: {SNAPSHOT_DIR})")
+    args = parser.parse_args(argv)
+    try:
+        catalog = build(read(args.path), _source(args.path))
+        snapshot = write_snapshot(catalog, args.snapshot_dir)
+    except (CatalogError, OSError) as exc:
+        raise SystemExit(f"errore: {exc}")
+    plans = sum(len(table.plans) for table in catalog.tiers.values())
+    print(f"{args.path}: {len(catalog.tiers)} tool, {plans} piani, versione {catalog.version} -> {snapshot}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
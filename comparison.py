@@ -0,0 +1,50 @@
+"""Confronto tra tutti i tool sugli input correnti, in un'unica valuta.
+
+Ogni tool viene prezzato con le sue regole reali sugli stessi input; i preventivi
+sono memorizzati uno per tool (una configurazione che cambia un solo tool non
+ricalcola gli altri) e, con un executor, i tool mancanti in cache vengono prezzati in
+parallelo.
+"""
+from pricing import EXCHANGE_RATES, TIERS
+from quote_table import quote
+
+
+def _quote_tool(tool, values, billing_cycle, cache, version):
+    if cache is None:
+        return quote(tool, *values, billing_cycle)
+    return cache.get_or_compute(
+        ("tool_quote", tool, values, billing_cycle),
+        lambda: quote(tool, *values, billing_cycle),
+        version=version
+    )
+
+
+def compare_tools(prompts, companies=1, domains=1, pages=1000, billing_cycle="monthly", currencies=None,
+                  rates=EXCHANGE_RATES, currency="$", tools=None, cache=None, version=None, executor=None):
+    """Preventivo di ogni tool sugli stessi input, ordinato per costo mensile.
+
+    currencies è {tool: valuta} come in optimizer.cheapest_coverage; i costi sono
+    convertiti in `currency`. cache è un QuoteCache (opzionale, invalidato da version),
+    executor un concurrent.futures.Executor (opzionale). Restituisce una lista di dict
+    con tool, plan, monthly_cost, yearly_cost, cost_per_prompt.
+    """
+    tools = list(TIERS if tools is None else tools)
+    currencies = currencies or {}
+    values = (prompts, companies, domains, pages)
+
+    def run(tool):
+        return _quote_tool(tool, values, billing_cycle, cache, version)
+
+    quotes = executor.map(run, tools) if executor is not None and len(tools) > 1 else map(run, tools)
+    rows = []
+    for tool, (plan, monthly_cost, yearly_cost) in zip(tools, quotes):
+        rate = rates[currencies.get(tool, currency)] / rates[currency]
+        rows.append({
+            "tool": tool,
+            "plan": plan,
+            "monthly_cost": monthly_cost * rate,
+            "yearly_cost": yearly_cost * rate,
+            "cost_per_prompt": monthly_cost * rate / max(prompts, 1),
+        })
+    rows.sort(key=lambda row: row["monthly_cost"])
+    return rows
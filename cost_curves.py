@@ -0,0 +1,126 @@
+"""Curve di costo esatte e punti di break-even tra tool, in funzione dei prompts.
+
+Con companies, domini e pagine fissati, il costo mensile di ogni tool è una funzione a
+gradini dei prompts: pochi gradini per il cambio di piano, poi un gradino ogni
+"blocco" di sovrapprezzo. I gradini vengono generati direttamente dalle tabelle
+compilate in pricing.TIERS, senza valutare ogni intero: una curva su milioni di
+prompts costa quanto il numero dei suoi gradini.
+"""
+import numpy as np
+
+from pricing import EXCHANGE_RATES, INPUTS, TIERS, TOOLS_DATA, select_plan
+from pricing_batch import cost_dtype
+
+_PROMPTS = INPUTS.index("prompts")
+
+
+def cost_steps(tool, lo, hi, companies=1, domains=1, pages=1000):
+    """Gradini del costo mensile per prompts in [lo, hi].
+
+    Restituisce (starts, costs, plan_ids): il costo vale costs[i] da starts[i] fino al
+    gradino successivo (o fino a hi); starts[0] == lo.
+    """
+    table = TIERS[tool]
+    last = len(table.plans) - 1
+    others = [1, companies, domains, pages]
+    min_plan = select_plan(table, others)
+    limits = dict(table.limits).get(_PROMPTS)
+
+    # Sovrapprezzi fissi (da input diversi dai prompts) sull'ultimo piano
+    fixed_overage = 0
+    prompt_overage = None
+    for index, included, block, price in table.overage:
+        if index == _PROMPTS:
+            prompt_overage = (included, block, price)
+        elif others[index] > included:
+            fixed_overage += ((others[index] - included) // block) * price
+
+    starts, costs, plan_ids = [], [], []
+    if limits is None:
+        plan_ids.append(min_plan)
+        starts.append(lo)
+    else:
+        # Piani intermedi: il piano p copre i prompts in (limits[p-1], limits[p]]
+        for plan_id in range(min_plan, last + 1):
+            starts.append(limits[plan_id - 1] + 1 if plan_id > min_plan else lo)
+            plan_ids.append(plan_id)
+    for plan_id in plan_ids:
+        costs.append(table.prices[plan_id] + (fixed_overage if plan_id == last else 0))
+
+    starts = np.asarray(starts, dtype=np.int64)
+    costs = np.asarray(costs, dtype=cost_dtype(table))
+    plan_ids = np.asarray(plan_ids, dtype=np.int8)
+
+    if prompt_overage and plan_ids[-1] == last:
+        # Gradini di sovrapprezzo: a included + k*block il costo sale di k*price
+        included, block, price = prompt_overage
+        k_first = max(1, (lo - included) // block)
+        k_last = (hi - included) // block
+        if k_last >= k_first:
+            k = np.arange(k_first, k_last + 1, dtype=np.int64)
+            starts = np.concatenate([starts, included + k * block])
+            costs = np.concatenate([costs, costs[-1] + k * price])
+            plan_ids = np.concatenate([plan_ids, np.full(len(k), last, dtype=np.int8)])
+
+    # Ritaglio su [lo, hi]: il gradino che contiene lo parte da lo
+    first = max(np.searchsorted(starts, lo, side="right") - 1, 0)
+    keep = slice(first, np.searchsorted(starts, hi, side="right"))
+    starts, costs, plan_ids = starts[keep].copy(), costs[keep], plan_ids[keep]
+    starts[0] = lo
+    return starts, costs, plan_ids
+
+
+def cost_at(steps, prompts):
+    """Valuta una curva a gradini su uno o più valori di prompts"""
+    starts, costs, _ = steps
+    return costs[np.searchsorted(starts, prompts, side="right") - 1]
+
+
+def cost_curves(lo, hi, companies=1, domains=1, pages=1000, currency="$", rates=EXCHANGE_RATES, tools=None):
+    """Curve di costo di tutti i tool, convertite in `currency`: {tool: (starts, costs, plan_ids)}"""
+    curves = {}
+    for tool in TIERS if tools is None else tools:
+        starts, costs, plan_ids = cost_steps(tool, lo, hi, companies, domains, pages)
+        rate = rates[TOOLS_DATA[tool]["currency"]] / rates[currency] if tool in TOOLS_DATA else 1.0
+        curves[tool] = (starts, costs * rate, plan_ids)
+    return curves
+
+
+def break_even(curve_a, curve_b):
+    """Punti in cui cambia il tool più economico tra due curve.
+
+    Restituisce una lista di (prompts, segno) dove segno è -1 se da lì costa meno la
+    prima curva, 1 se costa meno la seconda, 0 se costano uguale. Il primo elemento
+    descrive la situazione all'inizio dell'intervallo.
+    """
+    points = np.union1d(curve_a[0], curve_b[0])
+    sign = np.sign(cost_at(curve_a, points) - cost_at(curve_b, points)).astype(np.int8)
+    changes = np.flatnonzero(np.diff(sign)) + 1
+    changes = np.concatenate([[0], changes])
+    return list(zip(points[changes].tolist(), sign[changes].tolist()))
+
+
+def break_even_table(curves):
+    """Tutti i break-even tra coppie di tool: lista di (prompts, tool più economico, altro tool)"""
+    tools = list(curves)
+    rows = []
+    for i, tool_a in enumerate(tools):
+        for tool_b in tools[i + 1:]:
+            for prompts, sign in break_even(curves[tool_a], curves[tool_b])[1:]:
+                if sign:
+                    cheaper, other = (tool_a, tool_b) if sign < 0 else (tool_b, tool_a)
+                    rows.append((prompts, cheaper, other))
+    rows.sort()
+    return rows
+
+
+def cheapest_envelope(curves):
+    """Tool più economico per ogni tratto: (starts, indice del tool in curves, costo)"""
+    tools = list(curves)
+    points = curves[tools[0]][0]
+    for tool in tools[1:]:
+        points = np.union1d(points, curves[tool][0])
+    matrix = np.vstack([cost_at(curves[tool], points) for tool in tools])
+    winner = matrix.argmin(axis=0)
+    changes = np.concatenate([[0], np.flatnonzero(np.diff(winner)) + 1])
+    return points[changes], winner[changes], matrix[winner[changes], changes]
@@ -0,0 +1,126 @@
+"""Previsione Monte Carlo della spesa con crescita incerta di prompts, company e domini.
+
+Ogni percorso simula mese per mese una passeggiata aleatoria log-normale degli input
+(crescita mensile con media e volatilità date) e li prezza con le regole reali dei
+tool, inclusi cambi di piano e gradini di sovrapprezzo. Per ogni tool si confrontano
+due strategie di fatturazione:
+
+- "monthly": ogni mese si paga il costo mensile del piano necessario in quel mese;
+- "yearly": a inizio di ogni anno di contratto si blocca, scontato, il piano necessario
+  in quel momento; se durante l'anno serve di più, la differenza si paga al prezzo
+  mensile pieno.
+
+I percorsi sono simulati a blocchi (chunk) per tenere la memoria costante; i
+risultati sono riproducibili a parità di seed e dimensione dei blocchi.
+"""
+import math
+
+import numpy as np
+
+from pricing import INPUTS, TIERS
+from pricing_batch import monthly_cost
+
+PERCENTILES = (5, 25, 50, 75, 95)
+GROWTH_INPUTS = ("prompts", "companies", "domains")
+# Massimo di prompts per la tabella precalcolata (8 MB di costi int64); oltre si
+# prezzano le celle, con memoria limitata dalla dimensione del blocco
+LOOKUP_MAX_PROMPTS = 1_000_000
+
+
+def growth_params(monthly_growth=0.0, volatility=0.0):
+    """Converte crescita mensile attesa e volatilità (es. 0.05 = 5%) nei parametri log-normali"""
+    sigma2 = math.log1p((volatility / (1 + monthly_growth)) ** 2)
+    return math.log1p(monthly_growth) - sigma2 / 2, math.sqrt(sigma2)
+
+
+def _simulate(rng, paths, months, initial, growth):
+    """Valori interi (paths, months) per ogni input; il mese 0 parte dai valori iniziali"""
+    values = {}
+    for name in GROWTH_INPUTS:
+        mu, sigma = growth.get(name, (0.0, 0.0))
+        if mu == 0 and sigma == 0:
+            values[name] = np.int64(initial[name])
+            continue
+        steps = rng.standard_normal((paths, months), dtype=np.float32)
+        steps *= sigma
+        steps += mu
+        steps[:, 0] = 0
+        np.cumsum(steps, axis=1, out=steps)
+        np.exp(steps, out=steps)
+        steps *= initial[name]
+        values[name] = np.maximum(np.rint(steps), 1).astype(np.int64)
+    return values
+
+
+def _monthly_costs(tool, values, pages):
+    """Costo mensile per ogni cella (percorso, mese).
+
+    Se dell'intero tool varia solo il numero di prompts, e il massimo simulato non
+    supera LOOKUP_MAX_PROMPTS, il costo si legge da una tabella precalcolata su
+    0..max(prompts) invece di riprezzare ogni cella.
+    """
+    table = TIERS[tool]
+    used = {index for index, _ in table.limits} | {index for index, *_ in table.overage}
+    varying = {INPUTS[i] for i in used if INPUTS[i] in values and np.ndim(values[INPUTS[i]])}
+    if varying <= {"prompts"} and np.ndim(values["prompts"]) and values["prompts"].max() <= LOOKUP_MAX_PROMPTS:
+        prompts = values["prompts"]
+        # Gli input che variano non sono usati dal tool: basta un valore qualsiasi
+        fixed = [1 if np.ndim(values[name]) else values[name] for name in ("companies", "domains")]
+        _, lookup = monthly_cost(tool, np.arange(prompts.max() + 1), *fixed, pages)
+        return lookup[prompts]
+    _, cost = monthly_cost(tool, values["prompts"], values["companies"], values["domains"], pages)
+    return cost
+
+
+def forecast(initial, growth, months=24, paths=100_000, pages=1000, tools=None, seed=None,
+             chunk_size=50_000, band_paths=10_000, percentiles=PERCENTILES):
+    """Distribuzione della spesa totale per tool e strategia di fatturazione.
+
+    initial: {"prompts": .., "companies": .., "domains": ..} valori di partenza.
+    growth: {input: (mu, sigma)} crescita mensile log-normale, vedi growth_params;
+            gli input assenti restano costanti.
+
+    Restituisce un dict con, per ogni tool e strategia ("monthly", "yearly"):
+    - totals[tool][strategy]: percentili della spesa totale sull'orizzonte (tutti i percorsi);
+    - bands[tool][strategy]: percentili della spesa cumulata mese per mese, stimati sui
+      primi band_paths percorsi (array percentili × mesi).
+    Le cifre sono nella valuta di ciascun tool.
+    """
+    tools = list(TIERS if tools is None else tools)
+    initial = {name: initial.get(name, 1) for name in GROWTH_INPUTS}
+    rng = np.random.default_rng(seed)
+    band_paths = min(band_paths, paths)
+
+    totals = {tool: {"monthly": np.empty(paths), "yearly": np.empty(paths)} for tool in tools}
+    cumulative = {tool: {"monthly": [], "yearly": []} for tool in tools}
+    # Inizio dell'anno di contratto di ogni mese e durata di ogni anno (l'ultimo può essere parziale)
+    term_starts = np.arange(0, months, 12)
+    term_lengths = np.minimum(months - term_starts, 12)
+    locked_index = np.repeat(np.arange(len(term_starts)), term_lengths)
+
+    for start in range(0, paths, chunk_size):
+        n = min(chunk_size, paths - start)
+        values = _simulate(rng, n, months, initial, growth)
+        for tool in tools:
+            cost = np.broadcast_to(_monthly_costs(tool, values, pages), (n, months))
+            locked = cost[:, term_starts]
+            upgrades = np.maximum(cost - locked[:, locked_index], 0)
+            discount = TIERS[tool].yearly_discount
+            totals[tool]["monthly"][start:start + n] = cost.sum(axis=1)
+            totals[tool]["yearly"][start:start + n] = discount * (locked @ term_lengths) + upgrades.sum(axis=1)
+            if start < band_paths:
+                rows = slice(0, band_paths - start)
+                yearly = locked[rows][:, locked_index] * discount + upgrades[rows]
+                cumulative[tool]["monthly"].append(np.cumsum(cost[rows], axis=1))
+                cumulative[tool]["yearly"].append(np.cumsum(yearly, axis=1))
+
+    result = {"percentiles": tuple(percentiles), "months": months, "paths": paths, "totals": {}, "bands": {}}
+    for tool in tools:
+        result["totals"][tool] = {
+            strategy: np.percentile(spend, percentiles) for strategy, spend in totals[tool].items()
+        }
+        result["bands"][tool] = {
+            strategy: np.percentile(np.concatenate(parts), percentiles, axis=0)
+            for strategy, parts in cumulative[tool].items()
+        }
+    return result
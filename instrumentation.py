@@ -0,0 +1,84 @@
+"""Tempi per sezione di un rerun dell'app, e profilo cProfile opzionale.
+
+Si attiva con la variabile d'ambiente PROFILE_RERUN o con il parametro ?profile= nell'URL:
+
+- "1" o "timing": tempo di ogni sezione di main(), pannello nella sidebar e una riga
+  JSON per rerun (su stderr, o in append nel file PROFILE_LOG);
+- "cprofile": in più, profilo cProfile del rerun, salvato in PROFILE_DIR (default: la
+  cartella temporanea) e riassunto nel pannello.
+
+Le sezioni sono "giri" (lap): ogni chiamata a lap(nome) attribuisce a quel nome il
+tempo trascorso dalla chiamata precedente, senza dover reindentare il codice. Da
+spenta, lap() è un solo controllo di un attributo.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+MODES = {"1": "timing", "timing": "timing", "cprofile": "cprofile"}
+
+
+class RerunTimer:
+    """Cronometro a giri per un singolo rerun"""
+
+    def __init__(self, mode=None, clock=time.perf_counter):
+        self.mode = MODES.get(mode) if mode else None
+        self.enabled = self.mode is not None
+        self.sections = []
+        self.profile_path = None
+        self.profile_summary = None
+        self._clock = clock
+        self._profiler = None
+        if self.enabled:
+            if self.mode == "cprofile":
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+            self._start = self._last = clock()
+
+    def lap(self, name):
+        """Chiude la sezione corrente: il tempo dall'ultimo lap va a `name`"""
+        if self.enabled:
+            now = self._clock()
+            self.sections.append((name, now - self._last))
+            self._last = now
+
+    def total(self):
+        return self._last - self._start if self.enabled else 0.0
+
+    def finish(self, **context):
+        """Ferma il profilo e scrive la riga JSON; restituisce il record, o None se spento"""
+        if not self.enabled:
+            return None
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._save_profile()
+        record = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "total_ms": round(self.total() * 1000, 3),
+            "sections": {name: round(seconds * 1000, 3) for name, seconds in self.sections},
+            **context,
+        }
+        if self.profile_path:
+            record["profile"] = self.profile_path
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        log_path = os.environ.get("PROFILE_LOG")
+        if log_path:
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+        else:
+            sys.stderr.write(line)
+        return record
+
+    def _save_profile(self, limit=25):
+        directory = os.environ.get("PROFILE_DIR", tempfile.gettempdir())
+        self.profile_path = os.path.join(directory, f"rerun-{datetime.now():%Y%m%d-%H%M%S-%f}.prof")
+        self._profiler.dump_stats(self.profile_path)
+        buffer = io.StringIO()
+        pstats.Stats(self._profiler, stream=buffer).sort_stats("cumulative").print_stats(limit)
+        self.profile_summary = buffer.getvalue()
@@ -0,0 +1,185 @@
+"""Combinazione più economica di abbonamenti che copre un fabbisogno di monitoraggio.
+
+I prompts possono essere divisi tra più tool e più account dello stesso tool; ogni
+account copre l'intero perimetro (companies, domini, pagine) richiesto. I costi
+vengono normalizzati in un'unica valuta con EXCHANGE_RATES.
+
+La ricerca è un branch-and-bound sugli "account" possibili: piani con la loro
+capienza in prompts e blocchi di prompts extra (utilizzabili solo se esiste già un
+account base dello stesso tool). Gli account sono esplorati in ordine di costo per
+prompt e i rami vengono potati con il limite inferiore "prompts mancanti × miglior
+costo per prompt rimasto".
+"""
+import math
+
+from pricing import EXCHANGE_RATES, INPUTS, TIERS, quote, select_plan
+
+_EPS = 1e-9
+
+
+def _account_options(tool, table, prompts, companies, domains, pages):
+    """Account acquistabili per un tool: (capienza, costo, piano, indice account base)"""
+    last = len(table.plans) - 1
+    # Piano minimo imposto da companies/domini/pagine, indipendente dai prompts
+    min_plan = select_plan(table, (1, companies, domains, pages))
+    prompts_index = INPUTS.index("prompts")
+    limits = dict(table.limits).get(prompts_index)
+    overage = {index: rule for index, *rule in table.overage}.get(prompts_index)
+
+    def cost(k):
+        return quote(tool, k, companies, domains, pages)[1]
+
+    options = []
+    for plan_id in range(min_plan, last):
+        if limits is None:
+            # I prompts non fanno cambiare piano: un solo account li copre tutti
+            return [(prompts, cost(prompts), table.plans[plan_id], None)]
+        options.append((limits[plan_id], cost(limits[plan_id]), table.plans[plan_id], None))
+
+    if overage:
+        included, block, block_price = overage
+        # Con l'arrotondamento per difetto dei blocchi, fino a included + block - 1 prompts
+        # costano come il piano base
+        cap = included + block - 1
+        options.append((cap, cost(cap), table.plans[last], None))
+        options.append((block, block_price, table.plans[last], len(options) - 1))
+    else:
+        # Senza sovrapprezzo l'ultimo piano copre tutti i prompts a prezzo fisso, come in quote
+        cap = max(prompts, 1, limits[last] if limits else 1)
+        options.append((cap, cost(cap), table.plans[last], None))
+    return options
+
+
+def _search(items, need):
+    """Branch-and-bound: conteggi ottimi per ogni item, o None se nessuna copertura"""
+    n = len(items)
+    ratios = [cost / cap for cap, cost, _ in items]
+    suffix_ratio = [math.inf] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        suffix_ratio[i] = min(ratios[i], suffix_ratio[i + 1])
+
+    counts = [0] * n
+    best = {"cost": math.inf, "counts": None}
+    seen = {}
+
+    def visit(i, need, cost):
+        if need <= 0:
+            if cost < best["cost"] - _EPS:
+                best["cost"], best["counts"] = cost, counts.copy()
+            return
+        if i == n or cost + need * suffix_ratio[i] >= best["cost"] - _EPS:
+            return
+
+        cap, item_cost, base = items[i]
+        usable = base is None or counts[base] > 0
+        key = (i, need, usable)
+        if seen.get(key, math.inf) <= cost:
+            return
+        seen[key] = cost
+
+        # Dal numero massimo utile a zero: la prima discesa è la soluzione greedy
+        monotone = ratios[i] <= suffix_ratio[i + 1]
+        for k in range(math.ceil(need / cap) if usable else 0, -1, -1):
+            rest = need - k * cap
+            spent = cost + k * item_cost
+            if rest > 0 and spent + rest * suffix_ratio[i + 1] >= best["cost"] - _EPS:
+                # Con item ordinati per costo unitario, meno copie non possono che peggiorare
+                if monotone:
+                    break
+                continue
+            counts[i] = k
+            visit(i + 1, rest, spent)
+        counts[i] = 0
+
+    visit(0, need, 0.0)
+    return best["counts"]
+
+
+def cheapest_coverage(prompts, companies=1, domains=1, pages=1000, currencies=None,
+                      billing_cycle="monthly", rates=EXCHANGE_RATES, currency="$", tools=None):
+    """Trova la combinazione di abbonamenti più economica che copre il fabbisogno.
+
+    currencies: {tool: valuta}, tipicamente {t: TOOLS_DATA[t]["currency"]}; i costi
+    sono confrontati in `currency` usando `rates`. Restituisce un dict con il costo
+    mensile e annuale totale nella valuta comune e la lista degli abbonamenti: per
+    ognuno tool, piano, numero di account, prompts e costi per account (valuta del tool).
+    """
+    tools = list(TIERS if tools is None else tools)
+    currencies = currencies or {}
+
+    # Item indipendenti dalla valuta; il riferimento al base è riportato all'indice globale
+    items, owners = [], []
+    for tool in tools:
+        rate = rates[currencies.get(tool, currency)] / rates[currency]
+        offset = len(items)
+        for cap, cost, _, base in _account_options(tool, TIERS[tool], prompts, companies, domains, pages):
+            items.append((cap, cost * rate, None if base is None else offset + base))
+            owners.append(tool)
+
+    # Ordine per costo unitario, ma ogni blocco extra subito dopo il suo account base
+    order = sorted((i for i, item in enumerate(items) if item[2] is None), key=lambda i: items[i][1] / items[i][0])
+    for i, item in enumerate(items):
+        if item[2] is not None:
+            order.insert(order.index(item[2]) + 1, i)
+    position = {old: new for new, old in enumerate(order)}
+    ordered = [
+        (items[i][0], items[i][1], None if items[i][2] is None else position[items[i][2]])
+        for i in order
+    ]
+
+    counts = _search(ordered, max(int(prompts), 1))
+    if counts is None:
+        return None
+    return _subscriptions(
+        [(order[i], k) for i, k in enumerate(counts) if k],
+        items, owners, prompts, companies, domains, pages, currencies, billing_cycle, rates, currency,
+    )
+
+
+def _subscriptions(chosen, items, owners, prompts, companies, domains, pages, currencies,
+                   billing_cycle, rates, currency):
+    # I blocchi extra si sommano a un solo account base dello stesso tool
+    blocks = {items[i][2]: items[i][0] * k for i, k in chosen if items[i][2] is not None}
+    accounts = []
+    for i, k in chosen:
+        if items[i][2] is not None:
+            continue
+        extra = blocks.get(i, 0)
+        accounts.extend([(i, items[i][0] + extra)] + [(i, items[i][0])] * (k - 1))
+
+    # Distribuisce i prompts sugli account e li riprezza con le regole reali
+    remaining = prompts
+    quotes = {}
+    subscriptions, total_monthly, total_yearly = [], 0.0, 0.0
+    for i, cap in accounts:
+        assigned = min(cap, remaining)
+        remaining -= assigned
+        tool = owners[i]
+        if (tool, assigned) not in quotes:
+            quotes[tool, assigned] = quote(tool, max(assigned, 1), companies, domains, pages, billing_cycle)
+        plan, monthly_cost, yearly_cost = quotes[tool, assigned]
+        tool_currency = currencies.get(tool, currency)
+        rate = rates[tool_currency] / rates[currency]
+        line = {
+            "tool": tool,
+            "plan": plan,
+            "accounts": 1,
+            "prompts": assigned,
+            "monthly_cost": monthly_cost,
+            "yearly_cost": float(yearly_cost),
+            "currency": tool_currency,
+        }
+        previous = subscriptions[-1] if subscriptions else None
+        if previous and all(previous[k] == line[k] for k in ("tool", "plan", "prompts", "monthly_cost")):
+            previous["accounts"] += 1
+        else:
+            subscriptions.append(line)
+        total_monthly += monthly_cost * rate
+        total_yearly += float(yearly_cost) * rate
+
+    return {
+        "monthly_cost": total_monthly,
+        "yearly_cost": total_yearly,
+        "currency": currency,
+        "subscriptions": subscriptions,
+    }
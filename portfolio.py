@@ -0,0 +1,198 @@
+"""Portafoglio di un'agenzia: configurazioni di molti clienti e totali aggiornati a delta.
+
+Ogni cliente ha il suo tool e i suoi input; il portafoglio lo prezza con le stesse
+regole di calculate_cost_* (pricing.quote, via la tabella precalcolata se presente) e
+tiene i totali per tool, piano, valuta e ciclo di fatturazione. Quando un cliente
+cambia si toglie il suo vecchio contributo e si aggiunge il nuovo: il costo di un
+aggiornamento non dipende dal numero di clienti.
+
+Se un ricaricamento a caldo del catalogo toglie un tool, i suoi clienti restano nel
+portafoglio ma non entrano in totali e volumi (non ci sono più sconto e limiti con cui
+valutarli): orphans() li elenca, per rimuoverli o riprezzarli su un altro tool.
+
+Con prezzi interi i totali mensili sono somme di interi, quindi restano esatti dopo
+qualsiasi sequenza di aggiornamenti; il costo annuale si ricava per gruppo al momento
+della lettura.
+"""
+import numpy as np
+
+from pricing import EXCHANGE_RATES, TIERS, TOOLS_DATA
+from quote_table import price_tool, quote
+from usage import RUNS_PER_MONTH, usage_tool
+
+GROUP_FIELDS = ("tool", "plan", "currency", "billing_cycle")
+CONFIG_FIELDS = (
+    "tool", "prompts", "companies", "domains", "pages", "competitors", "platforms", "frequency", "billing_cycle",
+)
+DEFAULTS = {
+    "prompts": 1, "companies": 1, "domains": 1, "pages": 1000, "competitors": 0, "platforms": 3,
+    "frequency": "Settimanale", "billing_cycle": "monthly",
+}
+
+
+class Portfolio:
+    """Clienti indicizzati per id, con totali per gruppo mantenuti a delta"""
+
+    __slots__ = ("_clients", "_groups")
+
+    def __init__(self):
+        self._clients = {}  # id -> (config, gruppo, prompts, costo mensile)
+        self._groups = {}   # (tool, piano, valuta, ciclo) -> [clienti, prompts, costo mensile]
+
+    def __len__(self):
+        return len(self._clients)
+
+    def __contains__(self, client_id):
+        return client_id in self._clients
+
+    def _apply(self, entry, sign):
+        _, key, prompts, monthly_cost = entry
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = [0, 0, 0]
+        group[0] += sign
+        group[1] += sign * prompts
+        group[2] += sign * monthly_cost
+        if not group[0]:
+            del self._groups[key]
+
+    def _entry(self, config, plan, monthly_cost):
+        key = (config["tool"], plan, TOOLS_DATA[config["tool"]]["currency"], config["billing_cycle"])
+        return config, key, config["prompts"], monthly_cost
+
+    def _config(self, tool, values):
+        if tool not in TIERS:
+            raise ValueError(f"tool sconosciuto {tool!r}")
+        config = dict(DEFAULTS, tool=tool)
+        for name, value in values.items():
+            if name not in DEFAULTS:
+                raise ValueError(f"campo sconosciuto {name!r}")
+            config[name] = value
+        if config["frequency"] not in RUNS_PER_MONTH:
+            raise ValueError(f"frequenza sconosciuta {config['frequency']!r}")
+        return config
+
+    def upsert(self, client_id, tool, **values):
+        """Aggiunge o aggiorna un cliente e applica la differenza ai totali"""
+        config = self._config(tool, values)
+        plan, monthly_cost, _ = quote(
+            tool, config["prompts"], config["companies"], config["domains"], config["pages"]
+        )
+        entry = self._entry(config, plan, monthly_cost)
+        previous = self._clients.get(client_id)
+        if previous is not None:
+            self._apply(previous, -1)
+        self._clients[client_id] = entry
+        self._apply(entry, 1)
+        return plan, monthly_cost
+
+    def remove(self, client_id):
+        """Rimuove un cliente e il suo contributo ai totali"""
+        self._apply(self._clients.pop(client_id), -1)
+
+    def load(self, clients):
+        """Carica molti clienti insieme: iterabile di (id, config), prezzati per tool in blocco"""
+        by_tool = {}
+        for client_id, config in clients:
+            config = dict(config)
+            config = self._config(config.pop("tool"), config)
+            by_tool.setdefault(config["tool"], []).append((client_id, config))
+
+        for tool, rows in by_tool.items():
+            columns = {
+                name: np.fromiter((config[name] for _, config in rows), dtype=np.int64, count=len(rows))
+                for name in ("prompts", "companies", "domains", "pages")
+            }
+            plan_id, monthly_cost, _ = price_tool(tool, **columns)
+            plans = TIERS[tool].plans
+            for (client_id, config), plan, cost in zip(rows, plan_id.tolist(), monthly_cost.tolist()):
+                entry = self._entry(config, plans[plan], cost)
+                previous = self._clients.get(client_id)
+                if previous is not None:
+                    self._apply(previous, -1)
+                self._clients[client_id] = entry
+                self._apply(entry, 1)
+
+    def client(self, client_id):
+        """Configurazione, piano e costo mensile di un cliente"""
+        config, key, _, monthly_cost = self._clients[client_id]
+        return dict(config, plan=key[1], monthly_cost=monthly_cost)
+
+    def clients(self):
+        """Tutti i clienti come (id, config), ad es. per salvarli o ricaricarli"""
+        return [(client_id, dict(entry[0])) for client_id, entry in self._clients.items()]
+
+    def orphans(self):
+        """Id dei clienti il cui tool non è più nel catalogo"""
+        return [client_id for client_id, entry in self._clients.items() if entry[0]["tool"] not in TIERS]
+
+    def usage(self):
+        """Volumi di query di tutti i clienti e piano che li regge (vedi usage.py).
+
+        I clienti sono valutati per tool in blocco. Restituisce una lista di dict con
+        client, tool, quoted_plan (il piano prezzato), executions, plan (None se nessun
+        piano regge il carico), monthly_cost, cost_per_query e currency. I clienti di
+        tool non più nel catalogo sono esclusi (vedi orphans).
+        """
+        by_tool = {}
+        for client_id, (config, key, _, _) in self._clients.items():
+            if config["tool"] not in TIERS:
+                continue
+            by_tool.setdefault(config["tool"], []).append((client_id, config, key[1]))
+
+        rows = []
+        for tool, clients in by_tool.items():
+            columns = {
+                name: np.fromiter((config[name] for _, config, _ in clients), dtype=np.int64, count=len(clients))
+                for name in ("prompts", "companies", "domains", "pages", "platforms", "competitors")
+            }
+            usage = usage_tool(
+                tool,
+                frequency=[config["frequency"] for _, config, _ in clients],
+                billing_cycle=[config["billing_cycle"] for _, config, _ in clients],
+                **columns
+            )
+            plans = TIERS[tool].plans
+            currency = TOOLS_DATA[tool]["currency"]
+            for (client_id, _, quoted_plan), executions, plan, monthly_cost, cost_per_query in zip(
+                clients, usage.executions.tolist(), usage.plan_id.tolist(), usage.monthly_cost.tolist(),
+                usage.cost_per_query.tolist()
+            ):
+                rows.append({
+                    "client": client_id, "tool": tool, "quoted_plan": quoted_plan, "executions": executions,
+                    "plan": plans[plan] if plan >= 0 else None, "monthly_cost": monthly_cost,
+                    "cost_per_query": cost_per_query, "currency": currency,
+                })
+        return rows
+
+    def totals(self, by=GROUP_FIELDS, currency=None, rates=EXCHANGE_RATES):
+        """Totali raggruppati per i campi `by` (sottoinsieme di GROUP_FIELDS).
+
+        Con currency i costi vengono convertiti in quella valuta; altrimenti "currency"
+        deve essere tra i campi di raggruppamento, per non sommare valute diverse.
+        Restituisce una lista di dict con i campi di `by`, clients, prompts,
+        monthly_cost e yearly_cost (costo di un anno con il ciclo di fatturazione scelto).
+        I clienti di tool non più nel catalogo sono esclusi (vedi orphans).
+        """
+        positions = [GROUP_FIELDS.index(field) for field in by]
+        if currency is None and "currency" not in by:
+            raise ValueError("specifica currency o raggruppa per valuta")
+
+        rollup = {}
+        for key, (clients, prompts, monthly_cost) in self._groups.items():
+            tool, _, tool_currency, billing_cycle = key
+            if tool not in TIERS:
+                continue
+            yearly_discount = TIERS[tool].yearly_discount if billing_cycle == "yearly" else 1
+            yearly_cost = monthly_cost * 12 * yearly_discount
+            rate = 1.0 if currency is None else rates[tool_currency] / rates[currency]
+            row = rollup.setdefault(tuple(key[i] for i in positions), [0, 0, 0, 0])
+            row[0] += clients
+            row[1] += prompts
+            row[2] += monthly_cost * rate
+            row[3] += yearly_cost * rate
+
+        return [
+            dict(zip(by, group), clients=clients, prompts=prompts, monthly_cost=monthly_cost, yearly_cost=yearly_cost)
+            for group, (clients, prompts, monthly_cost, yearly_cost) in sorted(rollup.items())
+        ]
@@ -0,0 +1,118 @@
+"""Catalogo dei tool e regole di pricing, senza dipendenze da Streamlit.
+
+I tool e le regole sono nel catalogo esterno (catalog.json, vedi catalog.py), compilato
+all'avvio in tabelle a soglie ordinate (TIERS): la scelta del piano è una ricerca binaria.
+
+Blocco "pricing" di ogni tool:
+- "limits": input -> chiave del limite incluso in ogni piano. I piani sono in ordine
+  crescente: si sceglie il primo che contiene tutti gli input, altrimenti l'ultimo.
+- "overage": input -> blocco e prezzo per blocco oltre il limite dell'ultimo piano
+  (blocchi interi, arrotondati per difetto).
+  Un input senza overage non ha tetto: oltre il limite dell'ultimo piano resta il
+  suo prezzo fisso. Confronto, ottimizzatore (optimizer.py) e budget (budget.py)
+  seguono la stessa regola.
+- "yearly_discount": moltiplicatore applicato al costo annuale con fatturazione annuale.
+
+Il modulo usa solo la libreria standard: job batch ed endpoint possono calcolare un
+preventivo (quote o calculate_cost_*) senza importare Streamlit, pandas o NumPy.
+"""
+import threading
+from bisect import bisect_left
+
+# TierTable e le funzioni di compilazione restano importabili anche da qui
+from catalog import (
+    DEFAULT_PATH,
+    INPUTS,
+    CatalogWatcher,
+    TierTable,
+    catalog_version,
+    compile_catalog,
+    compile_tool,
+)
+
+# Cambi indicativi verso il dollaro, per confrontare tool con valute diverse
+EXCHANGE_RATES = {"$": 1.0, "€": 1.08}
+
+_watcher = CatalogWatcher(DEFAULT_PATH)
+CATALOG = _watcher.current()
+
+# Dati dei tool e tabelle compilate del catalogo corrente. Sono aggiornati sul posto a
+# ogni ricarica, così anche i moduli che li importano per nome vedono il nuovo catalogo.
+TOOLS_DATA = dict(CATALOG.tools)
+TIERS = dict(CATALOG.tiers)
+CATALOG_VERSION = CATALOG.version
+
+_swap_lock = threading.Lock()
+
+
+def current_catalog():
+    """Catalogo corrente, ricaricato se il file è cambiato (al massimo un controllo al secondo).
+
+    Va chiamata dai processi di lunga durata (app, servizio HTTP) all'inizio di ogni
+    richiesta; TOOLS_DATA, TIERS e CATALOG_VERSION vengono aggiornati di conseguenza.
+    """
+    global CATALOG, CATALOG_VERSION
+    catalog = _watcher.current()
+    if catalog is not CATALOG:
+        with _swap_lock:
+            if catalog is not CATALOG:
+                # Prima aggiunge e sostituisce, poi toglie i tool rimossi: un preventivo
+                # concorrente non trova mai il dizionario vuoto
+                TOOLS_DATA.update(catalog.tools)
+                TIERS.update(catalog.tiers)
+                for tool in set(TIERS) - set(catalog.tiers):
+                    del TIERS[tool], TOOLS_DATA[tool]
+                CATALOG, CATALOG_VERSION = catalog, catalog.version
+    return CATALOG
+
+
+def select_plan(table, values):
+    """Indice del primo piano che contiene tutti gli input (o dell'ultimo).
+
+    values è la tupla (prompts, companies, domains, pages).
+    """
+    last = len(table.plans) - 1
+    plan_id = 0
+    for index, limits in table.limits:
+        found = bisect_left(limits, values[index], 0, last)
+        if found > plan_id:
+            plan_id = found
+    return plan_id
+
+
+def quote(tool, prompts=1, companies=1, domains=1, pages=1000, billing_cycle="monthly"):
+    """Calcola piano, costo mensile e costo annuale di un tool"""
+    table = TIERS[tool]
+    values = (prompts, companies, domains, pages)
+    plan_id = select_plan(table, values) if table.limits else 0
+
+    monthly_cost = table.prices[plan_id]
+    if plan_id == len(table.plans) - 1:
+        for index, included, block, price in table.overage:
+            if values[index] > included:
+                monthly_cost += ((values[index] - included) // block) * price
+
+    yearly_discount = table.yearly_discount if billing_cycle == "yearly" else 1
+    yearly_cost = monthly_cost * 12 * yearly_discount
+
+    return table.plans[plan_id], monthly_cost, yearly_cost
+
+
+def calculate_cost_otterly(num_prompts, billing_cycle="monthly"):
+    """Calcola il costo per Otterly.ai"""
+    return quote("Otterly.ai", prompts=num_prompts, billing_cycle=billing_cycle)
+
+
+def calculate_cost_profound(num_prompts, num_companies=1, billing_cycle="monthly"):
+    """Calcola il costo per Profound"""
+    return quote("Profound", prompts=num_prompts, companies=num_companies, billing_cycle=billing_cycle)
+
+
+def calculate_cost_ubersuggest(ai_prompts, domains=1, billing_cycle="monthly"):
+    """Calcola il costo per Ubersuggest"""
+    return quote("Ubersuggest", prompts=ai_prompts, domains=domains, billing_cycle=billing_cycle)
+
+
+def calculate_cost_conductor(prompts, pages=1000, billing_cycle="monthly"):
+    """Calcola il costo per Conductor"""
+    return quote("Conductor", prompts=prompts, pages=pages, billing_cycle=billing_cycle)
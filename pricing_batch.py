@@ -0,0 +1,116 @@
+"""Motore di pricing vettoriale: prezza molti scenari in un solo passaggio NumPy.
+
+Usa le stesse tabelle compilate di pricing.quote (e quindi di calculate_cost_* in
+app.py), ma lavora su array (o su un DataFrame) invece che su un singolo scenario.
+"""
+import numpy as np
+
+from pricing import TIERS
+
+
+def _as_int(values):
+    return np.asarray(values, dtype=np.int64)
+
+
+def _is_yearly(billing_cycle):
+    return np.asarray(billing_cycle) == "yearly"
+
+
+def _prepare(prompts, companies, domains, pages, billing_cycle):
+    # Stesso ordine di pricing.INPUTS, a cui fanno riferimento gli indici delle tabelle
+    values = (_as_int(prompts), _as_int(companies), _as_int(domains), _as_int(pages))
+    yearly = _is_yearly(billing_cycle)
+    shape = np.broadcast_shapes(yearly.shape, *(v.shape for v in values))
+    return values, yearly, shape
+
+
+def cost_dtype(table):
+    """int64 se tutti i prezzi del tool sono interi, altrimenti float64 (come pricing.quote)"""
+    prices = table.prices + tuple(price for *_, price in table.overage)
+    return np.int64 if all(isinstance(price, int) for price in prices) else np.float64
+
+
+def _monthly(table, values, shape):
+    last = len(table.plans) - 1
+
+    # Piano: per ogni input, il primo piano (escluso l'ultimo) che lo contiene;
+    # il piano scelto è il massimo tra gli input.
+    plan_id = np.zeros(shape, dtype=np.int8)
+    for index, limits in table.limits:
+        if last:
+            idx = np.searchsorted(np.asarray(limits[:last]), values[index], side="left")
+            np.maximum(plan_id, idx, out=plan_id, casting="unsafe")
+
+    dtype = cost_dtype(table)
+    prices = np.asarray(table.prices, dtype=dtype)
+    monthly_cost = prices[plan_id] if last else np.full(shape, prices[0])
+
+    # Sovrapprezzi: max(eccedenza, 0) // blocco * prezzo, solo sull'ultimo piano. Sommati
+    # uno alla volta come in pricing.quote, per risultati identici anche con prezzi decimali
+    for index, included, block, block_price in table.overage:
+        extra = np.maximum(values[index] - included, 0)
+        if block != 1:
+            extra //= block
+        extra = extra.astype(dtype, copy=False)
+        extra *= block_price
+        if last:
+            # Non in place: extra può avere meno dimensioni di plan_id (broadcast)
+            extra = extra * (plan_id == last)
+        monthly_cost += extra
+    return plan_id, monthly_cost
+
+
+def _price(table, values, yearly, shape):
+    plan_id, monthly_cost = _monthly(table, values, shape)
+    # Stesso ordine delle operazioni dello scalare, per risultati identici al bit
+    yearly_cost = monthly_cost * 12 * np.where(yearly, table.yearly_discount, 1.0)
+    return plan_id, monthly_cost, yearly_cost
+
+
+def monthly_cost(tool, prompts, companies=1, domains=1, pages=1000):
+    """Solo piano e costo mensile, per chi non ha bisogno del costo annuale"""
+    values, _, shape = _prepare(prompts, companies, domains, pages, "monthly")
+    return _monthly(TIERS[tool], values, shape)
+
+
+def price_tool(tool, prompts, companies=1, domains=1, pages=1000, billing_cycle="monthly"):
+    """Prezza un tool su array di scenari.
+
+    Restituisce (plan_id, monthly_cost, yearly_cost): plan_id indicizza TIERS[tool].plans.
+    Gli input scalari vengono estesi (broadcast) alla lunghezza degli array; per
+    Ubersuggest "prompts" sono gli AI prompts.
+    """
+    return _price(TIERS[tool], *_prepare(prompts, companies, domains, pages, billing_cycle))
+
+
+def price_all(prompts, companies=1, domains=1, pages=1000, billing_cycle="monthly", tools=None):
+    """Prezza gli stessi scenari su tutti i tool: {tool: (plan_id, monthly_cost, yearly_cost)}"""
+    prepared = _prepare(prompts, companies, domains, pages, billing_cycle)
+    tools = TIERS if tools is None else tools
+    return {tool: _price(TIERS[tool], *prepared) for tool in tools}
+
+
+def plan_labels(tool, plan_id):
+    """Converte gli indici di piano nei nomi dei piani"""
+    return np.asarray(TIERS[tool].plans, dtype=object)[plan_id]
+
+
+def price_frame(df, tools=None):
+    """Prezza un DataFrame con colonne prompts/companies/domains/pages/billing_cycle.
+
+    Le colonne mancanti assumono i default di calculate_cost_*; il risultato ha, per
+    ogni tool, le colonne "<tool> plan", "<tool> monthly", "<tool> yearly".
+    """
+    import pandas as pd
+
+    defaults = {"prompts": 1, "companies": 1, "domains": 1, "pages": 1000, "billing_cycle": "monthly"}
+    columns = {
+        name: df[name].to_numpy() if name in df else default
+        for name, default in defaults.items()
+    }
+    out = {}
+    for tool, (plan_id, monthly_cost, yearly_cost) in price_all(tools=tools, **columns).items():
+        out[f"{tool} plan"] = pd.Categorical.from_codes(plan_id, TIERS[tool].plans)
+        out[f"{tool} monthly"] = np.broadcast_to(monthly_cost, len(df))
+        out[f"{tool} yearly"] = np.broadcast_to(yearly_cost, len(df))
+    return pd.DataFrame(out, index=df.index)
@@ -0,0 +1,72 @@
+"""Cache dei preventivi condivisa tra tutte le sessioni di un processo.
+
+Dimensione massima con eviction LRU, scadenza opzionale (TTL) e invalidazione
+completa quando cambia la versione del catalogo prezzi. I contatori di hit, miss,
+eviction, scadenze e invalidazioni sono esposti da stats().
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class QuoteCache:
+    """Memoizzazione LRU/TTL thread-safe, pensata per essere condivisa tra sessioni"""
+
+    def __init__(self, maxsize=1024, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self._counters = dict.fromkeys(("hits", "misses", "evictions", "expirations", "invalidations"), 0)
+
+    def get_or_compute(self, key, compute, version=None):
+        """Restituisce il valore in cache per key, calcolandolo con compute() se assente.
+
+        Se version è diversa da quella con cui la cache è stata riempita, la cache
+        viene svuotata. Il calcolo avviene fuori dal lock: due sessioni con la stessa
+        chiave possono calcolarla entrambe, ma nessuna resta bloccata sull'altra.
+        """
+        now = self._clock()
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self._counters["invalidations"] += 1
+                    self._entries.clear()
+                self._version = version
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return value
+                del self._entries[key]
+                self._counters["expirations"] += 1
+            self._counters["misses"] += 1
+
+        value = compute()
+
+        with self._lock:
+            if version == self._version:
+                expires = None if self.ttl is None else now + self.ttl
+                self._entries[key] = (value, expires)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._counters["evictions"] += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Contatori, dimensione corrente e hit rate"""
+        with self._lock:
+            stats = dict(self._counters, size=len(self._entries), maxsize=self.maxsize)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
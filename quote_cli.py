@@ -0,0 +1,207 @@
+"""Preventivi in batch da riga di comando, senza Streamlit.
+
+Legge configurazioni cliente da CSV o JSONL e scrive i preventivi in streaming nello
+stesso formato, a blocchi di righe: la memoria resta costante qualunque sia la
+dimensione del file.
+
+    python quote_cli.py clienti.csv -o preventivi.csv
+    python quote_cli.py export.jsonl --workers 4 > preventivi.jsonl
+    cat export.csv | python quote_cli.py - --format csv
+
+Campi in ingresso: tool, prompts, companies, domains, pages, competitors, platforms,
+billing_cycle, frequency (per Ubersuggest "prompts" sono gli AI prompts). A ogni riga
+vengono aggiunti plan, monthly_cost, yearly_cost, currency e catalog_version. Se esiste la tabella
+precalcolata (vedi quote_table.py) le righe nel suo dominio vengono lette da lì.
+
+Una riga non valida (tool sconosciuto, numero o billing_cycle errato) interrompe il batch
+con il numero di riga. Il file di output viene scritto in un .part e rinominato
+solo a fine batch, così un errore non lascia un file di output parziale.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from collections import deque
+from contextlib import ExitStack, contextmanager, suppress
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from pricing import TIERS, TOOLS_DATA, current_catalog
+from quote_table import price_tool
+
+FIELDS = ["tool", "prompts", "companies", "domains", "pages", "competitors", "platforms", "billing_cycle", "frequency"]
+QUOTE_FIELDS = ["plan", "monthly_cost", "yearly_cost", "currency", "catalog_version"]
+
+DEFAULTS = {"prompts": 1, "companies": 1, "domains": 1, "pages": 1000}
+BILLING_CYCLES = ("monthly", "yearly")
+
+
+def _int_field(row, name, line):
+    value = row.get(name)
+    if value is None or value == "":
+        return DEFAULTS[name]
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"riga {line}: valore non valido per '{name}': {value!r}") from None
+
+
+def _billing_cycle(row, line):
+    value = row.get("billing_cycle")
+    if value is None or value == "":
+        return "monthly"
+    if value not in BILLING_CYCLES:
+        raise ValueError(f"riga {line}: billing_cycle non valido {value!r} (ammessi: {', '.join(BILLING_CYCLES)})")
+    return value
+
+
+def quote_chunk(start, rows):
+    """Prezza un blocco di righe, raggruppando per tool per usare il motore vettoriale"""
+    by_tool = {}
+    for offset, row in enumerate(rows):
+        tool = row.get("tool")
+        if tool not in TIERS:
+            raise ValueError(f"riga {start + offset}: tool sconosciuto {tool!r}")
+        by_tool.setdefault(tool, []).append(offset)
+
+    for tool, offsets in by_tool.items():
+        columns = {
+            name: np.fromiter(
+                (_int_field(rows[i], name, start + i) for i in offsets), dtype=np.int64, count=len(offsets)
+            )
+            for name in DEFAULTS
+        }
+        cycles = [_billing_cycle(rows[i], start + i) for i in offsets]
+        plan_id, monthly_cost, yearly_cost = price_tool(tool, billing_cycle=cycles, **columns)
+        plans = TIERS[tool].plans
+        currency = TOOLS_DATA[tool]["currency"]
+        version = current_catalog().version
+        for i, plan, monthly, yearly in zip(offsets, plan_id.tolist(), monthly_cost.tolist(), yearly_cost.tolist()):
+            row = rows[i]
+            row["plan"] = plans[plan]
+            row["monthly_cost"] = monthly
+            row["yearly_cost"] = yearly
+            row["currency"] = currency
+            row["catalog_version"] = version
+    return rows
+
+
+def render_chunk(fmt, fieldnames, start, rows):
+    """Prezza un blocco e lo serializza; per JSONL rows sono le righe grezze del file.
+
+    Gira nei worker: parsing JSON, pricing e serializzazione non passano dal processo
+    principale, che si limita a leggere e scrivere testo.
+    """
+    if fmt == "jsonl":
+        rows = [json.loads(line) for line in rows]
+    rows = quote_chunk(start, rows)
+    if fmt == "jsonl":
+        return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+    buffer = io.StringIO()
+    csv.DictWriter(buffer, fieldnames=fieldnames, lineterminator="\n").writerows(rows)
+    return buffer.getvalue()
+
+
+def _chunks(records, size, first_line):
+    start = first_line
+    while True:
+        rows = list(islice(records, size))
+        if not rows:
+            return
+        yield start, rows
+        start += len(rows)
+
+
+def _rendered_chunks(fmt, fieldnames, chunks, workers):
+    if workers <= 1:
+        for start, rows in chunks:
+            yield len(rows), render_chunk(fmt, fieldnames, start, rows)
+        return
+
+    # Al massimo 2 blocchi in volo per worker: ordine e memoria restano sotto controllo
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for start, rows in chunks:
+            pending.append((len(rows), pool.submit(render_chunk, fmt, fieldnames, start, rows)))
+            if len(pending) >= workers * 2:
+                count, future = pending.popleft()
+                yield count, future.result()
+        while pending:
+            count, future = pending.popleft()
+            yield count, future.result()
+
+
+def _detect_format(path, fmt):
+    if fmt:
+        return fmt
+    if path.endswith(".jsonl") or path.endswith(".ndjson"):
+        return "jsonl"
+    if path.endswith(".csv"):
+        return "csv"
+    raise SystemExit("errore: impossibile dedurre il formato, usa --format csv|jsonl")
+
+
+@contextmanager
+def output_file(path, mode="w", **kwargs):
+    """File di output scritto come path.part e rinominato in path solo se il blocco termina senza errori"""
+    partial = f"{path}.part"
+    try:
+        with open(partial, mode, **kwargs) as sink:
+            yield sink
+        os.replace(partial, path)
+    finally:
+        with suppress(FileNotFoundError):
+            os.remove(partial)
+
+
+def run(source, sink, fmt, chunk_size=10_000, workers=1):
+    """Legge configurazioni da source e scrive i preventivi su sink; restituisce le righe scritte"""
+    if fmt == "csv":
+        # Il CSV resta letto qui: i campi quotati possono contenere a capo
+        reader = csv.DictReader(source)
+        fieldnames = list(reader.fieldnames or FIELDS)
+        fieldnames += [f for f in QUOTE_FIELDS if f not in fieldnames]
+        csv.DictWriter(sink, fieldnames=fieldnames, lineterminator="\n").writeheader()
+        records, first_line = reader, 2
+    else:
+        fieldnames = None
+        records, first_line = (line for line in source if line.strip()), 1
+
+    written = 0
+    for count, text in _rendered_chunks(fmt, fieldnames, _chunks(records, chunk_size, first_line), workers):
+        sink.write(text)
+        written += count
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Calcola preventivi in batch da CSV/JSONL",
+        epilog="Campi: " + ", ".join(FIELDS),
+    )
+    parser.add_argument("input", help="file CSV/JSONL di configurazioni, '-' per stdin")
+    parser.add_argument("-o", "--output", default="-", help="file di output (default: stdout)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="formato di input/output (default: dall'estensione)")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="righe per blocco (default: 10000)")
+    parser.add_argument("--workers", type=int, default=1, help="processi paralleli (default: 1, nessun pool)")
+    args = parser.parse_args(argv)
+
+    fmt = _detect_format(args.input if args.input != "-" else args.output, args.format)
+    try:
+        with ExitStack() as stack:
+            source = sys.stdin if args.input == "-" else stack.enter_context(
+                open(args.input, newline="", encoding="utf-8"))
+            sink = sys.stdout if args.output == "-" else stack.enter_context(
+                output_file(args.output, "w", newline="", encoding="utf-8"))
+            written = run(source, sink, fmt, args.chunk_size, args.workers)
+    except ValueError as exc:
+        raise SystemExit(f"errore: {exc}")
+    print(f"{written} preventivi scritti", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Servizio HTTP JSON dei preventivi, per i sistemi interni (CRM, generatore di proposte).
+
+    python quote_server.py --port 8600
+
+Endpoint:
+- POST /quote: uno scenario {"tool": ..., "prompts": ..., "billing_cycle": ...} -> preventivo;
+- POST /quotes: lista di scenari (o {"scenarios": [...]}) -> {"quotes": [...]}, prezzati
+  in blocco per tool con il motore vettoriale;
+- GET /health e GET /stats: versione del catalogo e contatori della cache.
+
+Campi di uno scenario: tool, prompts, companies, domains, pages, billing_cycle (come in
+quote_cli.py); ogni preventivo riporta lo scenario con plan, monthly_cost, yearly_cost,
+currency e catalog_version.
+
+Il server usa asyncio: una coroutine per connessione, connessioni HTTP/1.1 keep-alive.
+Le risposte dei POST sono memorizzate in un QuoteCache con chiave (percorso, corpo), che
+si svuota quando cambia la versione del catalogo: il file del catalogo viene ricontrollato
+a ogni richiesta (al massimo una volta al secondo) e ricaricato a caldo se è cambiato. Un preventivo costa pochi
+microsecondi, quindi il pricing gira direttamente nel loop, senza thread.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import traceback
+from http import HTTPStatus
+
+import numpy as np
+
+from pricing import INPUTS, TIERS, TOOLS_DATA, current_catalog
+from quote_cache import QuoteCache
+from quote_table import price_tool, quote
+
+DEFAULTS = {"prompts": 1, "companies": 1, "domains": 1, "pages": 1000}
+BILLING_CYCLES = ("monthly", "yearly")
+
+MAX_BATCH = 10_000
+MAX_BODY = 4 * 1024 * 1024
+CACHEABLE_BODY = 64 * 1024  # i batch più grandi non vanno in cache: occuperebbero troppa memoria
+KEEPALIVE_TIMEOUT = 15.0
+
+
+def _scenario(scenario):
+    """Valida uno scenario: restituisce tool, (prompts, companies, domains, pages) e ciclo"""
+    if not isinstance(scenario, dict):
+        raise ValueError("lo scenario deve essere un oggetto JSON")
+    tool = scenario.get("tool")
+    if not isinstance(tool, str) or tool not in TIERS:
+        raise ValueError(f"tool sconosciuto {tool!r}")
+    values = []
+    for name in INPUTS:
+        value = scenario.get(name)
+        if value is None:
+            value = DEFAULTS[name]
+        elif isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError(f"valore non valido per '{name}': {value!r}")
+        values.append(value)
+    billing_cycle = scenario.get("billing_cycle")
+    if billing_cycle is None:
+        billing_cycle = "monthly"
+    elif billing_cycle not in BILLING_CYCLES:
+        raise ValueError(f"billing_cycle non valido: {billing_cycle!r}")
+    return tool, tuple(values), billing_cycle
+
+
+def _quoted(scenario, tool, version, plan, monthly_cost, yearly_cost):
+    return dict(scenario, plan=plan, monthly_cost=monthly_cost, yearly_cost=yearly_cost,
+                currency=TOOLS_DATA[tool]["currency"], catalog_version=version)
+
+
+def quote_one(scenario):
+    """Preventivo di un singolo scenario"""
+    tool, values, billing_cycle = _scenario(scenario)
+    return _quoted(scenario, tool, current_catalog().version, *quote(tool, *values, billing_cycle))
+
+
+def quote_many(payload):
+    """Preventivi di una lista di scenari, nello stesso ordine"""
+    scenarios = payload.get("scenarios") if isinstance(payload, dict) else payload
+    if not isinstance(scenarios, list):
+        raise ValueError("attesa una lista di scenari")
+    if len(scenarios) > MAX_BATCH:
+        raise ValueError(f"al massimo {MAX_BATCH} scenari per richiesta")
+
+    by_tool = {}
+    for i, scenario in enumerate(scenarios):
+        try:
+            tool, values, billing_cycle = _scenario(scenario)
+        except ValueError as exc:
+            raise ValueError(f"scenario {i}: {exc}") from None
+        by_tool.setdefault(tool, []).append((i, values, billing_cycle))
+
+    version = current_catalog().version
+    quotes = [None] * len(scenarios)
+    for tool, rows in by_tool.items():
+        columns = np.array([values for _, values, _ in rows], dtype=np.int64).T
+        plan_id, monthly_cost, yearly_cost = price_tool(
+            tool, *columns, billing_cycle=[billing_cycle for _, _, billing_cycle in rows]
+        )
+        plans = TIERS[tool].plans
+        for (i, _, _), plan, monthly, yearly in zip(rows, plan_id.tolist(), monthly_cost.tolist(),
+                                                     yearly_cost.tolist()):
+            quotes[i] = _quoted(scenarios[i], tool, version, plans[plan], monthly, yearly)
+    return {"quotes": quotes, "catalog_version": version}
+
+
+ROUTES = {"/quote": quote_one, "/quotes": quote_many}
+
+
+def _json(payload):
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def dispatch(method, path, body, cache):
+    """Risponde a una richiesta: (status, corpo JSON)"""
+    # Ricarica il catalogo se il file è cambiato: la cache si svuota al cambio di versione
+    version = current_catalog().version
+    if path in ("/health", "/stats"):
+        if method != "GET":
+            return HTTPStatus.METHOD_NOT_ALLOWED, _json({"error": "usa GET"})
+        if path == "/health":
+            return HTTPStatus.OK, _json({"status": "ok", "catalog_version": version})
+        return HTTPStatus.OK, _json(cache.stats())
+
+    handler = ROUTES.get(path)
+    if handler is None:
+        return HTTPStatus.NOT_FOUND, _json({"error": f"percorso sconosciuto {path!r}"})
+    if method != "POST":
+        return HTTPStatus.METHOD_NOT_ALLOWED, _json({"error": "usa POST"})
+
+    def compute():
+        return _json(handler(json.loads(body)))
+
+    try:
+        # Solo le risposte riuscite finiscono in cache: un errore solleva prima di essere salvato
+        if len(body) > CACHEABLE_BODY:
+            return HTTPStatus.OK, compute()
+        return HTTPStatus.OK, cache.get_or_compute((path, body), compute, version=version)
+    except (ValueError, OverflowError) as exc:
+        return HTTPStatus.BAD_REQUEST, _json({"error": str(exc)})
+    except Exception:
+        # Un errore imprevisto risponde comunque al client, invece di chiudere la connessione
+        traceback.print_exc()
+        return HTTPStatus.INTERNAL_SERVER_ERROR, _json({"error": "errore interno"})
+
+
+def _response(status, body, keep_alive):
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def _parse_head(head):
+    """Riga di richiesta e header (nomi in minuscolo) di una richiesta HTTP/1.x"""
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, version = lines[0].split(" ")
+    if not version.startswith("HTTP/1."):
+        raise ValueError(f"versione non supportata {version!r}")
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    return method, target.partition("?")[0], version, headers
+
+
+async def handle_connection(reader, writer, cache):
+    """Serve le richieste di una connessione finché il client la tiene aperta"""
+    try:
+        while True:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                return
+            except asyncio.LimitOverrunError:
+                writer.write(_response(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, b"{}", False))
+                return
+            try:
+                method, path, version, headers = _parse_head(head)
+                length = int(headers.get("content-length", 0))
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                writer.write(_response(HTTPStatus.BAD_REQUEST, _json({"error": "richiesta non valida"}), False))
+                return
+            if "transfer-encoding" in headers:
+                writer.write(_response(HTTPStatus.LENGTH_REQUIRED, _json({"error": "serve Content-Length"}), False))
+                return
+            if length > MAX_BODY:
+                writer.write(_response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, _json({"error": "corpo troppo grande"}),
+                                       False))
+                return
+            body = await reader.readexactly(length) if length else b""
+
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+            status, payload = dispatch(method, path, body, cache)
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                return
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8600, cache=None, ready=None):
+    """Avvia il server e lo tiene attivo; ready (opzionale) riceve l'indirizzo effettivo"""
+    cache = cache if cache is not None else QuoteCache(maxsize=4096)
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(reader, writer, cache), host, port, limit=64 * 1024
+    )
+    address = server.sockets[0].getsockname()[:2]
+    print(f"preventivi su http://{address[0]}:{address[1]} (catalogo {current_catalog().version})",
+          file=sys.stderr, flush=True)
+    if ready is not None:
+        ready(address)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servizio HTTP JSON dei preventivi")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600, help="porta (default: 8600, 0 = libera)")
+    parser.add_argument("--cache-size", type=int, default=4096, help="risposte in cache (default: 4096)")
+    parser.add_argument("--cache-ttl", type=float, help="scadenza delle risposte in secondi (default: nessuna)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, QuoteCache(maxsize=args.cache_size, ttl=args.cache_ttl)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
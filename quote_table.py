@@ -0,0 +1,240 @@
+"""Tabella precalcolata dei preventivi, letta con memory-map.
+
+Gli input del form sono limitati (prompts ≤ 1000 o 5000, company ≤ 10, domini ≤ 20,
+pagine ≤ 10000): per ogni tool si precalcolano piano e costo mensile su tutta la
+griglia in un file binario compatto. Un preventivo diventa aritmetica sugli indici;
+il file è mappato in memoria, quindi condiviso tra processi tramite la page cache.
+Fuori dalla griglia, o se il file manca o non corrisponde al catalogo corrente (anche
+dopo una ricarica a caldo), si usano le funzioni di pricing dal vivo.
+
+    python quote_table.py                # scrive quote_table.bin accanto al modulo
+    python quote_table.py -o /tmp/q.bin
+
+Formato: intestazione JSON (versione del catalogo, assi e offset di ogni tool) seguita
+da array int8 (piano) e int32 (costo mensile; float64 per i tool con prezzi decimali).
+Il costo annuale non è memorizzato: si ricava dal mensile con la stessa formula di
+pricing.quote.
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import warnings
+
+import numpy as np
+
+import pricing
+import pricing_batch
+from pricing import INPUTS, TIERS, quote as live_quote
+from pricing_batch import cost_dtype, monthly_cost
+from tool_profiles import form_inputs, input_field
+
+MAGIC = b"GEOQT1\n"
+DEFAULT_PATH = os.environ.get("QUOTE_TABLE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "quote_table.bin"))
+
+# Passo della griglia per input: le pagine si contano a centinaia, come nel form
+GRID_STEPS = {"pages": 100}
+
+
+def grid_domains():
+    """Dominio di ogni tool del catalogo: input -> (minimo, massimo, passo), dai number_input del form"""
+    return {
+        tool: {
+            name: (input_field(tool, name).min_value, input_field(tool, name).max_value, GRID_STEPS.get(name, 1))
+            for name in form_inputs(tool)
+        }
+        for tool in TIERS
+    }
+
+
+def build(path=DEFAULT_PATH, domains=None):
+    """Precalcola tutte le griglie (default: grid_domains()) e le scrive in path; restituisce la dimensione in byte"""
+    domains = grid_domains() if domains is None else domains
+    header = {"catalog_version": pricing.CATALOG_VERSION, "tools": {}}
+    arrays = []
+    offset = 0
+    for tool, axes in domains.items():
+        table = TIERS[tool]
+        priced = {INPUTS[index] for index, _ in table.limits}
+        if not priced <= set(axes):
+            raise ValueError(f"{tool}: la griglia deve coprire tutti gli input prezzati {sorted(priced)}")
+
+        # Griglia completa per broadcast: un asse NumPy per ogni input
+        names = list(axes)
+        values = {}
+        for axis, name in enumerate(names):
+            lo, hi, step = axes[name]
+            shape = [1] * len(names)
+            shape[axis] = -1
+            values[name] = np.arange(lo, hi + 1, step, dtype=np.int64).reshape(shape)
+        plan_id, cost = monthly_cost(tool, **values)
+        dtype = np.dtype("<i4" if cost_dtype(table) is np.int64 else "<f8")
+        if dtype.kind == "i" and cost.max() > np.iinfo(np.int32).max:
+            raise ValueError(f"{tool}: costi troppo alti per int32")
+
+        size = plan_id.size
+        # Allineamento dell'array dei costi alla dimensione dei suoi elementi
+        padding = -(offset + size) % dtype.itemsize
+        cost_offset = offset + size + padding
+        header["tools"][tool] = {
+            "axes": [[name, *axes[name]] for name in names],
+            "plan_offset": offset,
+            "cost_offset": cost_offset,
+            "cost_dtype": dtype.str,
+            "size": size,
+        }
+        arrays += [plan_id.astype(np.int8).ravel(), np.zeros(padding, dtype=np.int8), cost.astype(dtype).ravel()]
+        offset = cost_offset + dtype.itemsize * size
+
+    encoded = json.dumps(header).encode()
+    prefix = MAGIC + struct.pack("<I", len(encoded)) + encoded
+    prefix += b"\0" * (-len(prefix) % 8)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(prefix)
+        for array in arrays:
+            f.write(array.tobytes())
+    os.replace(tmp, path)
+    return len(prefix) + offset
+
+
+class QuoteTable:
+    """Preventivi letti dalla tabella mappata in memoria, con ripiego sul pricing dal vivo"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path}: non è una tabella dei preventivi")
+            if sys.byteorder != "little":
+                raise ValueError(f"{path}: la tabella è little-endian")
+            (length,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(length))
+        self.catalog_version = header["catalog_version"]
+        if self.catalog_version != pricing.CATALOG_VERSION:
+            raise ValueError(
+                f"{path}: tabella per il catalogo {self.catalog_version}, "
+                f"catalogo corrente {pricing.CATALOG_VERSION}; rigenerala con python quote_table.py"
+            )
+
+        base = len(MAGIC) + 4 + length
+        base += -base % 8
+        data = np.memmap(path, dtype=np.uint8, mode="r", offset=base)
+        self._tools = {}
+        for tool, info in header["tools"].items():
+            size = info["size"]
+            dtype = np.dtype(info.get("cost_dtype", "<i4"))
+            plans = data[info["plan_offset"]:info["plan_offset"] + size].view(np.int8)
+            costs = data[info["cost_offset"]:info["cost_offset"] + dtype.itemsize * size].view(dtype)
+            # (indice input, minimo, massimo, passo, stride) per l'aritmetica degli indici
+            axes, stride = [], 1
+            for name, lo, hi, step in reversed(info["axes"]):
+                axes.append((INPUTS.index(name), lo, hi, step, stride))
+                stride *= (hi - lo) // step + 1
+            # Le memoryview restituiscono int Python senza passare da scalari NumPy
+            scalar = (memoryview(plans).cast("B").cast("b"), memoryview(costs).cast("B").cast(dtype.char))
+            self._tools[tool] = (plans, costs, tuple(reversed(axes)), scalar)
+
+    def quote(self, tool, prompts=1, companies=1, domains=1, pages=1000, billing_cycle="monthly"):
+        """Come pricing.quote: (piano, costo mensile, costo annuale)"""
+        entry = self._tools.get(tool)
+        if entry is not None:
+            values = (prompts, companies, domains, pages)
+            offset = 0
+            for index, lo, hi, step, stride in entry[2]:
+                value = values[index]
+                if value < lo or value > hi or (value - lo) % step:
+                    break
+                offset += (value - lo) // step * stride
+            else:
+                table = TIERS[tool]
+                plans, costs = entry[3]
+                monthly_cost = costs[offset]
+                yearly_discount = table.yearly_discount if billing_cycle == "yearly" else 1
+                return table.plans[plans[offset]], monthly_cost, monthly_cost * 12 * yearly_discount
+        return live_quote(tool, prompts, companies, domains, pages, billing_cycle)
+
+    def price_tool(self, tool, prompts, companies=1, domains=1, pages=1000, billing_cycle="monthly"):
+        """Come pricing_batch.price_tool, leggendo dalla tabella le righe nel dominio"""
+        entry = self._tools.get(tool)
+        if entry is None:
+            return pricing_batch.price_tool(tool, prompts, companies, domains, pages, billing_cycle)
+        values, yearly, shape = pricing_batch._prepare(prompts, companies, domains, pages, billing_cycle)
+        plans, costs, axes, _ = entry
+
+        inside = np.ones(shape, dtype=bool)
+        offset = np.zeros(shape, dtype=np.int64)
+        for index, lo, hi, step, stride in axes:
+            # Posizione sull'asse; come intero senza segno, i valori sotto lo diventano enormi
+            position = (values[index] - lo).astype(np.uint64)
+            if step != 1:
+                inside &= position % step == 0
+                position //= step
+            count = (hi - lo) // step
+            inside &= position <= count
+            np.minimum(position, count, out=position)
+            if stride != 1:
+                position *= stride
+            offset += position.astype(np.int64)
+        plan_id = plans[offset]
+        monthly = costs[offset].astype(np.int64 if costs.dtype.kind == "i" else np.float64)
+
+        if not inside.all():
+            # Righe fuori dominio: pricing vettoriale dal vivo solo su quelle
+            outside = ~inside
+            rows = [np.broadcast_to(v, shape)[outside] for v in values]
+            live_plan, live_monthly = monthly_cost(tool, *rows)
+            plan_id[outside] = live_plan
+            monthly[outside] = live_monthly
+
+        yearly_cost = monthly * 12 * np.where(yearly, TIERS[tool].yearly_discount, 1.0)
+        return plan_id, monthly, yearly_cost
+
+
+_table = None
+
+
+def load_table(path=DEFAULT_PATH):
+    """Tabella condivisa del processo, o None se il file manca, non è valido o è superato"""
+    global _table
+    if _table is None or _table[0] != path:
+        table = None
+        if os.path.exists(path):
+            try:
+                table = QuoteTable(path)
+            except (OSError, ValueError) as exc:
+                warnings.warn(f"tabella dei preventivi ignorata: {exc}")
+        _table = (path, table)
+    table = _table[1]
+    # Dopo una ricarica a caldo del catalogo la tabella è superata: si usa il pricing dal vivo
+    if table is not None and table.catalog_version != pricing.CATALOG_VERSION:
+        return None
+    return table
+
+
+def quote(tool, prompts=1, companies=1, domains=1, pages=1000, billing_cycle="monthly"):
+    """pricing.quote servito dalla tabella precalcolata, se disponibile"""
+    table = load_table()
+    if table is None:
+        return live_quote(tool, prompts, companies, domains, pages, billing_cycle)
+    return table.quote(tool, prompts, companies, domains, pages, billing_cycle)
+
+
+def price_tool(tool, prompts, companies=1, domains=1, pages=1000, billing_cycle="monthly"):
+    """pricing_batch.price_tool servito dalla tabella precalcolata, se disponibile"""
+    table = load_table()
+    if table is None:
+        return pricing_batch.price_tool(tool, prompts, companies, domains, pages, billing_cycle)
+    return table.price_tool(tool, prompts, companies, domains, pages, billing_cycle)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precalcola la tabella dei preventivi")
+    parser.add_argument("-o", "--output", default=DEFAULT_PATH, help=f"file di output (default: {DEFAULT_PATH})")
+    args = parser.parse_args(argv)
+    size = build(args.output)
+    print(f"{args.output}: {size / 1e6:.1f} MB, catalogo {pricing.CATALOG_VERSION}")
+
+
+if __name__ == "__main__":
+    main()
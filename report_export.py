@@ -0,0 +1,201 @@
+"""Export in blocco dei report dei preventivi: CSV, JSONL o ZIP di report TXT.
+
+    python report_export.py clienti.csv -o report.zip
+    python report_export.py clienti.jsonl -o report.csv
+    cat clienti.csv | python report_export.py - --format csv --to jsonl > report.jsonl
+
+Gli scenari in ingresso hanno i campi di quote_cli.py. Ogni report contiene lo scenario,
+il preventivo (plan, monthly_cost, yearly_cost, currency, catalog_version), main_metric e
+plan_features; nel ZIP ogni report è un file TXT nel formato scaricabile dall'app.
+Gli scenari vengono letti, prezzati e scritti a blocchi, quindi la memoria resta costante.
+Nel ZIP cresce solo l'indice dei file, circa mezzo KB per report.
+"""
+import argparse
+import csv
+import json
+import re
+import sys
+import zipfile
+from contextlib import ExitStack
+from datetime import datetime
+
+from pricing import TIERS, TOOLS_DATA
+from quote_cli import (DEFAULTS, FIELDS, QUOTE_FIELDS, _billing_cycle, _chunks, _detect_format, _int_field,
+                       output_file, quote_chunk)
+from tool_profiles import form_inputs, metric_label
+
+# Valori predefiniti del form dell'app per i campi che non cambiano il preventivo
+DEFAULT_COMPETITORS = 3
+DEFAULT_PLATFORMS = ("ChatGPT", "Perplexity", "Google AI Overviews")
+DEFAULT_FREQUENCY = "Settimanale"
+
+REPORT_FIELDS = QUOTE_FIELDS + ["main_metric", "plan_features", "report_date"]
+FEATURE_SEPARATOR = "; "
+OUTPUT_FORMATS = ("csv", "jsonl", "zip")
+
+
+def main_metric(tool, requirement):
+    """Descrizione degli input prezzati, come nel report (es. 200 prompts, 1 company)"""
+    names = form_inputs(tool) if tool in TIERS else ["prompts"]
+    return ", ".join(f"{requirement[name]} {metric_label(tool, name)}" for name in names)
+
+
+def report_text(selected_tool, results, billing_cycle, competitors, selected_platforms, frequency, date=None):
+    """Report TXT di una configurazione; date (testo) di default è l'ora corrente"""
+    currency = TOOLS_DATA[selected_tool]['currency']
+    date = date or datetime.now().strftime('%d/%m/%Y %H:%M')
+    features = "".join(f"- {feature}\n" for feature in results["plan_features"])
+    return f"""
+REPORT CALCOLO COSTI - AI BRAND MONITORING
+==========================================
+Tool selezionato: {selected_tool}
+Data: {date}
+
+CONFIGURAZIONE
+--------------
+{results['main_metric']}
+Competitor tracciati: {competitors}
+Piattaforme: {', '.join(selected_platforms)}
+Frequenza: {frequency}
+
+COSTI
+-----
+Piano consigliato: {results['plan']}
+Costo mensile: {currency}{results['monthly_cost']}
+Costo annuale: {currency}{results['yearly_cost']:.0f}
+Ciclo: {billing_cycle}
+Versione catalogo prezzi: {results['catalog_version']}
+
+CARATTERISTICHE PIANO
+---------------------
+{features}
+---
+Calcolatore by AI Brand Monitoring Calculator"""
+
+
+def _platforms(value):
+    if value is None or value == "":
+        return list(DEFAULT_PLATFORMS)
+    if isinstance(value, str):
+        return [platform.strip() for platform in re.split(r"[;,]", value) if platform.strip()]
+    return list(value)
+
+
+def report_record(scenario, line=None, date=None):
+    """Scenario già prezzato completato con i campi del report (modifica e restituisce scenario)"""
+    tool = scenario["tool"]
+    requirement = {name: _int_field(scenario, name, line) for name in DEFAULTS}
+    competitors = scenario.get("competitors")
+    scenario["competitors"] = DEFAULT_COMPETITORS if competitors in (None, "") else int(competitors)
+    scenario["platforms"] = _platforms(scenario.get("platforms"))
+    scenario["frequency"] = scenario.get("frequency") or DEFAULT_FREQUENCY
+    scenario["billing_cycle"] = _billing_cycle(scenario, line)
+    # Lo storico salva i costi come REAL: "$499" come nel report dell'app, non "$499.0"
+    monthly_cost = scenario["monthly_cost"]
+    if isinstance(monthly_cost, float) and monthly_cost.is_integer():
+        scenario["monthly_cost"] = int(monthly_cost)
+    scenario["main_metric"] = main_metric(tool, requirement)
+    # Il piano può mancare se lo scenario è stato salvato con un catalogo precedente
+    plan = TOOLS_DATA[tool]["plans"].get(scenario["plan"])
+    scenario["plan_features"] = list(plan["features"]) if plan else []
+    scenario["report_date"] = date or datetime.now().strftime('%d/%m/%Y %H:%M')
+    return scenario
+
+
+def reports(source, fmt, chunk_size=1000, date=None):
+    """Report degli scenari letti da source (CSV o JSONL), un blocco di righe alla volta"""
+    date = date or datetime.now().strftime('%d/%m/%Y %H:%M')
+    if fmt == "csv":
+        records, first_line = csv.DictReader(source), 2
+    else:
+        records, first_line = (json.loads(line) for line in source if line.strip()), 1
+    for start, rows in _chunks(records, chunk_size, first_line):
+        for offset, row in enumerate(quote_chunk(start, rows)):
+            yield report_record(row, start + offset, date)
+
+
+def write_csv(records, sink):
+    """Scrive i report come CSV (caratteristiche separate da '; '); restituisce i report scritti"""
+    writer = None
+    written = 0
+    for record in records:
+        if writer is None:
+            fieldnames = FIELDS + [f for f in record if f not in FIELDS and f not in REPORT_FIELDS] + REPORT_FIELDS
+            writer = csv.DictWriter(sink, fieldnames=fieldnames, lineterminator="\n", extrasaction="ignore")
+            writer.writeheader()
+        row = dict(record, plan_features=FEATURE_SEPARATOR.join(record["plan_features"]),
+                   platforms=", ".join(record["platforms"]))
+        writer.writerow(row)
+        written += 1
+    return written
+
+
+def write_jsonl(records, sink):
+    """Scrive un report JSON per riga; restituisce i report scritti"""
+    written = 0
+    for record in records:
+        sink.write(json.dumps(record, ensure_ascii=False) + "\n")
+        written += 1
+    return written
+
+
+def _report_name(number, record):
+    name = re.sub(r"[^0-9A-Za-z.]+", "-", f"{record['tool']}-{record['plan']}")
+    return f"report-{number:06d}-{name}.txt"
+
+
+def write_zip(records, sink):
+    """Scrive un ZIP con un report TXT per scenario su sink binario (anche non seekable)"""
+    written = 0
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for record in records:
+            written += 1
+            text = report_text(record["tool"], record, record["billing_cycle"], record["competitors"],
+                               record["platforms"], record["frequency"], record["report_date"])
+            archive.writestr(_report_name(written, record), text)
+    return written
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "zip": write_zip}
+
+
+def _output_format(path, output_format):
+    if output_format:
+        return output_format
+    for fmt in OUTPUT_FORMATS:
+        if path.endswith(f".{fmt}"):
+            return fmt
+    return "csv"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Esporta in blocco i report dei preventivi",
+        epilog="Campi: " + ", ".join(FIELDS),
+    )
+    parser.add_argument("input", help="file CSV/JSONL di scenari, '-' per stdin")
+    parser.add_argument("-o", "--output", default="-", help="file di output (default: stdout)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="formato di input (default: dall'estensione)")
+    parser.add_argument("--to", choices=OUTPUT_FORMATS, help="formato di output (default: dall'estensione, o csv)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="scenari per blocco (default: 1000)")
+    args = parser.parse_args(argv)
+
+    fmt = _detect_format(args.input, args.format) if args.input != "-" else (args.format or "csv")
+    output_format = _output_format(args.output, args.to)
+    try:
+        with ExitStack() as stack:
+            source = sys.stdin if args.input == "-" else stack.enter_context(
+                open(args.input, newline="", encoding="utf-8"))
+            if output_format == "zip":
+                sink = sys.stdout.buffer if args.output == "-" else stack.enter_context(output_file(args.output, "wb"))
+            else:
+                sink = sys.stdout if args.output == "-" else stack.enter_context(
+                    output_file(args.output, "w", newline="", encoding="utf-8"))
+            written = WRITERS[output_format](reports(source, fmt, args.chunk_size), sink)
+    except ValueError as exc:
+        raise SystemExit(f"errore: {exc}")
+    print(f"{written} report scritti", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Archivio SQLite degli scenari calcolati.
+
+Ogni calcolo dell'app (input, piano, costi, data e versione del catalogo) viene salvato
+in un database locale. Le scritture sono accumulate e inserite a blocchi in una sola
+transazione; il database usa il journal WAL, così le letture (lista e filtri dello
+storico) non aspettano le scritture. Gli indici su tool, piano e data tengono
+interattive le query anche con milioni di scenari.
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from itertools import islice
+
+DEFAULT_PATH = os.environ.get(
+    "SCENARIO_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios.db")
+)
+
+COLUMNS = (
+    "created_at", "tool", "plan", "billing_cycle", "prompts", "companies", "domains", "pages",
+    "competitors", "platforms", "frequency", "monthly_cost", "yearly_cost", "currency", "catalog_version",
+)
+
+# Le piattaforme sono salvate come testo, come nel report: "ChatGPT, Perplexity"
+PLATFORM_SEPARATOR = ", "
+_PLATFORMS = COLUMNS.index("platforms")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    plan TEXT NOT NULL,
+    billing_cycle TEXT NOT NULL,
+    prompts INTEGER NOT NULL,
+    companies INTEGER,
+    domains INTEGER,
+    pages INTEGER,
+    competitors INTEGER,
+    platforms TEXT,
+    frequency TEXT,
+    monthly_cost REAL NOT NULL,
+    yearly_cost REAL NOT NULL,
+    currency TEXT NOT NULL,
+    catalog_version TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scenarios_tool ON scenarios (tool, created_at);
+CREATE INDEX IF NOT EXISTS scenarios_plan ON scenarios (plan, created_at);
+CREATE INDEX IF NOT EXISTS scenarios_created_at ON scenarios (created_at);
+"""
+
+
+class ScenarioStore:
+    """Scenari su SQLite, con scritture a blocchi; condivisibile tra thread"""
+
+    def __init__(self, path=DEFAULT_PATH, batch_size=100, flush_interval=1.0, clock=time.monotonic):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending = []
+        self._last_flush = clock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        atexit.register(self.flush)
+
+    def add(self, scenario):
+        """Accoda uno scenario (dict con i campi di COLUMNS); created_at di default è adesso.
+
+        Il blocco viene scritto quando raggiunge batch_size scenari o quando è passato
+        flush_interval dall'ultima scrittura; le letture scrivono prima gli scenari in coda.
+        """
+        values = _row(scenario)
+        with self._lock:
+            self._pending.append(values)
+            if len(self._pending) >= self.batch_size or self._clock() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def add_many(self, scenarios):
+        """Scrive molti scenari, a blocchi di batch_size, e svuota la coda"""
+        rows = map(_row, scenarios)
+        while True:
+            chunk = list(islice(rows, self.batch_size))
+            with self._lock:
+                self._pending.extend(chunk)
+                self._flush_locked()
+            if not chunk:
+                return
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._pending:
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT INTO scenarios ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                    self._pending,
+                )
+            self._pending.clear()
+        self._last_flush = self._clock()
+
+    def _where(self, tool, plan, since, until):
+        clauses, params = [], []
+        for clause, value in (("tool = ?", tool), ("plan = ?", plan), ("created_at >= ?", since),
+                              ("created_at < ?", until)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(str(value))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(self, tool=None, plan=None, since=None, until=None, limit=50, offset=0):
+        """Scenari più recenti che soddisfano i filtri (date come 'YYYY-MM-DD' o datetime)"""
+        where, params = self._where(tool, plan, since, until)
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                f"SELECT * FROM scenarios{where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return [_scenario(row) for row in rows]
+
+    def count(self, tool=None, plan=None, since=None, until=None):
+        where, params = self._where(tool, plan, since, until)
+        with self._lock:
+            self._flush_locked()
+            return self._conn.execute(f"SELECT COUNT(*) FROM scenarios{where}", params).fetchone()[0]
+
+    def scan(self, tool=None, plan=None, since=None, until=None, page_size=1000):
+        """Tutti gli scenari che soddisfano i filtri, in ordine di inserimento, letti a pagine"""
+        where, params = self._where(tool, plan, since, until)
+        where += (" AND" if where else " WHERE") + " id > ?"
+        last_id = 0
+        while True:
+            with self._lock:
+                self._flush_locked()
+                rows = self._conn.execute(
+                    f"SELECT * FROM scenarios{where} ORDER BY id LIMIT ?", params + [last_id, page_size]
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield _scenario(row)
+            last_id = rows[-1]["id"]
+
+    def get(self, scenario_id):
+        """Uno scenario per id, o None"""
+        with self._lock:
+            self._flush_locked()
+            row = self._conn.execute("SELECT * FROM scenarios WHERE id = ?", (scenario_id,)).fetchone()
+        return _scenario(row) if row else None
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+        self._conn.close()
+
+
+def _row(scenario):
+    """Valori di uno scenario nell'ordine di COLUMNS"""
+    row = [scenario.get(column) for column in COLUMNS]
+    row[0] = row[0] or datetime.now().isoformat(sep=" ", timespec="seconds")
+    platforms = row[_PLATFORMS]
+    if isinstance(platforms, (list, tuple)):
+        row[_PLATFORMS] = PLATFORM_SEPARATOR.join(platforms)
+    return row
+
+
+def _scenario(row):
+    scenario = dict(row)
+    scenario["platforms"] = scenario["platforms"].split(PLATFORM_SEPARATOR) if scenario["platforms"] else []
+    return scenario
@@ -0,0 +1,74 @@
+"""Griglie di sensibilità del costo mensile rispetto a due input alla volta.
+
+Il costo di un tool su una griglia x × y si ottiene in un solo passaggio vettoriale,
+con una riga di valori x e una colonna di valori y estese l'una sull'altra (broadcast)
+dal motore di pricing_batch. Per intervalli ampi la griglia viene campionata a passo
+costante: oltre qualche centinaio di celle per lato la heatmap è più fitta dei pixel.
+Tra i campioni ci sono anche tutte le soglie di piano e di sovrapprezzo (cost_breaks):
+il costo è costante a tratti su ogni input, quindi ogni cella, dal suo valore fino al
+successivo, ha esattamente il costo calcolato.
+"""
+import numpy as np
+
+from pricing import INPUTS, TIERS
+from pricing_batch import monthly_cost
+
+DEFAULTS = {"prompts": 1, "companies": 1, "domains": 1, "pages": 1000}
+
+
+def grid_axis(lo, hi, max_points=200, breaks=()):
+    """Valori interi da lo a hi (inclusi), al più circa max_points, a passo costante.
+
+    I valori di breaks in [lo, hi] vengono sempre inclusi (se non sono più di max_points):
+    sono i punti in cui il costo cambia, così nessuna soglia cade dentro una cella.
+    """
+    breaks = np.asarray(breaks, dtype=np.int64)
+    breaks = breaks[(breaks >= lo) & (breaks <= hi)]
+    if len(breaks) > max_points:
+        breaks = breaks[:0]
+    step = max(1, -(-(hi - lo + 1) // max(max_points - len(breaks), 1)))
+    return np.unique(np.concatenate([np.arange(lo, hi + 1, step, dtype=np.int64), breaks, [hi]]))
+
+
+def cost_grid(tool, x_input, x_values, y_input, y_values, fixed=None):
+    """Piano e costo mensile su tutta la griglia.
+
+    Restituisce (plan_id, monthly_cost) di forma (len(y_values), len(x_values)); gli
+    input non sugli assi valgono fixed o i default di calculate_cost_*.
+    """
+    values = dict(DEFAULTS, **(fixed or {}))
+    values[x_input] = np.asarray(x_values, dtype=np.int64)[np.newaxis, :]
+    values[y_input] = np.asarray(y_values, dtype=np.int64)[:, np.newaxis]
+    return monthly_cost(tool, **values)
+
+
+def cost_breaks(tool, name, lo, hi):
+    """Tutti i valori di `name` in (lo, hi] da cui il costo può cambiare: soglie dei piani
+    e ogni gradino di sovrapprezzo (included + k × block)"""
+    table = TIERS[tool]
+    index = INPUTS.index(name)
+    breaks = [limit + 1 for limit in dict(table.limits).get(index, ())[:-1]]
+    for overage_index, included, block, _ in table.overage:
+        if overage_index == index:
+            first = included + block * max(1, (lo - included) // block)
+            breaks.extend(range(first, hi + 1, block))
+    return np.unique(np.asarray([value for value in breaks if lo < value <= hi], dtype=np.int64))
+
+
+def tier_thresholds(tool, name, lo, hi):
+    """Soglie di `name` in (lo, hi] da cui serve un piano superiore o scatta il sovrapprezzo.
+
+    Restituisce una lista di (valore, descrizione), ordinata per valore.
+    """
+    table = TIERS[tool]
+    index = INPUTS.index(name)
+    thresholds = []
+    limits = dict(table.limits).get(index)
+    if limits:
+        for plan_id in range(len(limits) - 1):
+            thresholds.append((limits[plan_id] + 1, table.plans[plan_id + 1]))
+    for overage_index, included, block, _ in table.overage:
+        if overage_index == index:
+            thresholds.append((included + block, f"{table.plans[-1]} + extra"))
+    # Piani con la stessa soglia: vale l'ultimo, l'unico che bisect può scegliere
+    return sorted({value: label for value, label in thresholds if lo < value <= hi}.items())
@@ -0,0 +1,182 @@
+"""Testi statici dell'interfaccia: profili dei tool, link, benefici ROI, input del form ed etichette.
+
+app.py viene rieseguito a ogni rerun di ogni sessione, quindi i dict definiti lì vengono
+ricostruiti ogni volta. Questi dati invece sono costruiti una volta per processo,
+all'import, e condivisi da tutte le sessioni. Sono in sola lettura: record NamedTuple
+(tuple immutabili, senza __dict__), mappingproxy al posto dei dict e stringhe internate.
+
+Input del form, etichette e assi della heatmap di un tool si ricavano dalle chiavi dei
+limiti nel suo blocco "pricing" del catalogo: valgono anche per i tool aggiunti al
+catalogo, e seguono le ricariche a caldo.
+"""
+import sys
+from types import MappingProxyType
+from typing import NamedTuple
+
+from pricing import INPUTS, TIERS, TOOLS_DATA
+
+
+class InputField(NamedTuple):
+    """Parametri del number_input di un input prezzato"""
+    label: str
+    min_value: int
+    max_value: int
+    value: int           # valore iniziale
+    step: int
+    help: str
+
+
+class ToolProfile(NamedTuple):
+    """Descrizione qualitativa di un tool"""
+    feature: str         # caratteristica principale, nel confronto
+    ideal_for: str       # ideale per, nel confronto
+    url: str             # pagina prezzi del tool
+    roi_benefits: tuple  # benefici nella stima ROI
+    inputs: MappingProxyType  # input -> InputField, dove diverso da INPUT_FIELDS
+
+
+def _frozen(mapping):
+    return MappingProxyType({sys.intern(key): value for key, value in mapping.items()})
+
+
+def _field(label, min_value, max_value, value, step=1, help=""):
+    return InputField(sys.intern(label), min_value, max_value, value, step, sys.intern(help))
+
+
+def _profile(feature, ideal_for, url, roi_benefits, inputs=None):
+    return ToolProfile(
+        sys.intern(feature), sys.intern(ideal_for), sys.intern(url), tuple(sys.intern(b) for b in roi_benefits),
+        _frozen(inputs or {})
+    )
+
+
+# Input del form per i tool senza parametri propri (ad esempio aggiunti al catalogo)
+INPUT_FIELDS = _frozen({
+    "prompts": _field("Numero di prompts da monitorare", 1, 5000, 100, 10, "Quante query vuoi tracciare"),
+    "companies": _field("Numero di company da tracciare", 1, 10, 1, help="Quante company vuoi tracciare"),
+    "domains": _field("Numero di domini (progetti)", 1, 20, 1, help="Quanti domini/progetti vuoi monitorare"),
+    "pages": _field("Numero di pagine", 100, 10000, 1000, 100, "Quante pagine del sito monitorare"),
+})
+
+
+TOOL_PROFILES = _frozen({
+    "Profound": _profile(
+        "Answer engine tracking",
+        "Enterprise con focus AI-first",
+        "https://www.tryprofound.com/ ",
+        [
+            "Deep insights su answer engines",
+            "Tracking accurato su 4+ piattaforme AI",
+            "Data history per analisi trend prompts",
+            "Focus su conversazioni AI"
+        ],
+        {
+            "prompts": _field("Numero di prompts da monitorare", 1, 1000, 200, 10, "Piano base include 200 prompts"),
+            "companies": _field("Numero di company da tracciare", 1, 10, 1, help="Piano base include 1 company")
+        }
+    ),
+    "Otterly.ai": _profile(
+        "AI search monitoring",
+        "Startup e PMI",
+        "https://otterly.ai/pricing",
+        [
+            "Visibilità brand su AI: +50% in 3-6 mesi",
+            "Ottimizzazione contenuti per risposte AI",
+            "Tracking competitor su prompts rilevanti",
+            "Identificazione gap di mercato"
+        ],
+        {
+            "prompts": _field(
+                "Numero di prompts da monitorare", 1, 1000, 15, 5,
+                "Quante query vuoi tracciare (es: 'miglior software per...', 'come scegliere...')"
+            )
+        }
+    ),
+    "Ubersuggest": _profile(
+        "SEO + AI completo",
+        "Freelancer e piccoli team",
+        "https://app.neilpatel.com/en/pricingg",
+        [
+            "SEO + AI prompt monitoring combinato",
+            "Prompt research tradizionale + AI",
+            "Analisi competitor su query comuni",
+            "Content ideas per ottimizzazione AI"
+        ],
+        {
+            "prompts": _field("AI Prompts al mese", 1, 100, 10, 5, "Numero di AI prompts/query al mese da monitorare")
+        }
+    ),
+    "Conductor": _profile(
+        "Enterprise SEO platform",
+        "Grandi aziende",
+        "https://support.conductor.com/en_US/platform-faqs-and-more/pricing-for-conductor-s-products",
+        [
+            "Platform enterprise completa",
+            "Content workflow automation",
+            "Advanced analytics su prompts",
+            "Integrations con marketing stack"
+        ],
+        {
+            "prompts": _field("Numero di prompts", 1, 5000, 500, 50, "Quanti prompts vuoi tracciare")
+        }
+    ),
+})
+
+# Profilo vuoto per i tool aggiunti al catalogo senza testi: nessun link, input di INPUT_FIELDS
+NO_PROFILE = _profile("", "", "", ())
+
+PLATFORMS = tuple(sys.intern(platform) for platform in ("ChatGPT", "Perplexity", "Google AI Overviews", "Gemini",
+                                                         "Copilot"))
+
+# Etichette degli input nelle tabelle e nel report, per input o per chiave del limite nel
+# catalogo (pricing.limits), che ha la precedenza: "ai_prompts" -> AI prompts
+INPUT_LABELS = _frozen({"prompts": "Prompts", "companies": "Company", "domains": "Domini", "pages": "Pagine"})
+LIMIT_LABELS = _frozen({"ai_prompts": "AI prompts"})
+METRIC_LABELS = _frozen({
+    "prompts": "prompts", "ai_prompts": "AI prompts", "companies": "company", "domains": "domini", "pages": "pagine"
+})
+
+# Limiti d'uso dei piani (usage.LIMIT_FIELDS) nei messaggi
+USAGE_LIMIT_LABELS = _frozen({
+    "answer_engines": "motori AI",
+    "competitors": "competitor",
+    "prompt_frequency": "frequenza di aggiornamento"
+})
+
+
+def form_inputs(tool):
+    """Input del form di un tool: i prompts, più gli input che determinano il piano"""
+    priced = [INPUTS[index] for index, _ in TIERS[tool].limits]
+    return ["prompts"] + [name for name in priced if name != "prompts"]
+
+
+def input_field(tool, name):
+    """Parametri del number_input di un input: dal profilo del tool, o quelli generici"""
+    return TOOL_PROFILES.get(tool, NO_PROFILE).inputs.get(name, INPUT_FIELDS[name])
+
+
+def _limit_key(tool, name):
+    return TOOLS_DATA[tool]["pricing"]["limits"].get(name, name) if tool in TOOLS_DATA else name
+
+
+def input_label(tool, name):
+    """Etichetta di un input nelle tabelle ("AI prompts" se il limite è ai_prompts)"""
+    return LIMIT_LABELS.get(_limit_key(tool, name), INPUT_LABELS[name])
+
+
+def metric_label(tool, name):
+    """Etichetta di un input nella descrizione del fabbisogno ("200 prompts, 1 company")"""
+    key = _limit_key(tool, name)
+    return METRIC_LABELS.get(key, METRIC_LABELS.get(name, key.replace("_", " ")))
+
+
+def sensitivity_axes(tool):
+    """Assi della heatmap: (input, etichetta, minimo, massimo) dei prompts e del primo altro
+    input del form, con i limiti del form; None se il form ha solo i prompts"""
+    names = form_inputs(tool)
+    if len(names) < 2:
+        return None
+    return tuple(
+        (name, input_label(tool, name), input_field(tool, name).min_value, input_field(tool, name).max_value)
+        for name in names[:2]
+    )
@@ -0,0 +1,163 @@
+"""Volumi di query: quante interrogazioni ai motori AI esegue davvero una configurazione.
+
+Query al mese = prompts × piattaforme × esecuzioni al mese (dalla frequenza) ×
+moltiplicatore competitor. Il piano scelto da pricing_batch in base agli input prezzati
+può non reggere questo carico: i limiti d'uso dei piani in TOOLS_DATA (motori AI,
+competitor, frequenza di aggiornamento dei prompt) vengono confrontati con i volumi, e
+si sceglie il primo piano, dallo stesso in su, che li regge. Un piano che non dichiara
+un limite eredita quello del piano inferiore più vicino che lo dichiara: un piano più
+caro non concede meno. Se nessun piano inferiore lo dichiara, il limite è illimitato.
+Tutto lavora su array NumPy, per prezzare un intero portafoglio in un passaggio.
+"""
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from pricing import TIERS, TOOLS_DATA, current_catalog
+from pricing_batch import cost_dtype, price_tool
+
+DAYS_PER_MONTH = 365 / 12
+RUNS_PER_MONTH = {
+    "Settimanale": 52 / 12,
+    "Giornaliero": DAYS_PER_MONTH,
+    "Real-time": 24 * DAYS_PER_MONTH,  # un controllo all'ora
+}
+# Ogni competitor tracciato aggiunge prompt di confronto pari al 10% dei prompt
+COMPETITOR_FACTOR = 0.1
+
+# Campi dei piani in TOOLS_DATA che limitano l'uso, nell'ordine di usage_limits
+LIMIT_FIELDS = ("answer_engines", "competitors", "prompt_frequency")
+
+_PERIOD_DAYS = {"giorno": 1, "giorni": 1, "settimana": 7, "settimane": 7, "mese": DAYS_PER_MONTH,
+                "mesi": DAYS_PER_MONTH}
+
+
+class Usage(NamedTuple):
+    """Volumi e piano che li regge, come array della forma degli scenari"""
+    executions: np.ndarray      # query eseguite al mese
+    plan_id: np.ndarray         # piano che regge il carico (indice in TIERS[tool].plans), -1 se nessuno
+    monthly_cost: np.ndarray    # costo mensile di quel piano (0 se nessuno)
+    yearly_cost: np.ndarray
+    cost_per_query: np.ndarray  # costo mensile / query eseguite (nan se nessun piano o nessuna query)
+    upgraded: np.ndarray        # True dove il carico richiede un piano più alto di quello prezzato
+
+
+def runs_per_month(frequency):
+    """Esecuzioni al mese per una frequenza (scalare o array di etichette del form)"""
+    frequency = np.asarray(frequency)
+    runs = np.full(frequency.shape, np.nan)
+    for name, value in RUNS_PER_MONTH.items():
+        runs[frequency == name] = value
+    if np.isnan(runs).any():
+        unknown = sorted(set(frequency[np.isnan(runs)].tolist()))
+        raise ValueError(f"frequenza sconosciuta {unknown[0]!r} (valide: {', '.join(RUNS_PER_MONTH)})")
+    return runs
+
+
+def executions(prompts, platforms, frequency, competitors=0):
+    """Query eseguite al mese"""
+    prompts = np.asarray(prompts, dtype=np.float64)
+    competitors = np.asarray(competitors, dtype=np.float64)
+    return prompts * np.asarray(platforms) * runs_per_month(frequency) * (1 + COMPETITOR_FACTOR * competitors)
+
+
+def _max_runs(prompt_frequency):
+    """Esecuzioni al mese consentite da un testo come 'ogni 2 settimane' o 'giornaliero'"""
+    text = prompt_frequency.strip().lower()
+    if text in ("giornaliero", "giornaliera"):
+        return DAYS_PER_MONTH
+    if text in ("settimanale",):
+        return RUNS_PER_MONTH["Settimanale"]
+    match = re.fullmatch(r"ogni (\d+ )?(\w+)", text)
+    if match is None or match.group(2) not in _PERIOD_DAYS:
+        raise ValueError(f"prompt_frequency non riconosciuta: {prompt_frequency!r}")
+    return DAYS_PER_MONTH / (int(match.group(1) or 1) * _PERIOD_DAYS[match.group(2)])
+
+
+@lru_cache(maxsize=64)
+def usage_limits(tool, catalog_version):
+    """Limiti d'uso per piano, come array (inf se né il piano né quelli inferiori lo dichiarano).
+
+    Restituisce (piattaforme, competitor, esecuzioni al mese); la versione del catalogo
+    fa da chiave, così i limiti seguono i ricaricamenti.
+    """
+    plans = [TOOLS_DATA[tool]["plans"][plan] for plan in TIERS[tool].plans]
+
+    def column(field, convert=float):
+        limits, limit = [], np.inf
+        for plan in plans:
+            # Il limite mancante viene dal piano inferiore più vicino
+            if field in plan:
+                limit = convert(plan[field])
+            limits.append(limit)
+        return np.array(limits)
+
+    return tuple(column(field, _max_runs if field == "prompt_frequency" else float) for field in LIMIT_FIELDS)
+
+
+def usage_tool(tool, prompts, companies=1, domains=1, pages=1000, platforms=3, frequency="Settimanale",
+               competitors=0, billing_cycle="monthly"):
+    """Volumi di query e piano più economico che li regge, su array di scenari.
+
+    platforms è il numero di piattaforme AI monitorate; gli input scalari vengono estesi
+    (broadcast) alla lunghezza degli array, come in pricing_batch.price_tool.
+    """
+    table = TIERS[tool]
+    quoted_id, quoted_cost, _ = price_tool(tool, prompts, companies, domains, pages, billing_cycle)
+    platforms = np.asarray(platforms, dtype=np.int64)
+    competitors = np.asarray(competitors, dtype=np.int64)
+    runs = runs_per_month(frequency)
+    monthly_executions = executions(prompts, platforms, frequency, competitors)
+    shape = np.broadcast_shapes(quoted_id.shape, monthly_executions.shape)
+    monthly_executions = np.broadcast_to(monthly_executions, shape)
+
+    # Piani candidati: dal piano prezzato in su, che rispettano tutti i limiti d'uso
+    max_platforms, max_competitors, max_runs = (
+        limit.reshape((-1,) + (1,) * len(shape)) for limit in usage_limits(tool, current_catalog().version)
+    )
+    plan_ids = np.arange(len(table.plans)).reshape((-1,) + (1,) * len(shape))
+    fits = (
+        (plan_ids >= quoted_id)
+        & (platforms <= max_platforms)
+        & (competitors <= max_competitors)
+        & (runs <= max_runs + 1e-9)
+    )
+    fits = np.broadcast_to(fits, (len(table.plans),) + shape)
+    sustainable = fits.any(axis=0)
+    plan_id = np.where(sustainable, fits.argmax(axis=0), -1)
+
+    # Un piano più alto di quello prezzato contiene già gli input: nessun sovrapprezzo
+    prices = np.asarray(table.prices, dtype=cost_dtype(table))
+    upgraded = plan_id > quoted_id
+    monthly_cost = np.where(upgraded, prices[np.maximum(plan_id, 0)], np.broadcast_to(quoted_cost, shape))
+    monthly_cost = np.where(sustainable, monthly_cost, 0)
+    yearly_cost = monthly_cost * 12 * np.where(np.asarray(billing_cycle) == "yearly", table.yearly_discount, 1.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost_per_query = np.where(sustainable & (monthly_executions > 0), monthly_cost / monthly_executions, np.nan)
+    return Usage(monthly_executions, plan_id, monthly_cost, yearly_cost, cost_per_query, upgraded)
+
+
+def usage_quote(tool, requirement, platforms, frequency, competitors=0, billing_cycle="monthly"):
+    """Volumi e piano per una sola configurazione, come dict di valori Python.
+
+    Se nessun piano regge il carico, plan è None ed exceeded elenca i limiti (campi di
+    LIMIT_FIELDS) superati anche dal piano più alto.
+    """
+    usage = usage_tool(tool, platforms=platforms, frequency=frequency, competitors=competitors,
+                       billing_cycle=billing_cycle, **requirement)
+    plan_id = int(usage.plan_id)
+    needed = (platforms, competitors, float(runs_per_month(frequency)))
+    limits = usage_limits(tool, current_catalog().version)
+    return {
+        "executions": float(usage.executions),
+        "plan": TIERS[tool].plans[plan_id] if plan_id >= 0 else None,
+        "monthly_cost": usage.monthly_cost.item(),
+        "yearly_cost": float(usage.yearly_cost),
+        "cost_per_query": float(usage.cost_per_query),
+        "upgraded": bool(usage.upgraded),
+        "exceeded": [
+            field for field, limit, value in zip(LIMIT_FIELDS, limits, needed) if value > limit[-1] + 1e-9
+        ] if plan_id < 0 else [],
+    }